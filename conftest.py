@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:05:12 2026
+
+@author: LC
+"""
+
+# schwab_test.py is the live endpoint script (needs schwab_config.json and a login),
+# the unit tests are in tests/
+collect_ignore = ['schwab_test.py']
@@ -6,17 +6,31 @@ Created on Thu Nov  7 08:23:24 2019
 """
 
 from datetime import datetime
-import json
-from typing import Optional, Dict, Any, Callable, List
+from typing import Optional, Dict, Any, Callable, List, Tuple
 import urllib.parse as up
 import logging
+import math
+import time
+import threading
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
 from schwab_auth import SchwabAuth
-from schwab_enum import (Status, TransactionType, AssetType, Instruction, Session, Duration,
-                         OrderType, OrderStrategyType, Projection, Market, SymbolId, Sort,
-                         MoversFrequency, Fields, FrequencyType, Frequency, PeriodType, Period)
+from schwab_ratelimit import RateLimiter
+from schwab_retry import RetryPolicy
+from schwab_cache import ResponseCache
+from schwab_singleflight import SingleFlight, AsyncSingleFlight
+from schwab_candles import decode_candles, decode_history, history_output
+from schwab_option_chain import chain_output
+from schwab_codec import get_codec, loads as json_loads
+from schwab_models import Account, Order, Transaction, to_models, quotes_to_models
+from schwab_orders import OrderSpec, OrderResult
+from schwab_enum import (Priority, OutputFormat, Status, TransactionType, AssetType, Instruction,
+                         Session, Duration, OrderType, OrderStrategyType, Projection, Market,
+                         SymbolId, Sort, MoversFrequency, Fields, FrequencyType, Frequency,
+                         PeriodType, Period)
 
 
 if not logging.root.handlers:
@@ -32,33 +46,158 @@ BASE_MARKET_URL = 'https://api.schwabapi.com/marketdata/v1/'
 BASE_TRADER_URL = 'https://api.schwabapi.com/trader/v1/'
 ADDITIONAL_HEADERS = {'Content-Type':'application/json'}
 
+
+def _status_code(response) -> Optional[int]:
+    '''
+    Returns the HTTP status of a requests.Response or an aiohttp.ClientResponse.
+    '''
+    return getattr(response, 'status_code', getattr(response, 'status', None))
+
+
 class SchwabApi():
     '''
 	Schwab API Class.
 
 	Performs request to the Schwab API. Response in JSON format.
+
+    HTTP connections are pooled and kept alive between requests. One
+    requests.Session is used for the sync path and one aiohttp.ClientSession
+    (created lazily inside the running event loop) for the async path.
+    Call close()/aclose() or use the object as a (async) context manager
+    to release them.
     '''
-    def __init__(self, config, async_mode=False):
+
+    # connection pool defaults
+    POOL_CONNECTIONS = 10
+    POOL_MAXSIZE = 20
+    LIMIT_PER_HOST = 10
+    KEEPALIVE_TIMEOUT = 30
+    REQUEST_TIMEOUT = 30
+
+    # bulk quotes defaults
+    QUOTES_CHUNK_SIZE = 250
+    QUOTES_MAX_WORKERS = 4
+    ORDERS_MAX_WORKERS = 8
+    # cached endpoints whose response depends on the user (cache key includes it)
+    USER_CACHED_ENDPOINTS = ('get_user_preference', 'get_account_numbers')
+    # seconds without new principals/account hash requests after a failed load
+    INIT_RETRY = 30
+
+    def __init__(self, config, async_mode=False, *,
+                 pool_connections: int = POOL_CONNECTIONS,
+                 pool_maxsize: int = POOL_MAXSIZE,
+                 limit_per_host: int = LIMIT_PER_HOST,
+                 keepalive_timeout: float = KEEPALIVE_TIMEOUT,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 cache: Optional[ResponseCache] = None,
+                 coalesce_requests: bool = True,
+                 history_store = None,
+                 auto_refresh_token: bool = False,
+                 lazy_init: bool = False):
 
         '''
         Initialize object with provided account info
         Open Authentication object to have a valid access token for every request.
+
+        NAME: pool_connections
+        DESC: Number of host pools cached by the sync session.
+        TYPE: int
+
+        NAME: pool_maxsize
+        DESC: Maximum number of connections kept in each pool (sync) and
+              total connections of the async connector.
+        TYPE: int
+
+        NAME: limit_per_host
+        DESC: Maximum simultaneous connections to the same host (async).
+        TYPE: int
+
+        NAME: keepalive_timeout
+        DESC: Seconds an idle async connection is kept open for reuse.
+        TYPE: float
+
+        NAME: rate_limiter
+        DESC: Client-side rate limiter with a budget per base url. Default is a new
+              RateLimiter with the default trader and market-data budgets.
+              Share one instance between objects to share the quota,
+              RateLimiter({}) disables limiting.
+        TYPE: RateLimiter
+
+        NAME: retry_policy
+        DESC: Retry policy for failed requests (backoff, Retry-After, retry budget).
+              Default is RetryPolicy(), RetryPolicy(max_retries = 0) disables retries.
+        TYPE: RetryPolicy
+
+        NAME: cache
+        DESC: Response cache for slow-changing endpoints (market hours, instruments,
+              expiration chain, user preference). Default is None (no cache).
+        TYPE: ResponseCache
+
+        NAME: coalesce_requests
+        DESC: Identical concurrent GET requests (same method, url and params) are sent
+              once and every caller gets the same (shared, read-only) result.
+        TYPE: bool
+
+        NAME: history_store
+        DESC: Local candle store (schwab_history_store.HistoryStore). When set,
+              get_pricehistory_dates reads stored candles from disk and only downloads
+              the missing date ranges. Default is None.
+        TYPE: HistoryStore
+
+        NAME: auto_refresh_token
+        DESC: Renews the access token in a background thread before it expires, so no
+              request waits for the token endpoint (SchwabAuth.start_refresher).
+        TYPE: bool
+
+        NAME: lazy_init
+        DESC: principals and account_hash are loaded on first use instead of in the
+              constructor. Jobs that never use them make no request at startup. With
+              a disk cache, ResponseCache(DiskCacheBackend()), both are read from disk
+              while their TTL lasts (get_user_preference, get_account_numbers).
+        TYPE: bool
         '''
+        self._async_mode = async_mode
         if async_mode:
             self._make_request = self._make_request_async
         else:
             self._make_request = self._make_request_sync
 
-        self._auth = SchwabAuth(config)
-
-        if self._auth:
-            self.principals = self.get_user_preference()  # ver como agregar el await
-            accounts = self.get_account_numbers()         # ver como agregar el await
-            self.account_hash = accounts[0]['hashValue']
-
-            logger.info("Schwab API Initialized")
-        else:
+        self._pool_maxsize = pool_maxsize
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._session.mount('https://', adapter)
+        self._async_session = None
+
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.cache = cache
+        self._coalesce_requests = coalesce_requests
+        self._flights = SingleFlight()
+        self._async_flights = AsyncSingleFlight()
+        self.history_store = history_store
+
+        self._user = config.get('user')
+        self._auth = self._create_auth(config, auto_refresh_token)
+        self._principals = None
+        self._account_hash = None
+        self._initialized = False
+        self._init_retry_at = 0.0
+        self._init_lock = threading.Lock()
+
+        if not self._auth:
             logger.warning("Could not authenticate")
+        elif async_mode:
+            logger.info("Schwab API created in async mode. "
+                        "Use AsyncSchwabApi.create to load principals and account hash")
+        elif lazy_init:
+            logger.info("Schwab API Initialized, principals and account hash load on first use")
+        else:
+            self._initialize()
+            logger.info("Schwab API Initialized")
 
 
 
@@ -71,45 +210,312 @@ class SchwabApi():
 
         return str(self._auth)
 
-    def _make_request_sync(self, method: str, base_url: str, endpoint: str,
-                      additional_headers: Optional[Dict[str, str]] = None, **kwargs: Any):
+    def __enter__(self):
+        return self
 
-        headers = self._auth.get_headers()
-        if additional_headers:
-            headers.update(additional_headers)
-        url = up.urljoin(base_url, endpoint.lstrip('/'))
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
-        try:
-            response = requests.request(method, url, headers=headers, verify=True, timeout=30, **kwargs)
-            response.raise_for_status()
-            if response.content:
-                return response.json()
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    def close(self) -> None:
+        '''
+        Closes the pooled sync session. The async session must be closed
+        from its event loop with aclose().
+        '''
+        self._auth.stop_refresher()
+        self._session.close()
+
+    async def aclose(self) -> None:
+        '''
+        Closes both pooled sessions.
+        '''
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
+        self._async_session = None
+        self._auth.stop_refresher()
+        self._session.close()
+
+    def _initialize(self) -> None:
+        '''
+        Loads user principals and the default account hash, both requests at the
+        same time. Values already set are kept. After a failed load the requests
+        are not sent again for INIT_RETRY seconds, so the properties do not resend
+        them on every access (place_order, get_orders...).
+        '''
+        with self._init_lock:
+            if self._initialized or time.monotonic() < self._init_retry_at:
+                return
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                principals = executor.submit(self.get_user_preference)
+                accounts = executor.submit(self.get_account_numbers)
+                self._set_initial(principals.result(), accounts.result())
+
+    def _set_initial(self, principals: Optional[Dict[str, Any]],
+                     accounts: Optional[List[Dict[str, Any]]]) -> None:
+        # A failed request returns None or the Response, not the JSON payload
+        if self._principals is None and isinstance(principals, dict):
+            self._principals = principals
+        if (self._account_hash is None and isinstance(accounts, list) and accounts
+                and isinstance(accounts[0], dict)):
+            self._account_hash = accounts[0].get('hashValue')
+        self._initialized = self._principals is not None and self._account_hash is not None
+        if not self._initialized:
+            self._init_retry_at = time.monotonic() + self.INIT_RETRY
+            logger.error("Could not load principals and account hash, retrying in %d s",
+                         self.INIT_RETRY)
+
+    @property
+    def principals(self) -> Optional[Dict[str, Any]]:
+        '''
+        User preference (streamer info), loaded on first use with lazy_init.
+        '''
+        if not self._initialized and not self._async_mode:
+            self._initialize()
+        return self._principals
+
+    @principals.setter
+    def principals(self, principals: Optional[Dict[str, Any]]) -> None:
+        self._principals = principals
+
+    @property
+    def account_hash(self) -> Optional[str]:
+        '''
+        Hash of the default (first) account, loaded on first use with lazy_init.
+        '''
+        if not self._initialized and not self._async_mode:
+            self._initialize()
+        return self._account_hash
+
+    @account_hash.setter
+    def account_hash(self, account_hash: Optional[str]) -> None:
+        self._account_hash = account_hash
+
+    @staticmethod
+    def _then(response: Any, callback: Callable[[Any], Any]) -> Any:
+        '''
+        Applies callback to the result of _make_request.
+
+        In sync mode the callback runs immediately. In async mode the request
+        result is a coroutine, so a new coroutine is returned that awaits it
+        and then applies the callback. This lets every endpoint method do its
+        post-processing once and still be awaitable in async mode.
+        '''
+        if asyncio.iscoroutine(response):
+            async def chained():
+                return callback(await response)
+            return chained()
+        return callback(response)
+
+    def _output(self, response: Any, output_format: OutputFormat,
+                convert: Callable[[Any], Any]) -> Any:
+        '''
+        Returns the response as is for OutputFormat.JSON, otherwise converted.
+        '''
+        if output_format is OutputFormat.JSON:
             return response
+        return self._then(response, convert)
 
-        except requests.exceptions.RequestException as error:
-            logger.error("Error: %s, Response: %s", error, response.json())
+    def _resolved(self, value: Any) -> Any:
+        '''
+        Returns value as _make_request would: directly in sync mode and as a
+        coroutine in async mode.
+        '''
+        if self._async_mode:
+            async def resolved():
+                return value
+            return resolved()
+        return value
+
+    def _cached_request(self, name: str, method: str, base_url: str, endpoint: str,
+                        **kwargs: Any) -> Any:
+        '''
+        _make_request through the response cache, name is the endpoint method
+        name used to look up its TTL.
+        '''
+        if self.cache is None or not self.cache.ttl(name):
+            return self._make_request(method, base_url, endpoint, **kwargs)
+
+        url = up.urljoin(base_url, endpoint.lstrip('/'))
+        key = self.cache.make_key(name, method, url, kwargs.get('params'))
+        if name in self.USER_CACHED_ENDPOINTS:
+            key = f'{self._user}|{key}'
+        hit, value = self.cache.get(name, key)
+        if hit:
+            return self._resolved(value)
+
+        def store(response):
+            if response is not None:
+                self.cache.set(name, key, response)
+            return response
+
+        return self._then(self._make_request(method, base_url, endpoint, **kwargs), store)
+
+    def _create_auth(self, config, auto_refresh: bool) -> SchwabAuth:
+        '''
+        Authentication object, AsyncSchwabApi uses AsyncSchwabAuth.
+        '''
+        return SchwabAuth(config, auto_refresh=auto_refresh)
+
+    def _get_async_session(self) -> aiohttp.ClientSession:
+        '''
+        Returns the pooled aiohttp session, creating it on first use so it is
+        bound to the running event loop.
+        '''
+        if self._async_session is None or self._async_session.closed:
+            connector = aiohttp.TCPConnector(limit=self._pool_maxsize,
+                                             limit_per_host=self._limit_per_host,
+                                             keepalive_timeout=self._keepalive_timeout)
+            self._async_session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.REQUEST_TIMEOUT))
+        return self._async_session
+
+    @staticmethod
+    def _flight_key(method: str, base_url: str, endpoint: str,
+                    kwargs: Dict[str, Any]) -> Optional[tuple]:
+        '''
+        Key identifying identical requests, None when the request must not be
+        coalesced (only GET requests are).
+        '''
+        if method.lower() != 'get':
             return None
+        params = kwargs.get('params') or {}
+        return (method.lower(), up.urljoin(base_url, endpoint.lstrip('/')),
+                tuple(sorted((key, str(value)) for key, value in params.items())),
+                tuple(sorted((key, repr(value)) for key, value in kwargs.items()
+                             if key != 'params')))
+
+    def _make_request_sync(self, method: str, base_url: str, endpoint: str,
+                      additional_headers: Optional[Dict[str, str]] = None, **kwargs: Any):
+
+        key = self._flight_key(method, base_url, endpoint, kwargs)
+        if key is None or not self._coalesce_requests:
+            return self._send_request_sync(method, base_url, endpoint,
+                                           additional_headers, **kwargs)
+        return self._flights.do(key, lambda: self._send_request_sync(
+            method, base_url, endpoint, additional_headers, **kwargs))
 
     async def _make_request_async(self, method: str, base_url: str, endpoint: str,
                       additional_headers: Optional[Dict[str, str]] = None, **kwargs: Any):
 
-        headers = self._auth.get_headers()
-        if additional_headers:
-            headers.update(additional_headers)
+        key = self._flight_key(method, base_url, endpoint, kwargs)
+        if key is None or not self._coalesce_requests:
+            return await self._send_request_async(method, base_url, endpoint,
+                                                  additional_headers, **kwargs)
+        return await self._async_flights.do(key, lambda: self._send_request_async(
+            method, base_url, endpoint, additional_headers, **kwargs))
+
+    def _send_request_sync(self, method: str, base_url: str, endpoint: str,
+                      additional_headers: Optional[Dict[str, str]] = None, *,
+                      priority: Priority = Priority.NORMAL, raw: bool = False,
+                      full_response: bool = False, **kwargs: Any):
+
         url = up.urljoin(base_url, endpoint.lstrip('/'))
+        self.retry_policy.record_request()
+        attempt = 0
+
+        while True:
+            self.rate_limiter.acquire(base_url, priority)
+
+            headers = self._auth.get_headers()
+            if additional_headers:
+                headers.update(additional_headers)
+
+            response = None
+            try:
+                response = self._session.request(method, url, headers=headers, verify=True,
+                                                 timeout=self.REQUEST_TIMEOUT, **kwargs)
+                response.raise_for_status()
+                if raw:
+                    return response.content
+                if full_response:
+                    return response
+                if response.content:
+                    return json_loads(response.content)
+                return response
+
+            # RequestException first: some of them (InvalidURL...) are also ValueError,
+            # the stdlib codec error
+            except requests.exceptions.RequestException as error:
+                status = response.status_code if response is not None else None
+                retry_after = response.headers.get('Retry-After') if response is not None else None
+                delay = self.retry_policy.retry_delay(method, status, attempt, retry_after)
+                if delay is None:
+                    logger.error("Error: %s, Response: %s", error,
+                                 response.text[:1000] if response is not None else None)
+                    return response if full_response else None
+
+            except get_codec().errors as error:
+                logger.error("Error: invalid JSON response: %s, Response: %s", error,
+                             response.text[:1000] if response is not None else None)
+                return None
+
+            attempt += 1
+            logger.warning("Retrying %s %s in %.2f s (attempt %d, status %s)",
+                           method.upper(), endpoint, delay, attempt, status)
+            time.sleep(delay)
+
+    async def _send_request_async(self, method: str, base_url: str, endpoint: str,
+                      additional_headers: Optional[Dict[str, str]] = None, *,
+                      priority: Priority = Priority.NORMAL, raw: bool = False,
+                      full_response: bool = False, **kwargs: Any):
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.request(method, url, headers=headers, verify_ssl=True,
-                                           timeout=30, **kwargs) as response:
+        url = up.urljoin(base_url, endpoint.lstrip('/'))
+        self.retry_policy.record_request()
+        attempt = 0
+
+        while True:
+            await self.rate_limiter.acquire_async(base_url, priority)
+
+            headers = await self._auth.get_headers_async()
+            if additional_headers:
+                headers.update(additional_headers)
+
+            status = retry_after = body = failed = None
+            try:
+                session = self._get_async_session()
+                async with session.request(method, url, headers=headers, ssl=True,
+                                           **kwargs) as response:
+                    if response.status >= 400:
+                        status = response.status
+                        retry_after = response.headers.get('Retry-After')
+                        body = await response.text()
+                        failed = response
                     response.raise_for_status()
+                    if raw:
+                        return await response.read()
+                    if full_response:
+                        await response.read()
+                        return response
                     if response.content_type == 'application/json':
-                        return await response.json()
-                    return await response.text()
-
-        except aiohttp.ClientError as error:
-            logger.error("Error: %s", error)
-            return None
+                        body = await response.read()
+                        # Empty body (201 Created with a Location header...): the
+                        # response, as in the sync API
+                        return json_loads(body) if body else response
+                    text = await response.text()
+                    return text if text else response
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                delay = self.retry_policy.retry_delay(method, status, attempt, retry_after)
+                if delay is None:
+                    logger.error("Error: %s, Response: %s", error,
+                                 body[:1000] if body else None)
+                    return failed if full_response else None
+
+            except get_codec().errors as error:
+                logger.error("Error: invalid JSON response: %s, Response: %s", error,
+                             body[:1000] if body else None)
+                return None
+
+            attempt += 1
+            logger.warning("Retrying %s %s in %.2f s (attempt %d, status %s)",
+                           method.upper(), endpoint, delay, attempt, status)
+            await asyncio.sleep(delay)
 
     ########## Public services
 
@@ -144,7 +550,7 @@ class SchwabApi():
 
         endpoint = '/userPreference'
 
-        return self._make_request('get', BASE_TRADER_URL, endpoint)
+        return self._cached_request('get_user_preference', 'get', BASE_TRADER_URL, endpoint)
 
 
     #### Account
@@ -158,10 +564,11 @@ class SchwabApi():
         '''
         endpoint = '/accounts/accountNumbers'
 
-        return self._make_request('get', BASE_TRADER_URL, endpoint)
+        return self._cached_request('get_account_numbers', 'get', BASE_TRADER_URL, endpoint)
 
 
-    def get_accounts(self, *, account_hash: Optional[str] = None, fields: Optional[str] = None):
+    def get_accounts(self, *, account_hash: Optional[str] = None, fields: Optional[str] = None,
+                     output_format: OutputFormat = OutputFormat.JSON):
 
         '''
         Account balances, positions, and orders for a specific account.
@@ -184,6 +591,11 @@ class SchwabApi():
               adding position or orders.
         TYPE = List<String>
 
+        NAME: output_format
+        DESC: OutputFormat.MODEL returns schwab_models.Account objects (positions and
+              orders as Position and Order). Default OutputFormat.JSON.
+        TYPE: OutputFormat
+
         EXAMPLE:
         Object.get_accounts(account = 'all', fields = ['orders'])
         Object.get_accounts(account = 'My AccountNumber', fields = ['orders', 'positions'])
@@ -200,7 +612,8 @@ class SchwabApi():
         else:
             endpoint = '/accounts'
 
-        return self._make_request('get', BASE_TRADER_URL, endpoint, params = params)
+        response = self._make_request('get', BASE_TRADER_URL, endpoint, params = params)
+        return self._output(response, output_format, lambda accounts: to_models(accounts, Account))
 
 
     #### Transaction History
@@ -210,7 +623,8 @@ class SchwabApi():
                          account_hash: Optional[str] = None,
                           transaction_type: Optional[str] = TransactionType.NONE ,
                           symbol: Optional[str] = None,
-                          transaction_id: Optional[str]= None):
+                          transaction_id: Optional[str]= None,
+                          output_format: OutputFormat = OutputFormat.JSON):
 
         '''
         Serves to make a request to the "Get Transactions" and "Get Transaction" Endpoint.
@@ -238,6 +652,8 @@ class SchwabApi():
         "Get transaction"request
               is made. Should only be used if you wish to return one transaction.
 
+        output_format: OutputFormat.MODEL returns schwab_models.Transaction objects.
+
         EXAMPLES:
         Object.get_transactions(account = 'MyAccountNum', transaction_type = 'ALL',
                                 start_date = '2019-01-31', end_date = '2019-04-28')
@@ -253,7 +669,9 @@ class SchwabApi():
 
             endpoint = f'/accounts/{account_hash}/transactions/{transaction_id}'
 
-            return self._make_request('get', BASE_TRADER_URL, endpoint)
+            response = self._make_request('get', BASE_TRADER_URL, endpoint)
+            return self._output(response, output_format,
+                                lambda transaction: to_models(transaction, Transaction))
 
         params = {'types':transaction_type.value,
                 'symbol':symbol,
@@ -262,13 +680,16 @@ class SchwabApi():
 
         endpoint = f'/accounts/{account_hash}/transactions'
 
-        return self._make_request('get', BASE_TRADER_URL, endpoint, params = params)
+        response = self._make_request('get', BASE_TRADER_URL, endpoint, params = params)
+        return self._output(response, output_format,
+                            lambda transactions: to_models(transactions, Transaction))
 
 
     #### Orders
 
     def get_orders(self, from_entered_datetime, to_entered_datetime,
-                       *, max_results=None, status=Status.NONE):
+                       *, max_results=None, status=Status.NONE,
+                       output_format: OutputFormat = OutputFormat.JSON):
         '''Orders for all linked accounts. Optionally specify a single status on
         which to filter.
 
@@ -282,6 +703,7 @@ class SchwabApi():
                                     must also be set.
         :param status: Restrict query to orders with this status. See
                        :class:`Order.Status` for options.
+        :param output_format: OutputFormat.MODEL returns schwab_models.Order objects.
         '''
         endpoint = '/orders'
         params = {"maxResults": max_results,
@@ -289,12 +711,14 @@ class SchwabApi():
                 "toEnteredTime": to_entered_datetime,
                 "status": status.value}
 
-        return self._make_request('get', BASE_TRADER_URL, endpoint, params = params)
+        response = self._make_request('get', BASE_TRADER_URL, endpoint, params = params)
+        return self._output(response, output_format, lambda orders: to_models(orders, Order))
 
 
 
     def get_account_orders(self, from_entered_time, to_entered_time, *, account_hash = None,
-                           max_results = None, status = Status.NONE):
+                           max_results = None, status = Status.NONE,
+                           output_format: OutputFormat = OutputFormat.JSON):
 
         '''
         Returns the savedorders for a specific account.
@@ -341,6 +765,10 @@ class SchwabApi():
                 14. FILLED
                 15. EXPIRED
 
+        NAME: output_format
+        DESC: OutputFormat.MODEL returns schwab_models.Order objects.
+        TYPE: OutputFormat
+
         EXAMPLES:
 
         Object.get_orders_path(account = 'MyAccountID', max_result = 6,
@@ -359,10 +787,12 @@ class SchwabApi():
 
         endpoint = f'/accounts/{account_hash}/orders'
 
-        return self._make_request('get', BASE_TRADER_URL, endpoint, params = params)
+        response = self._make_request('get', BASE_TRADER_URL, endpoint, params = params)
+        return self._output(response, output_format, lambda orders: to_models(orders, Order))
 
 
-    def get_order(self, order_id, account_hash = None):
+    def get_order(self, order_id, account_hash = None,
+                  output_format: OutputFormat = OutputFormat.JSON):
 
         '''
         Get a specific order for a specific account.
@@ -385,7 +815,8 @@ class SchwabApi():
 
         endpoint = f'/accounts/{account_hash}/orders/{order_id}'
 
-        return self._make_request('get', BASE_TRADER_URL, endpoint)
+        response = self._make_request('get', BASE_TRADER_URL, endpoint)
+        return self._output(response, output_format, lambda order: to_models(order, Order))
 
 
     def cancel_order(self, order_id, account_hash = None):
@@ -413,13 +844,17 @@ class SchwabApi():
         account_hash = account_hash or self.account_hash
         endpoint = f'/accounts/{account_hash}/orders/{order_id}'
 
+        def handle_response(response):
+            if response and _status_code(response) == 200:
+                logger.info("Order %s was successfully CANCELED.", order_id)
+            else:
+                logger.error("Failed to cancel order %s.", order_id)
+
         #make the request
-        response = self._make_request('delete', BASE_TRADER_URL, endpoint)
+        response = self._make_request('delete', BASE_TRADER_URL, endpoint,
+                                      priority=Priority.HIGH)
 
-        if response and response.status_code == 200:
-            logger.info("Order %s was successfully CANCELED.", order_id)
-        else:
-            logger.error("Failed to cancel order %s.", order_id)
+        return self._then(response, handle_response)
 
 
 
@@ -429,6 +864,7 @@ class SchwabApi():
                     instruction: Instruction,
                     asset_type: AssetType, *,
                     price: Optional[float] = None,
+                    stop_price: Optional[float] = None,
                     account_hash: Optional[str] = None,
                     order_type: OrderType = OrderType.MARKET,
                     session: Session = Session.NORMAL,
@@ -451,9 +887,14 @@ class SchwabApi():
         TYPE: String
 
         NAME: price
-        DESC: price level for the order. If orderType is Market leave it in None
+        DESC: price level for the order. If orderType is Market leave it in None.
+              For STOP orders the stop price.
         TYPE: String
 
+        NAME: stop_price
+        DESC: stop price of STOP_LIMIT orders (price is the limit price).
+        TYPE: float
+
         NAME: quantity
         DESC: amount of shares to operate
         TYPE: String
@@ -485,6 +926,9 @@ class SchwabApi():
         DESC: "'SINGLE' or 'OCO' or 'TRIGGER'"
         TYPE: String
 
+        RETURNS:
+        OrderResult, see place_order_spec. Invalid arguments do not raise, they are
+        logged and return a failed OrderResult with the error.
 
         EXAMPLES:
         Object.create_order(account = 'MyaccountNumber' symbol = 'MELI', price = '100.00',
@@ -493,72 +937,66 @@ class SchwabApi():
                             orderStrategyType = 'SINGLE')
         '''
         try:
+            spec = OrderSpec.single(symbol, quantity, instruction, asset_type, price=price,
+                                    stop_price=stop_price, order_type=order_type,
+                                    session=session, duration=duration,
+                                    order_strategy_type=order_strategy_type)
+        except Exception as error:
+            logger.exception("An error occurred while creating the order: %s", str(error))
+            return self._resolved(OrderResult(symbols=[symbol], error=str(error)))
 
-            if not isinstance(instruction, Instruction):
-                raise ValueError(
-                    f'instruction must be an instance of Instruction Enum, got {type(instruction)}')
-            if not isinstance(asset_type, AssetType):
-                raise ValueError(
-                    f'asset_type must be an instance of AssetType Enum, got {type(asset_type)}')
-            if not isinstance(order_type, OrderType):
-                raise ValueError(
-                    f'order_type must be an instance of OrderType Enum, got {type(order_type)}')
-            if not isinstance(session, Session):
-                raise ValueError(
-                    f'session must be an instance of Session Enum, got {type(session)}')
-            if not isinstance(duration, Duration):
-                raise ValueError(
-                    f'duration must be an instance of Duration Enum, got {type(duration)}')
-            if not isinstance(order_strategy_type, OrderStrategyType):
-                raise ValueError(
-                    f'order_strategy_type must be an instance of OrderStrategyType Enum, '
-                    f'got {type(order_strategy_type)}')
-
-            #define the payload
-            if order_type.value in ('MARKET','MARKET_ON_CLOSE'):
-                price = None
-
-            if order_type.value != 'STOP':
-                price_type = 'price'
-            else:
-                price_type = 'stopPrice'
-
-
-            payload = {'orderType':order_type.value,
-                       'session':session.value,
-                       f'{price_type}': price,
-                       'duration':duration.value,
-                       'orderStrategyType':order_strategy_type.value,
-                       'orderLegCollection':[
-                                             {'instruction':instruction.value,
-                                              'quantity':quantity,
-                                              'instrument':{'symbol':symbol,
-                                                            'assetType':asset_type.value
-                                                           }
-                                             }
-                                            ]
-                  }
-
-            # define the endpoint
-            account_hash = account_hash or self.account_hash
-            endpoint = f'/accounts/{account_hash}/orders'
+        return self.place_order_spec(spec, account_hash)
 
-            response = self._make_request('post', BASE_TRADER_URL, endpoint,
-                                          ADDITIONAL_HEADERS, data = json.dumps(payload))
+    def place_order_spec(self, spec: OrderSpec,
+                         account_hash: Optional[str] = None) -> OrderResult:
 
+        '''
+        Places an OrderSpec. The spec payload is serialized once and reused, so the
+        same spec can be placed again without rebuilding it.
 
-            if response and response.status_code == 201:
-                logger.info("New %s order was successfully created.", symbol)
-            else:
-                logger.error("Failed to create new order for %s.", symbol)
+        RETURNS:
+        OrderResult with the new order_id (from the Location header), HTTP status
+        and elapsed time. It is falsy when the order failed. Errors building the
+        payload (incomplete OCO or TRIGGER orders, values that can not be serialized)
+        do not raise either, they are logged and set OrderResult.error.
 
+        EXAMPLE:
+        spec = OrderSpec.single('MELI', 100, Instruction.BUY, AssetType.EQUITY,
+                                price = 1500.0, order_type = OrderType.LIMIT)
+        result = Object.place_order_spec(spec)
+        Object.cancel_order(result.order_id)
+        '''
+        try:
+            account_hash = account_hash or self.account_hash
+            data = spec.data
         except Exception as error:
-            logger.exception("An error occurred while replacing the order: %s", str(error))
+            logger.exception("An error occurred while creating the order: %s", str(error))
+            return self._resolved(OrderResult(symbols=spec.symbols, error=str(error)))
+
+        endpoint = f'/accounts/{account_hash}/orders'
+        started = time.perf_counter()
+
+        def handle_response(response):
+            result = OrderResult.from_response(response, time.perf_counter() - started,
+                                               spec.symbols)
+            if result.ok:
+                logger.info("New %s order %s was successfully created.",
+                            ','.join(spec.symbols), result.order_id)
+            else:
+                logger.error("Failed to create new order for %s.", ','.join(spec.symbols))
+            return result
+
+        response = self._make_request('post', BASE_TRADER_URL, endpoint,
+                                      ADDITIONAL_HEADERS, data = data,
+                                      priority=Priority.HIGH, full_response=True)
+
+        return self._then(response, handle_response)
 
     def replace_order(self, order_id: str,symbol: str, quantity: float,
                       instruction: Instruction,
                       asset_type: AssetType, *,
                       price: Optional[float] = None,
+                      stop_price: Optional[float] = None,
                       account_hash: Optional[str] = None,
                       order_type: OrderType = OrderType.MARKET,
                       session: Session = Session.NORMAL,
@@ -566,76 +1004,57 @@ class SchwabApi():
                       order_strategy_type: OrderStrategyType = OrderStrategyType.SINGLE):
 
         try:
-            # Validación de tipos en tiempo de ejecución
-            if not isinstance(instruction, Instruction):
-                raise ValueError(
-                    f'instruction must be an instance of Instruction Enum, got {type(instruction)}')
-            if not isinstance(asset_type, AssetType):
-                raise ValueError(
-                    f'asset_type must be an instance of AssetType Enum, got {type(asset_type)}')
-            if not isinstance(order_type, OrderType):
-                raise ValueError(
-                    f'order_type must be an instance of OrderType Enum, got {type(order_type)}')
-            if not isinstance(session, Session):
-                raise ValueError(
-                    f'session must be an instance of Session Enum, got {type(session)}')
-            if not isinstance(duration, Duration):
-                raise ValueError(
-                    f'duration must be an instance of Duration Enum, got {type(duration)}')
-            if not isinstance(order_strategy_type, OrderStrategyType):
-                raise ValueError(
-                    f'order_strategy_type must be an instance of OrderStrategyType Enum, '
-                    f'got {type(order_strategy_type)}')
-
-            #define the payload
-            if order_type.value in ('MARKET','MARKET_ON_CLOSE'):
-                price = None
-
-            if order_type.value != 'STOP':
-                price_type = 'price'
-            else:
-                price_type = 'stopPrice'
-
-            payload = {
-                'orderType': order_type.value,
-                'session': session.value,
-                f'{price_type}': price,
-                'duration': duration.value,
-                'orderStrategyType': order_strategy_type.value,
-                'orderLegCollection': [
-                    {
-                        'instruction': instruction.value,
-                        'quantity': quantity,
-                        'instrument': {
-                            'symbol': symbol,
-                            'assetType': asset_type.value
-                        }
-                    }
-                ]
-            }
-
-            # Define the endpoint
-            account_hash = account_hash or self.account_hash
-            endpoint = f'/accounts/{account_hash}/orders/{order_id}'
+            spec = OrderSpec.single(symbol, quantity, instruction, asset_type, price=price,
+                                    stop_price=stop_price, order_type=order_type,
+                                    session=session, duration=duration,
+                                    order_strategy_type=order_strategy_type)
+        except Exception as error:
+            logger.exception("An error occurred while replacing the order: %s", str(error))
+            return self._resolved(OrderResult(symbols=[symbol], error=str(error)))
 
-            response = self._make_request('put', BASE_TRADER_URL, endpoint,
-                                          ADDITIONAL_HEADERS, data=json.dumps(payload))
+        return self.replace_order_spec(order_id, spec, account_hash)
 
-            if response and response.status_code == 201:
-                logger.info("Order %s was successfully replaced.", order_id)
-            else:
-                logger.error("Failed to replace order %s.", order_id)
+    def replace_order_spec(self, order_id: str, spec: OrderSpec,
+                           account_hash: Optional[str] = None) -> OrderResult:
+
+        '''
+        Replaces an existing order with an OrderSpec.
 
+        RETURNS:
+        OrderResult, order_id is the id of the new (replacing) order. As in
+        place_order_spec, payload errors are logged and returned in OrderResult.error.
+        '''
+        try:
+            account_hash = account_hash or self.account_hash
+            data = spec.data
         except Exception as error:
             logger.exception("An error occurred while replacing the order: %s", str(error))
+            return self._resolved(OrderResult(symbols=spec.symbols, error=str(error)))
 
+        endpoint = f'/accounts/{account_hash}/orders/{order_id}'
+        started = time.perf_counter()
+
+        def handle_response(response):
+            result = OrderResult.from_response(response, time.perf_counter() - started,
+                                               spec.symbols)
+            if result.ok:
+                logger.info("Order %s was successfully replaced by %s.", order_id,
+                            result.order_id)
+            else:
+                logger.error("Failed to replace order %s.", order_id)
+            return result
 
+        response = self._make_request('put', BASE_TRADER_URL, endpoint,
+                                      ADDITIONAL_HEADERS, data=data,
+                                      priority=Priority.HIGH, full_response=True)
 
+        return self._then(response, handle_response)
 
     def preview_order(self, symbol: str, quantity: float,
                       instruction: Instruction,
                       asset_type: AssetType, *,
                       price: Optional[float] = None,
+                      stop_price: Optional[float] = None,
                       account_hash: Optional[str] = None,
                       order_type: OrderType = OrderType.MARKET,
                       session: Session = Session.NORMAL,
@@ -643,64 +1062,99 @@ class SchwabApi():
                       order_strategy_type: OrderStrategyType = OrderStrategyType.SINGLE):
 
         try:
-            if not isinstance(instruction, Instruction):
-                raise ValueError(
-                    f'instruction must be an instance of Instruction Enum, got {type(instruction)}')
-            if not isinstance(asset_type, AssetType):
-                raise ValueError(
-                    f'asset_type must be an instance of AssetType Enum, got {type(asset_type)}')
-            if not isinstance(order_type, OrderType):
-                raise ValueError(
-                    f'order_type must be an instance of OrderType Enum, got {type(order_type)}')
-            if not isinstance(session, Session):
-                raise ValueError(
-                    f'session must be an instance of Session Enum, got {type(session)}')
-            if not isinstance(duration, Duration):
-                raise ValueError(
-                    f'duration must be an instance of Duration Enum, got {type(duration)}')
-            if not isinstance(order_strategy_type, OrderStrategyType):
-                raise ValueError(
-                    f'order_strategy_type must be an instance of OrderStrategyType Enum, '
-                    f'got {type(order_strategy_type)}')
-
-            #define the payload
-            if order_type.value in ('MARKET','MARKET_ON_CLOSE'):
-                price = None
-
-            if order_type.value != 'STOP':
-                price_type = 'price'
-            else:
-                price_type = 'stopPrice'
-
-
-            payload = {'orderType':order_type.value,
-                       'session':session.value,
-                       f'{price_type}': price,
-                       'duration':duration.value,
-                       'orderStrategyType':order_strategy_type.value,
-                       'orderLegCollection':[
-                                             {'instruction':instruction.value,
-                                              'quantity':quantity,
-                                              'instrument':{'symbol':symbol,
-                                                            'assetType':asset_type.value
-                                                           }
-                                             }
-                                            ]
-                  }
+            spec = OrderSpec.single(symbol, quantity, instruction, asset_type, price=price,
+                                    stop_price=stop_price, order_type=order_type,
+                                    session=session, duration=duration,
+                                    order_strategy_type=order_strategy_type)
+        except Exception as error:
+            logger.exception("An error occurred while previewing the order: %s", str(error))
+            return self._resolved(None)
 
-            account_hash = account_hash or self.account_hash
-            endpoint = f'/accounts/{account_hash}/previewOrder'
+        return self.preview_order_spec(spec, account_hash)
 
-            response = self._make_request('post', BASE_TRADER_URL, endpoint,
-                                          ADDITIONAL_HEADERS, data = json.dumps(payload))
+    def preview_order_spec(self, spec: OrderSpec, account_hash: Optional[str] = None):
 
-            if response and response.status_code == 201:
-                logger.info("New %s preview order was successfully created.", symbol)
+        '''
+        Previews an OrderSpec. Returns the preview response, None on failure
+        (payload errors included, they are logged).
+        '''
+        try:
+            account_hash = account_hash or self.account_hash
+            data = spec.data
+        except Exception as error:
+            logger.exception("An error occurred while previewing the order: %s", str(error))
+            return self._resolved(None)
+
+        endpoint = f'/accounts/{account_hash}/previewOrder'
+
+        def handle_response(response):
+            if isinstance(response, dict):
+                logger.info("New %s preview order was successfully created.",
+                            ','.join(spec.symbols))
+                return response
+            if response and _status_code(response) in (200, 201):
+                logger.info("New %s preview order was successfully created.",
+                            ','.join(spec.symbols))
             else:
-                logger.error("Failed to preview order for %s.", symbol)
+                logger.error("Failed to preview order for %s.", ','.join(spec.symbols))
+            return None
 
-        except Exception as error:
-            logger.exception("An error occurred while replacing the order: %s", str(error))
+        response = self._make_request('post', BASE_TRADER_URL, endpoint,
+                                      ADDITIONAL_HEADERS, data = data)
+
+        return self._then(response, handle_response)
+
+    def place_orders(self, specs: List[OrderSpec], account_hash: Optional[str] = None, *,
+                     max_workers: int = ORDERS_MAX_WORKERS) -> List[OrderResult]:
+
+        '''
+        Places a basket of orders concurrently (max_workers at a time), for example
+        a rebalance. Orders go through the high priority lane of the rate limiter.
+
+        A failed order does not stop the others, every order gets its own result,
+        in the same order as specs.
+
+        RETURNS:
+        [OrderResult], result.index is the position of the order in specs.
+
+        EXAMPLE:
+        specs = [OrderSpec.single(symbol, quantity, Instruction.BUY, AssetType.EQUITY)
+                 for symbol, quantity in targets.items()]
+        results = Object.place_orders(specs, max_workers = 16)
+        '''
+        account_hash = account_hash or self.account_hash
+        endpoint = f'/accounts/{account_hash}/orders'
+
+        def submit(spec):
+            started = time.perf_counter()
+            try:
+                response = self._make_request('post', BASE_TRADER_URL, endpoint,
+                                              ADDITIONAL_HEADERS, data = spec.data,
+                                              priority=Priority.HIGH, full_response=True)
+            except Exception as error:
+                response = error
+            return OrderResult.from_response(response, time.perf_counter() - started,
+                                             spec.symbols)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            results = list(executor.map(submit, specs))
+
+        return self._basket_results(results)
+
+    @staticmethod
+    def _basket_results(results: List[OrderResult]) -> List[OrderResult]:
+        '''
+        Numbers the place_orders results and logs the outcome.
+        '''
+        for index, result in enumerate(results):
+            result.index = index
+
+        failed = sum(not result.ok for result in results)
+        if failed:
+            logger.warning("Order basket: %d of %d orders failed", failed, len(results))
+        else:
+            logger.info("Order basket: %d orders placed", len(results))
+        return results
 
     ################
     #### MARKET DATA
@@ -761,7 +1215,8 @@ class SchwabApi():
         endpoint = '/instruments'
 
         # return the response of the get request.
-        return self._make_request('get', BASE_MARKET_URL, endpoint, params = params)
+        return self._cached_request('search_instruments', 'get', BASE_MARKET_URL, endpoint,
+                                    params = params)
 
 
     def get_instruments(self, cusip_id):
@@ -784,7 +1239,7 @@ class SchwabApi():
         endpoint = f'/instruments/{cusip_id}'
 
         # return the resposne of the get request.
-        return self._make_request('get', BASE_MARKET_URL, endpoint)
+        return self._cached_request('get_instruments', 'get', BASE_MARKET_URL, endpoint)
 
     ####  Market Hours
 
@@ -814,7 +1269,8 @@ class SchwabApi():
 
         endpoint = '/markets'
 
-        return self._make_request('get', BASE_MARKET_URL, endpoint, params = params)
+        return self._cached_request('get_markets_hours', 'get', BASE_MARKET_URL, endpoint,
+                                    params = params)
 
 
     def get_market_hours(self, market_id: Market, date = None):
@@ -840,7 +1296,8 @@ class SchwabApi():
 
         endpoint = f'/markets/{market_id}'
 
-        return self._make_request('get', BASE_MARKET_URL, endpoint, params = params)
+        return self._cached_request('get_market_hours', 'get', BASE_MARKET_URL, endpoint,
+                                    params = params)
 
 
     #### Movers
@@ -875,7 +1332,8 @@ class SchwabApi():
     #### Quotes
 
 
-    def get_quotes(self, symbols: list, fields: Fields = Fields.ALL, indicative: bool = False):
+    def get_quotes(self, symbols: list, fields: Fields = Fields.ALL, indicative: bool = False,
+                   output_format: OutputFormat = OutputFormat.JSON):
 
         '''
         Serves as the mechanism to make a request to Get Quotes Endpoint.
@@ -891,6 +1349,8 @@ class SchwabApi():
         Object.get_quotes(instruments = ['MSFT', 'SQ'])
 
         fields = quote, fundamental, extended, reference, regular  default = all
+
+        output_format = OutputFormat.MODEL returns {symbol: schwab_models.Quote}
         '''
 
         symbols = ','.join(symbols)
@@ -901,15 +1361,106 @@ class SchwabApi():
 
         endpoint = '/quotes'
 
-        return self._make_request('get', BASE_MARKET_URL, endpoint, params = params)
+        response = self._make_request('get', BASE_MARKET_URL, endpoint, params = params)
+        return self._output(response, output_format, quotes_to_models)
 
-    def get_quote(self, symbol_id, fields: Fields = Fields.ALL):
+    def get_quote(self, symbol_id, fields: Fields = Fields.ALL,
+                  output_format: OutputFormat = OutputFormat.JSON):
 
 
         params = {'fields': fields.value}
         endpoint = f'/{symbol_id}/quotes'
 
-        return self._make_request('get', BASE_MARKET_URL, endpoint, params = params)
+        response = self._make_request('get', BASE_MARKET_URL, endpoint, params = params)
+        return self._output(response, output_format, quotes_to_models)
+
+
+    def get_quotes_bulk(self, symbols: list, fields: Fields = Fields.ALL,
+                        indicative: bool = False, *,
+                        chunk_size: int = QUOTES_CHUNK_SIZE,
+                        max_workers: int = QUOTES_MAX_WORKERS) -> Tuple[Dict[str, Any],
+                                                                         List[Dict[str, Any]]]:
+
+        '''
+        Get Quotes for a large symbol universe.
+
+        The symbols are deduplicated and split into evenly sized chunks of at most
+        chunk_size symbols, which are requested concurrently (max_workers at a time).
+        The chunk responses are merged into one dict keyed by symbol.
+
+        A failed chunk does not fail the whole call, it is reported in the errors list
+        together with the symbols it contained.
+
+        NAME: chunk_size
+        DESC: Maximum number of symbols per request.
+        TYPE: int
+
+        NAME: max_workers
+        DESC: Maximum number of chunks requested at the same time.
+        TYPE: int
+
+        RETURNS:
+        (quotes, errors)
+        quotes: {symbol: quote}
+        errors: [{'symbols': [...], 'error': str}]
+
+        EXAMPLE:
+        quotes, errors = Object.get_quotes_bulk(universe, Fields.QUOTE, max_workers = 8)
+        '''
+
+        chunks = self._split_symbols(symbols, chunk_size)
+
+        def fetch(chunk):
+            try:
+                return self.get_quotes(chunk, fields, indicative)
+            except Exception as error:
+                return error
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            responses = list(executor.map(fetch, chunks))
+
+        return self._merge_quote_chunks(chunks, responses)
+
+    @staticmethod
+    def _split_symbols(symbols: list, chunk_size: int) -> List[List[str]]:
+        '''
+        Deduplicates symbols (keeping order) and splits them into evenly sized chunks
+        of at most chunk_size symbols.
+        '''
+        unique_symbols = list(dict.fromkeys(symbols))
+        if not unique_symbols:
+            return []
+        chunk_count = math.ceil(len(unique_symbols) / max(1, chunk_size))
+        size = math.ceil(len(unique_symbols) / chunk_count)
+        return [unique_symbols[i:i + size] for i in range(0, len(unique_symbols), size)]
+
+    @staticmethod
+    def _merge_quote_chunks(chunks: List[List[str]],
+                            responses: List[Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        '''
+        Merges the chunk responses of get_quotes_bulk into one dict keyed by symbol
+        and collects the per chunk errors.
+        '''
+        quotes = {}
+        errors = []
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, BaseException):
+                errors.append({'symbols': chunk, 'error': repr(response)})
+            elif not isinstance(response, dict):
+                errors.append({'symbols': chunk, 'error': 'Request failed'})
+            else:
+                chunk_errors = response.get('errors')
+                if chunk_errors:
+                    invalid = [symbol for symbols in chunk_errors.values()
+                               if isinstance(symbols, list) for symbol in symbols]
+                    errors.append({'symbols': invalid or chunk, 'error': str(chunk_errors)})
+                quotes.update((symbol, quote) for symbol, quote in response.items()
+                              if symbol != 'errors')
+
+        if errors:
+            logger.warning("Bulk quotes: %d of %d chunks reported errors",
+                           len(errors), len(chunks))
+        return quotes, errors
 
 
     #### Price History
@@ -920,7 +1471,8 @@ class SchwabApi():
                                 period_type: PeriodType = PeriodType.DAY,
                                 period: Period = Period.DAY_10,
                                 need_extendedhours_data: bool = True,
-                                need_previousclose_price: bool = True):
+                                need_previousclose_price: bool = True,
+                                output_format: OutputFormat = OutputFormat.JSON):
 
         '''
         Get price history for a symbol defining Period. Its provide data up to the last closed day.
@@ -969,6 +1521,12 @@ class SchwabApi():
         NAME: needExtendedHoursData
         DESC: true for extended hours data, false for regular market hours only. Default is true
         TYPE: String
+
+        NAME: output_format
+        DESC: OutputFormat.JSON (default) the API response, OutputFormat.NUMPY a structured
+              candle array, OutputFormat.PANDAS a DataFrame, OutputFormat.MODEL the response
+              with candles as schwab_models.Candle.
+        TYPE: OutputFormat
         '''
 
         params = {
@@ -983,7 +1541,11 @@ class SchwabApi():
 
         endpoint = '/pricehistory'
 
-        return self._make_request('get', BASE_MARKET_URL, endpoint, params = params)
+        if output_format is OutputFormat.JSON:
+            return self._make_request('get', BASE_MARKET_URL, endpoint, params = params)
+
+        response = self._make_request('get', BASE_MARKET_URL, endpoint, params = params, raw = True)
+        return self._then(response, lambda payload: decode_history(payload, output_format))
 
 
     def get_pricehistory_dates(self, symbol,
@@ -992,7 +1554,8 @@ class SchwabApi():
                                end_date = datetime.now(),
                                start_date = datetime.now(),
                                need_extendedhours_data: bool = True,
-                               need_previousclose_price: bool = True):
+                               need_previousclose_price: bool = True,
+                               output_format: OutputFormat = OutputFormat.JSON):
 
         '''
         Get price history for symbol defining date Interval. It provides data till the last second.
@@ -1014,6 +1577,12 @@ class SchwabApi():
         NAME: needExtendedHoursData
         DESC: true for extended hours data, false for regular market hours only. Default is true
         TYPE: String
+
+        NAME: output_format
+        DESC: OutputFormat.JSON (default) the API response, OutputFormat.NUMPY a structured
+              candle array, OutputFormat.PANDAS a DataFrame, OutputFormat.MODEL the response
+              with candles as schwab_models.Candle.
+        TYPE: OutputFormat
         '''
         epoch = datetime.utcfromtimestamp(0)
         end_date = int((end_date - epoch).total_seconds()*1000)
@@ -1032,13 +1601,52 @@ class SchwabApi():
         # define the endpoint
         endpoint = '/pricehistory'
 
-        return self._make_request('get', BASE_MARKET_URL, endpoint, params = params)
+        if self.history_store is not None:
+            partition = self.history_store.partition(symbol, frequency_type.value,
+                                                     frequency.value, need_extendedhours_data)
+            return self._pricehistory_from_store(partition, params, output_format)
+
+        if output_format is OutputFormat.JSON:
+            return self._make_request('get', BASE_MARKET_URL, endpoint, params = params)
+
+        response = self._make_request('get', BASE_MARKET_URL, endpoint, params = params, raw = True)
+        return self._then(response, lambda payload: decode_history(payload, output_format))
+
+    def _pricehistory_from_store(self, partition: str, params: Dict[str, Any],
+                                 output_format: OutputFormat):
+        '''
+        Downloads the date ranges missing in the history store, then returns the
+        requested range from the store in output_format.
+        '''
+        for range_start, range_end in self.history_store.missing_ranges(
+                partition, params['startDate'], params['endDate']):
+            payload = self._make_request('get', BASE_MARKET_URL, '/pricehistory',
+                                         params = dict(params, startDate = range_start,
+                                                       endDate = range_end),
+                                         raw = True)
+            if not payload:
+                logger.error("Failed to download %s history from %s to %s",
+                             params['symbol'], range_start, range_end)
+                return None
+            self.history_store.add(partition, range_start, range_end,
+                                   decode_candles(payload)['candles'])
+
+        return self._history_response(params['symbol'], self.history_store.read(
+            partition, params['startDate'], params['endDate']), output_format)
+
+    @staticmethod
+    def _history_response(symbol: str, candles, output_format: OutputFormat) -> Any:
+        '''
+        Builds a price history response in output_format from stored candles.
+        '''
+        return history_output({'candles': candles, 'symbol': symbol, 'empty': len(candles) == 0},
+                              output_format)
 
 
     #### Option Chain
 
 
-    def get_option_chain(self, option_chain):
+    def get_option_chain(self, option_chain, output_format: OutputFormat = OutputFormat.JSON):
 
         # symbol = None, contractType = None, StrikeCount = None, IncludeQuotes = None,
         # Strategy = None, interval = None, Strike = None, range = None, fromDate = None,
@@ -1055,6 +1663,13 @@ class SchwabApi():
         DESC: Represents a single OptionChainObject.
         Type: TDAmeritrade.OptionChainObject
 
+        NAME: output_format
+        DESC: OutputFormat.JSON (default) the API response, OutputFormat.NUMPY a columnar
+              OptionChain (one array per contract field, vectorized filters and groupby),
+              OutputFormat.PANDAS a DataFrame with one row per contract, OutputFormat.MODEL
+              the response with contracts as schwab_models.OptionContract.
+        TYPE: OutputFormat
+
         EXAMPLE:
 
         OptionChain_1 = {
@@ -1087,7 +1702,10 @@ class SchwabApi():
         #define the endpoint
         endpoint = '/chains'
 
-        return self._make_request('get', BASE_MARKET_URL, endpoint, params = params)
+        response = self._make_request('get', BASE_MARKET_URL, endpoint, params = params)
+        if output_format is OutputFormat.JSON:
+            return response
+        return self._then(response, lambda chain: chain_output(chain, output_format))
 
     def get_option_expirationchain(self, symbol):
 
@@ -1095,4 +1713,5 @@ class SchwabApi():
 
         endpoint = '/expirationchain'
 
-        return self._make_request('get', BASE_MARKET_URL, endpoint, params = params)
+        return self._cached_request('get_option_expirationchain', 'get', BASE_MARKET_URL, endpoint,
+                                    params = params)
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 09:12:05 2026
+
+@author: LC
+"""
+
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from schwab_api import SchwabApi, BASE_MARKET_URL, BASE_TRADER_URL, ADDITIONAL_HEADERS
+from schwab_async_auth import AsyncSchwabAuth
+from schwab_enum import Fields, OutputFormat, Priority
+from schwab_orders import OrderSpec, OrderResult
+from schwab_candles import decode_candles
+
+
+if not logging.root.handlers:
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    logging.info("Logging activated at Async API")
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSchwabApi(SchwabApi):
+    '''
+    Asynchronous Schwab API Class.
+
+    Same endpoints as SchwabApi, but every account, order and market-data
+    method returns a coroutine that must be awaited. All requests share one
+    pooled aiohttp session, so a single event loop can run many concurrent
+    calls without threads.
+
+    Must be created with the awaitable constructor:
+
+        api = await AsyncSchwabApi.create(config)
+        quotes, hours = await asyncio.gather(api.get_quotes(['SPY', 'QQQ']),
+                                             api.get_market_hours(Market.EQUITY))
+        await api.aclose()
+
+    or as an async context manager:
+
+        async with await AsyncSchwabApi.create(config) as api:
+            ...
+    '''
+
+    def __init__(self, config, **kwargs):
+
+        '''
+        Do not call directly, use "await AsyncSchwabApi.create(config)".
+        Keyword arguments are passed to SchwabApi (connection pool settings).
+        '''
+        super().__init__(config, async_mode=True, **kwargs)
+
+    def _create_auth(self, config, auto_refresh: bool) -> AsyncSchwabAuth:
+        '''
+        Token refreshes use the pooled aiohttp session and never block the loop.
+        '''
+        return AsyncSchwabAuth(config, session_getter=self._get_async_session,
+                               auto_refresh=auto_refresh)
+
+    @classmethod
+    async def create(cls, config, **kwargs) -> 'AsyncSchwabApi':
+        '''
+        Awaitable constructor. Authenticates and loads user principals and
+        the default account hash concurrently.
+
+        EXAMPLE:
+        api = await AsyncSchwabApi.create(config)
+        '''
+        api = cls(config, **kwargs)
+        await api._initialize_async()
+        logger.info("Async Schwab API Initialized")
+        return api
+
+    async def _initialize_async(self) -> None:
+        '''
+        Loads user principals and the default account hash (from the response cache
+        when set, see SchwabApi lazy_init).
+        '''
+        if self._initialized:
+            return
+        principals, accounts = await asyncio.gather(self.get_user_preference(),
+                                                    self.get_account_numbers())
+        self._set_initial(principals, accounts)
+
+    def close(self) -> None:
+        '''
+        Not available for the aiohttp session, use "await api.aclose()".
+        '''
+        raise TypeError('Use "await aclose()" with AsyncSchwabApi')
+
+    async def get_quotes_bulk(self, symbols: list, fields: Fields = Fields.ALL,
+                              indicative: bool = False, *,
+                              chunk_size: int = SchwabApi.QUOTES_CHUNK_SIZE,
+                              max_workers: int = SchwabApi.QUOTES_MAX_WORKERS
+                              ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        '''
+        Get Quotes for a large symbol universe, see SchwabApi.get_quotes_bulk.
+        Chunks are requested concurrently on the event loop, max_workers at a time.
+        '''
+        chunks = self._split_symbols(symbols, chunk_size)
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def fetch(chunk):
+            async with semaphore:
+                return await self.get_quotes(chunk, fields, indicative)
+
+        responses = await asyncio.gather(*(fetch(chunk) for chunk in chunks),
+                                         return_exceptions=True)
+
+        return self._merge_quote_chunks(chunks, responses)
+
+    async def place_orders(self, specs: List[OrderSpec], account_hash: Optional[str] = None, *,
+                           max_workers: int = SchwabApi.ORDERS_MAX_WORKERS
+                           ) -> List[OrderResult]:
+        '''
+        Places a basket of OrderSpec concurrently over the pooled session, see
+        SchwabApi.place_orders. Up to max_workers orders are in flight at a time.
+        '''
+        account_hash = account_hash or self.account_hash
+        endpoint = f'/accounts/{account_hash}/orders'
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def submit(spec):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await self._make_request('post', BASE_TRADER_URL, endpoint,
+                                                        ADDITIONAL_HEADERS, data = spec.data,
+                                                        priority=Priority.HIGH,
+                                                        full_response=True)
+                except Exception as error:
+                    response = error
+                return OrderResult.from_response(response, time.perf_counter() - started,
+                                                 spec.symbols)
+
+        results = await asyncio.gather(*(submit(spec) for spec in specs))
+
+        return self._basket_results(results)
+
+    async def _pricehistory_from_store(self, partition: str, params: Dict[str, Any],
+                                       output_format: OutputFormat):
+        '''
+        Downloads the date ranges missing in the history store concurrently, then
+        returns the requested range from the store in output_format.
+        '''
+        missing = self.history_store.missing_ranges(partition, params['startDate'],
+                                                    params['endDate'])
+        responses = await asyncio.gather(*(
+            self._make_request('get', BASE_MARKET_URL, '/pricehistory',
+                               params = dict(params, startDate = range_start,
+                                             endDate = range_end),
+                               raw = True)
+            for range_start, range_end in missing))
+
+        for (range_start, range_end), payload in zip(missing, responses):
+            if not payload:
+                logger.error("Failed to download %s history from %s to %s",
+                             params['symbol'], range_start, range_end)
+                return None
+            self.history_store.add(partition, range_start, range_end,
+                                   decode_candles(payload)['candles'])
+
+        return self._history_response(params['symbol'], self.history_store.read(
+            partition, params['startDate'], params['endDate']), output_format)
+
+    def __enter__(self):
+        raise TypeError('Use "async with" with AsyncSchwabApi')
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
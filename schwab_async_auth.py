@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 22:18:51 2026
+
+@author: LC
+"""
+
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Dict, Optional, Union
+import aiohttp
+from schwab_auth import SchwabAuth
+
+
+if not logging.root.handlers:
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.info("Logging activated at Async Authentication")
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSchwabAuth(SchwabAuth):
+    '''
+    SchwabAuth for the aiohttp client.
+
+    get_headers_async is the coroutine to use (get_headers raises TypeError, a
+    refresh there would block the event loop). Token refreshes are sent with the shared aiohttp
+    session under an asyncio lock, so a refresh never blocks the event loop and
+    the market-data and order requests of other coroutines keep running. Tasks
+    that find the token expired together wait for one refresh. The cross-process
+    token store lock is also awaited without blocking (TokenStore.lock_async).
+
+    The first login and a new login when the refresh token expires need the user
+    (browser and console input), they run in the default executor.
+
+    Attributes:
+        session_getter (callable): Returns the aiohttp session used for token
+                                   requests (AsyncSchwabApi passes its pooled
+                                   session). Default: an own session.
+
+    EXAMPLE:
+    auth = AsyncSchwabAuth(config, session_getter = api._get_async_session)
+    headers = await auth.get_headers_async()
+    '''
+
+    def __init__(self, config: dict[str, str],
+                 session_getter: Optional[Callable[[], aiohttp.ClientSession]] = None,
+                 **kwargs):
+
+        self._session_getter = session_getter
+        self._own_session = None
+        self._refresh_lock = None
+        self._refresher_task = None
+        super().__init__(config, **kwargs)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session_getter is not None:
+            return self._session_getter()
+        if self._own_session is None or self._own_session.closed:
+            self._own_session = aiohttp.ClientSession()
+        return self._own_session
+
+    def _get_refresh_lock(self) -> asyncio.Lock:
+        # Created on first use, bound to the running loop
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        return self._refresh_lock
+
+    @asynccontextmanager
+    async def _store_lock_async(self) -> AsyncIterator[None]:
+        if self._token_store is None:
+            yield
+        else:
+            async with self._token_store.lock_async():
+                yield
+
+    async def _request_token_async(self, grant_type: str, extra_payload: Dict[str, str]
+                                   ) -> Optional[Dict[str, Union[str, int]]]:
+        '''
+        _request_token with the aiohttp session.
+        '''
+        payload = {'client_id': self._config['client_id'],
+                   'grant_type': grant_type}
+        payload.update(extra_payload)
+
+        try:
+            async with self._get_session().post(
+                    self.TOKEN_URL, data=payload, headers=self.TOKEN_HEADERS,
+                    auth=aiohttp.BasicAuth(self._config['client_id'],
+                                           self._config['app_secret']),
+                    timeout=aiohttp.ClientTimeout(total=self.TOKEN_TIMEOUT)) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            logger.error('Could not authenticate! Error: %s', str(err))
+            self.logged_in_state = False
+            return None
+
+    def _refresh_token_expiring(self) -> bool:
+        return (self._tokens['refresh_token'] is None or
+                self._tokens['refresh_expiration'] - timedelta(days = 1) < datetime.now())
+
+    async def _authenticate_async(self) -> None:
+        '''
+        Refreshes the access token if it is about to expire, one refresh for all the
+        concurrent tasks.
+        '''
+        if self._access_expiring():
+            await self._async_refresh_flight.do('refresh', self._refresh_once_async)
+
+    async def _refresh_once_async(self) -> None:
+        async with self._get_refresh_lock():
+            if not self._access_expiring():
+                return
+
+            started = None
+            login_needed = self._single_access
+            try:
+                if not login_needed:
+                    async with self._store_lock_async():
+                        # Another process may have renewed the token
+                        if self._load_stored_tokens() and not self._access_expiring():
+                            return
+                        if self._refresh_token_expiring():
+                            logger.warning('Refresh Token is almost expired or expired. '
+                                           'Expiration: %s',
+                                           str(self._tokens['refresh_expiration'])[:22])
+                            login_needed = True
+                        else:
+                            started = time.perf_counter()
+                            token_response = await self._request_token_async(
+                                'refresh_token', {'refresh_token': self._tokens['refresh_token']})
+                            if token_response:
+                                self._update_access_token(token_response)
+                            else:
+                                logger.error('Could not authenticate while refreshing token!')
+                                login_needed = True
+
+                if login_needed:
+                    # Interactive, outside the store lock (it takes the lock to save)
+                    started = started or time.perf_counter()
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, self._obtain_refresh_token)
+            finally:
+                if started is not None:
+                    self._record_refresh(time.perf_counter() - started, self.logged_in_state)
+
+    def get_headers(self) -> Optional[Dict[str, str]]:
+        """
+        Not available for the aiohttp client, use "await auth.get_headers_async()".
+        """
+        raise TypeError('Use "await get_headers_async()" with AsyncSchwabAuth')
+
+#### BACKGROUND REFRESH
+    def start_refresher(self) -> None:
+        """
+        Starts the background token refresher as a task of the running event loop
+        (aiohttp requests), or as SchwabAuth.start_refresher (thread) when no loop
+        is running.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            super().start_refresher()
+            return
+
+        if self._single_access:
+            logger.warning('Background token refresh is not available with single access')
+            return
+        if self._refresher_task is not None and not self._refresher_task.done():
+            return
+        self._refresher_task = loop.create_task(self._run_refresher_async())
+        logger.info('Background token refresher task started')
+
+    def stop_refresher(self, timeout: Optional[float] = None) -> None:
+        if self._refresher_task is not None:
+            self._refresher_task.cancel()
+            self._refresher_task = None
+        super().stop_refresher(timeout)
+
+    async def _run_refresher_async(self) -> None:
+        while True:
+            wait = self._access_deadline - self.REFRESH_MARGIN - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            refreshed = await self._background_refresh_async()
+            if refreshed is None:
+                break
+            if not refreshed:
+                await asyncio.sleep(self.REFRESH_RETRY)
+
+    async def _background_refresh_async(self) -> Optional[bool]:
+        """
+        _background_refresh with the aiohttp session.
+        """
+        async with self._get_refresh_lock(), self._store_lock_async():
+            if (self._load_stored_tokens() and
+                    self._access_deadline - time.monotonic() > self.REFRESH_MARGIN):
+                return True
+
+            if self._refresh_token_expiring():
+                logger.warning('Refresh Token is almost expired or expired, '
+                               'background token refresh stopped')
+                return None
+
+            started = time.perf_counter()
+            token_response = await self._request_token_async(
+                'refresh_token', {'refresh_token': self._tokens['refresh_token']})
+            self._record_refresh(time.perf_counter() - started, bool(token_response))
+            if token_response:
+                self._update_access_token(token_response)
+                logger.info('Access token refreshed in background')
+                return True
+
+        self.logged_in_state = time.monotonic() < self._access_deadline
+        logger.warning('Background token refresh failed, retrying in %d s', self.REFRESH_RETRY)
+        return False
+
+    async def aclose(self) -> None:
+        '''
+        Stops the refresher and closes the own aiohttp session (if any).
+        '''
+        self.stop_refresher()
+        if self._own_session is not None and not self._own_session.closed:
+            await self._own_session.close()
+        self._own_session = None
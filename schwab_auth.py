@@ -5,14 +5,20 @@ Created on Sun Oct 13 13:09:41 2019
 """
 
 import os
+import time
 import pickle
+import asyncio
+import threading
 import webbrowser
 import secrets
 import urllib.parse as up
 import logging
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Union
+from typing import Any, Dict, Optional, Union
 import requests
+from schwab_singleflight import SingleFlight, AsyncSingleFlight
+from schwab_token_store import TokenStore
 
 
 
@@ -42,15 +48,28 @@ class SchwabAuth:
         _tokens (dict): Internal dictionary storing access and refresh tokens
                          along with their expiration times.
         logged_in_state (bool): Flag indicating successful authentication state.
+        auto_refresh (bool, optional): Renews the access token in a background
+                                       thread before it expires (default: False).
+        token_store (TokenStore, optional): Token file shared by all the processes
+                                            (default: ./{user}tokens.json).
     """
 
     # time constants (seconds)
     ACCESS_DURATION = 1800
     REFRESH_DURATION = 7776000
+    # background refresh: seconds before expiration, and between failed attempts
+    REFRESH_MARGIN = 300
+    REFRESH_RETRY = 30
+
+    TOKEN_URL = 'https://api.schwabapi.com/v1/oauth/token'
+    TOKEN_HEADERS = {'Accept': 'application/json',
+                     'Content-Type': 'application/x-www-form-urlencoded;charset=UTF-8'}
+    TOKEN_TIMEOUT = 5
 
 
     def __init__(self, config: dict[str, str], store_refresh_token: bool  = True,
-                 single_access: bool = False):
+                 single_access: bool = False, auto_refresh: bool = False,
+                 token_store: Optional[TokenStore] = None):
 
         """
         Initializes the Schwab authentication session.
@@ -62,6 +81,13 @@ class SchwabAuth:
                                                    persistence (default: True).
             single_access (bool, optional): Flag to indicate single-use access
                                                token (default: False).
+            auto_refresh (bool, optional): Starts the background token refresher
+                                           (default: False), see start_refresher.
+            token_store (TokenStore, optional): Shared token file. Processes using
+                                                the same store share one token pair
+                                                (default: ./{user}tokens.json, not
+                                                used with single_access or
+                                                store_refresh_token = False).
         """
 
         if not config:
@@ -70,16 +96,32 @@ class SchwabAuth:
         self._config = config
         self._store_refresh_token = store_refresh_token
         self._single_access = single_access
+        self._token_store = None
+        if store_refresh_token and not single_access:
+            self._token_store = token_store or TokenStore(f'./{config["user"]}tokens.json')
         self._tokens = {
                         'access_token': None,
                         'access_expiration': None,
                         'refresh_token': None,
                         'refresh_expiration': None
                        }
+        # Prebuilt Authorization header and the monotonic time until it is served as is
+        self._headers = None
+        self._headers_deadline = 0.0
+        self._access_deadline = 0.0
+        self._refresher = None
+        self._stop_refresher = threading.Event()
+        # Only one token refresh runs at a time, concurrent callers wait for it
+        self._refresh_flight = SingleFlight()
+        self._async_refresh_flight = AsyncSingleFlight()
+        self._refresh_metrics = {'refreshes': 0, 'failures': 0, 'total_time': 0.0,
+                                 'last_time': 0.0, 'max_time': 0.0}
 
         self.logged_in_state = False
         self._initialize_authentication()
         logger.info("Schwab authentication initialized")
+        if auto_refresh:
+            self.start_refresher()
 
     def __repr__(self) -> str:
         """
@@ -96,20 +138,84 @@ class SchwabAuth:
     def _initialize_authentication(self) -> None:
         """
         Initializes authentication logic, handling refresh token persistence or renewal.
+
+        With a token store, a valid access token stored by another process is used
+        as is, so starting a process does not request a new token.
         """
         refresh_token_file = f'./{self._config["user"]}refreshtoken.pickle'
-        if os.path.isfile(refresh_token_file):
-            if not self._store_refresh_token or self._single_access:
+        if self._token_store is None:
+            if os.path.isfile(refresh_token_file):
                 os.remove(refresh_token_file)
-                self._obtain_refresh_token()
-            else:
-                with open(refresh_token_file, 'rb') as file:
-                    (self._tokens['refresh_token'],
-                     self._tokens['refresh_expiration']) = pickle.load(file)
+            self._obtain_refresh_token()
+            return
 
+        with self._token_store.lock():
+            if self._token_store.load() is None and os.path.isfile(refresh_token_file):
+                self._migrate_refresh_token_file(refresh_token_file)
+
+            if not self._load_stored_tokens():
+                self._obtain_refresh_token()
+            elif self._access_expiring():
                 self._refresh_access_token()
-        else:
-            self._obtain_refresh_token()
+
+    def _migrate_refresh_token_file(self, refresh_token_file: str) -> None:
+        """
+        Moves the refresh token of the former per user pickle file to the token store.
+        """
+        with open(refresh_token_file, 'rb') as file:
+            (self._tokens['refresh_token'],
+             self._tokens['refresh_expiration']) = pickle.load(file)
+        self._save_tokens()
+        os.remove(refresh_token_file)
+        logger.info('Refresh token moved to %s', self._token_store.path)
+
+
+#### TOKEN STORE
+
+    def _store_lock(self):
+        """
+        Cross-process lock of the token store (no-op without store).
+        """
+        return self._token_store.lock() if self._token_store is not None else nullcontext()
+
+    def _load_stored_tokens(self) -> bool:
+        """
+        Takes the tokens of the store, which may have been renewed by another process.
+
+        Returns:
+            bool: True if the store has a refresh token.
+        """
+        if self._token_store is None:
+            return False
+        stored = self._token_store.load()
+        if not stored or not stored.get('refresh_token'):
+            return False
+
+        self._tokens['refresh_token'] = stored['refresh_token']
+        self._tokens['refresh_expiration'] = datetime.fromtimestamp(stored['refresh_expiration'])
+        access_expiration = stored.get('access_expiration')
+        if (stored.get('access_token') and access_expiration
+                and stored['access_token'] != self._tokens['access_token']):
+            self._set_access_token(stored['access_token'], access_expiration - time.time())
+        elif self._tokens['access_expiration'] is None:
+            # Refresh token only (migrated file)
+            self._tokens['access_expiration'] = datetime.now()
+        return True
+
+    def _save_tokens(self) -> None:
+        """
+        Writes the current tokens to the token store.
+        """
+        if self._token_store is None:
+            return
+        tokens = self._tokens
+        with self._token_store.lock():
+            self._token_store.save({
+                'access_token': tokens['access_token'],
+                'access_expiration': (tokens['access_expiration'].timestamp()
+                                      if tokens['access_token'] else None),
+                'refresh_token': tokens['refresh_token'],
+                'refresh_expiration': tokens['refresh_expiration'].timestamp()})
 
 
 #### CODE AND REFRESH TOKEN
@@ -161,11 +267,7 @@ class SchwabAuth:
         self._tokens['refresh_expiration'] = (datetime.now() +
                                               timedelta(seconds=self.REFRESH_DURATION))
 
-        if self._store_refresh_token:
-            refresh_token_file = f'./{self._config["user"]}refreshtoken.pickle'
-            with open(refresh_token_file, 'wb') as file:
-                pickle.dump([self._tokens['refresh_token'],
-                             self._tokens['refresh_expiration']], file)
+        self._save_tokens()
 
 
     def _obtain_refresh_token(self) -> None:
@@ -218,11 +320,6 @@ class SchwabAuth:
         """
 
 
-        url = r'https://api.schwabapi.com/v1/oauth/token'
-        headers = {
-                'Accept': 'application/json',
-                'Content-Type': 'application/x-www-form-urlencoded;charset=UTF-8'
-                }
         auth = (self._config['client_id'],self._config['app_secret'])
 
         payload = {'client_id': self._config['client_id'],
@@ -230,7 +327,8 @@ class SchwabAuth:
         payload.update(extra_payload)
 
         try:
-            response = requests.post(url, data=payload, headers=headers, auth=auth, timeout=5)
+            response = requests.post(self.TOKEN_URL, data=payload, headers=self.TOKEN_HEADERS,
+                                     auth=auth, timeout=self.TOKEN_TIMEOUT)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as err:
@@ -288,8 +386,20 @@ class SchwabAuth:
           authentication.
         """
 
-        self._tokens['access_token'] = token_response['access_token']
-        self._tokens['access_expiration'] = datetime.now() + timedelta(seconds=self.ACCESS_DURATION)
+        self._set_access_token(token_response['access_token'], self.ACCESS_DURATION)
+        if self._tokens['refresh_token'] is not None:
+            self._save_tokens()
+
+    def _set_access_token(self, access_token: str, duration: float) -> None:
+        """
+        Sets the access token valid for duration seconds and prebuilds its header.
+        """
+        self._tokens['access_token'] = access_token
+        self._tokens['access_expiration'] = datetime.now() + timedelta(seconds=duration)
+        self._access_deadline = time.monotonic() + duration
+        # Same margins as _authenticate
+        self._headers_deadline = self._access_deadline - (180 if self._single_access else 5)
+        self._headers = {'Authorization': f'Bearer {access_token}'}
         self.logged_in_state = True
 
 
@@ -329,29 +439,186 @@ class SchwabAuth:
 
         This method is typically called before making API calls
         to ensure a valid access token is available.
+
+        The refresh is single-flight: when several threads find the token expired at
+        the same time, one of them refreshes it and the others wait for its result
+        instead of sending their own (competing) token requests. The background
+        refresher uses the same flight; when it gives up because a new login is
+        needed (None), the caller runs its own refresh, which does the login.
         """
 
-        if self._single_access and (self._tokens['access_expiration'] -
-                                       timedelta(seconds = 180) < datetime.now()):
-            self._obtain_refresh_token()
+        if self._access_expiring():
+            if self._refresh_flight.do('refresh', self._refresh_once) is None:
+                self._refresh_flight.do('refresh', self._refresh_once)
+
+    def _access_expiring(self) -> bool:
+        margin = 180 if self._single_access else 5
+        return self._tokens['access_expiration'] - timedelta(seconds = margin) < datetime.now()
+
+    def _refresh_once(self) -> bool:
+        """
+        Refreshes the token in the single flight. Callers that were queued behind a
+        refresh that just finished find the token renewed and return.
 
-        elif self._tokens['access_expiration'] - timedelta(seconds = 5) < datetime.now():
-            self._refresh_access_token()
+        Returns:
+            bool: True if the access token is valid afterwards. The background
+            refresher joins this flight too and goes on with this result.
+        """
+        if not self._access_expiring():
+            return True
+
+        with self._store_lock():
+            # Another process may have renewed the token while we waited for the lock
+            if self._load_stored_tokens() and not self._access_expiring():
+                return True
+
+            started = time.perf_counter()
+            try:
+                if self._single_access:
+                    self._obtain_refresh_token()
+                else:
+                    self._refresh_access_token()
+            finally:
+                self._record_refresh(time.perf_counter() - started, self.logged_in_state)
+        return self.logged_in_state and not self._access_expiring()
+
+    async def _authenticate_async(self) -> None:
+        """
+        _authenticate for coroutines: concurrent tasks share one refresh, which runs in
+        the default executor (joining the thread single flight) so the event loop is
+        not blocked by the token request.
+        """
+        if self._access_expiring():
+            loop = asyncio.get_running_loop()
+            await self._async_refresh_flight.do(
+                'refresh', lambda: loop.run_in_executor(None, self._authenticate))
+
+    def _record_refresh(self, elapsed: float, success: bool) -> None:
+        metrics = self._refresh_metrics
+        metrics['refreshes'] += 1
+        metrics['failures'] += not success
+        metrics['total_time'] += elapsed
+        metrics['last_time'] = elapsed
+        metrics['max_time'] = max(metrics['max_time'], elapsed)
+
+    def refresh_stats(self) -> Dict[str, Any]:
+        """
+        Returns the token refresh metrics.
+
+        Returns:
+            dict: refreshes and failures (token refreshes sent), waiters (callers that
+            waited for a refresh in flight instead of sending one), and the last,
+            average and max refresh latency in milliseconds.
+        """
+        metrics = self._refresh_metrics
+        return {'refreshes': metrics['refreshes'],
+                'failures': metrics['failures'],
+                'waiters': self._refresh_flight.shared + self._async_refresh_flight.shared,
+                'last_ms': metrics['last_time'] * 1000,
+                'avg_ms': (metrics['total_time'] / metrics['refreshes'] * 1000
+                           if metrics['refreshes'] else 0.0),
+                'max_ms': metrics['max_time'] * 1000}
+
+#### BACKGROUND REFRESH
+    def start_refresher(self) -> None:
+        """
+        Starts a daemon thread that renews the access token REFRESH_MARGIN seconds
+        before it expires, so get_headers only returns the cached header and requests
+        never wait for the token endpoint.
+
+        The refresher only uses the refresh token. When the refresh token itself is
+        about to expire (a new login is needed) it stops, and the login is done on the
+        next request as without refresher. Not available with single_access.
+        """
+        if self._single_access:
+            logger.warning('Background token refresh is not available with single access')
+            return
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._stop_refresher.clear()
+        self._refresher = threading.Thread(target=self._run_refresher,
+                                           name='SchwabTokenRefresher', daemon=True)
+        self._refresher.start()
+        logger.info('Background token refresher started')
+
+    def stop_refresher(self, timeout: Optional[float] = None) -> None:
+        """
+        Stops the background token refresher.
+        """
+        self._stop_refresher.set()
+        if self._refresher is not None:
+            if self._refresher is not threading.current_thread():
+                self._refresher.join(timeout)
+            self._refresher = None
+
+    def _run_refresher(self) -> None:
+        while not self._stop_refresher.is_set():
+            wait = self._access_deadline - self.REFRESH_MARGIN - time.monotonic()
+            if wait > 0 and self._stop_refresher.wait(wait):
+                break
+
+            # Shares the flight with _authenticate: joining a foreground refresh gives
+            # its result (True or False), only _background_refresh returns None
+            refreshed = self._refresh_flight.do('refresh', self._background_refresh)
+            if refreshed is None:
+                break
+            if not refreshed and self._stop_refresher.wait(self.REFRESH_RETRY):
+                break
+
+    def _background_refresh(self) -> Optional[bool]:
+        """
+        Renews the access token with the refresh token.
+
+        Returns:
+            True: Renewed.
+            False: Failed, to be retried.
+            None: A new login is needed, the refresher stops.
+        """
+        with self._store_lock():
+            if (self._load_stored_tokens() and
+                    self._access_deadline - time.monotonic() > self.REFRESH_MARGIN):
+                # Renewed by another process
+                return True
+
+            if (self._tokens['refresh_token'] is None or
+                    self._tokens['refresh_expiration'] - timedelta(days = 1) < datetime.now()):
+                logger.warning('Refresh Token is almost expired or expired, '
+                               'background token refresh stopped')
+                return None
+
+            started = time.perf_counter()
+            token_response = self._request_token('refresh_token',
+                                                 {'refresh_token': self._tokens['refresh_token']})
+            self._record_refresh(time.perf_counter() - started, bool(token_response))
+            if token_response:
+                self._update_access_token(token_response)
+                logger.info('Access token refreshed in background')
+                return True
+
+        # The current access token is still usable until it expires
+        self.logged_in_state = time.monotonic() < self._access_deadline
+        logger.warning('Background token refresh failed, retrying in %d s', self.REFRESH_RETRY)
+        return False
 
 #### PUBLIC SERVICES
     def get_headers(self) -> Optional[Dict[str, str]]:
         """
         Returns the headers required for authenticated API calls.
 
-        This method calls `_authenticate` to ensure a valid access token is available.
-        If authentication is successful, it returns the headers with the access token.
-        Otherwise, it logs an error and returns None.
+        While the access token is valid, a copy of the prebuilt header is returned
+        without any check. Otherwise this method calls `_authenticate` to ensure a valid
+        access token is available. If authentication is successful, it returns the
+        headers with the access token. Otherwise, it logs an error and returns None.
 
         Returns:
             dict: A dictionary containing the 'Authorization' header with the access token.
             None: If the user is not logged in.
         """
 
+        headers = self._headers
+        if headers is not None and time.monotonic() < self._headers_deadline:
+            return dict(headers)
+
         self._authenticate()
 
         if self.logged_in_state:
@@ -360,6 +627,23 @@ class SchwabAuth:
         logger.error('Wrong authentication')
         return None
 
+    async def get_headers_async(self) -> Optional[Dict[str, str]]:
+        """
+        Same as get_headers for coroutines, a token refresh does not block the event loop.
+        """
+
+        headers = self._headers
+        if headers is not None and time.monotonic() < self._headers_deadline:
+            return dict(headers)
+
+        await self._authenticate_async()
+
+        if self.logged_in_state:
+            return {'Authorization':f'Bearer {self._tokens["access_token"]}'}
+
+        logger.error('Wrong authentication')
+        return None
+
     @property
     def access_token(self) -> str:
         """
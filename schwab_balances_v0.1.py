@@ -10,10 +10,13 @@ import copy
 import logging
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dateutil.relativedelta import relativedelta
 import pandas as pd
 import pytz
 
+logger = logging.getLogger(__name__)
+
 #### Auxilian Functions
 
 def parse_date_time(time_to_format):
@@ -1094,45 +1097,87 @@ def format_dateTime(dateTime):
     return formatted_date_str
 
 
-def load_all_transactions(schwab_api, historical_transactions_json_file):
+def fetch_transaction_windows(schwab_api, end_date=None, window_days=180, max_workers=4,
+                              empty_windows_stop=8, limit_date=datetime(2000, 1, 1)):
     '''
-    Loads transactions until there is an overlap in dates.
+    Fetches the transaction history backwards in window_days windows, max_workers
+    windows at a time (the api rate limiter keeps the requests within the limits).
+
+    The fetch stops at limit_date, or once empty_windows_stop consecutive windows
+    older than the oldest transaction found are empty (before the account first
+    activity), so recent accounts need a few requests instead of one per window back
+    to 2000. Until a first transaction is found the windows go back to limit_date, so
+    an account without recent activity still gets its whole history; after that only
+    a gap longer than empty_windows_stop * window_days (about 4 years by default)
+    ends the history early.
 
     Parameters:
         schwab_api (SchwabAPI): Schwab API object.
+        end_date (datetime): End of the newest window (default: now).
+        window_days (int): Days per request (max 365).
+        max_workers (int): Windows requested concurrently.
+        empty_windows_stop (int): Consecutive empty windows that end the history.
+        limit_date (datetime): Oldest date fetched.
 
     Returns:
-        None
+        list: Transactions of each window (sorted by time), newest window first.
     '''
-    seen_activity_ids = set()
-    combined_transactions = []
-
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=180)  # 3 meses
-
-    year_2000 = datetime(2000, 1, 1)  # Fecha límite
-
-    while end_date > year_2000:
-        # Formatear fechas
-        end_date_str = format_dateTime(str(end_date))
-        start_date_str = format_dateTime(str(start_date))
-
+    end_date = end_date or datetime.now()
+    windows = []
+    while end_date > limit_date:
+        start_date = max(end_date - timedelta(days=window_days), limit_date)
+        windows.append((format_dateTime(str(start_date)), format_dateTime(str(end_date))))
+        end_date = start_date
 
-        #end_date_str = '2014-08-14T04:00:00.000Z'
-        #start_date_str = '2014-05-16T04:00:00.000Z'
-        # Obtener transacciones para el período actual
-        fetched_transactions = schwab_api.get_transactions(start_date=start_date_str, end_date=end_date_str)
-        sorted_transactions = sorted(fetched_transactions, key=lambda x: x["time"])
+    def fetch(window):
+        start_date_str, end_date_str = window
+        fetched = schwab_api.get_transactions(start_date=start_date_str, end_date=end_date_str)
+        if fetched is None:
+            # One retry, a failed window must not be taken as an empty one
+            fetched = schwab_api.get_transactions(start_date=start_date_str,
+                                                  end_date=end_date_str)
+        if fetched is None:
+            raise RuntimeError(f'Transactions request failed for {start_date_str} - {end_date_str}')
+        return sorted(fetched, key=lambda x: x["time"])
+
+    results = []
+    empty_windows = 0
+    found = False
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for batch_start in range(0, len(windows), max(1, max_workers)):
+            batch = windows[batch_start:batch_start + max(1, max_workers)]
+            for window, fetched in zip(batch, executor.map(fetch, batch)):
+                logger.info('%s - %s %d', window[0], window[1], len(fetched))
+                results.append(fetched)
+                found = found or bool(fetched)
+                empty_windows = 0 if fetched or not found else empty_windows + 1
+                if empty_windows >= empty_windows_stop:
+                    logger.info('%d empty windows, history complete at %s',
+                                empty_windows, window[0])
+                    return results
+    return results
+
+
+def load_all_transactions(schwab_api, historical_transactions_json_file, max_workers=4):
+    '''
+    Loads the complete transaction history (fetch_transaction_windows) and writes it
+    to historical_transactions_json_file.
 
-        print(start_date_str + " - " + end_date_str + " " + str(len(sorted_transactions)))
+    Parameters:
+        schwab_api (SchwabAPI): Schwab API object.
+        historical_transactions_json_file (str): Output JSON file.
+        max_workers (int): Windows requested concurrently.
 
+    Returns:
+        list: Transactions sorted by time, without repeated activityId.
+    '''
+    seen_activity_ids = set()
+    combined_transactions = []
 
+    for fetched_transactions in fetch_transaction_windows(schwab_api,
+                                                          max_workers=max_workers):
         # Agregar transacciones al conjunto y la lista combinada
-        add_transactions(sorted_transactions, seen_activity_ids, combined_transactions)
-
-        # Actualizar las fechas para el siguiente bucle
-        end_date = start_date
-        start_date = end_date - timedelta(days=180)  # 3 meses
+        add_transactions(fetched_transactions, seen_activity_ids, combined_transactions)
 
     combined_transactions = sorted(combined_transactions, key=lambda x: x["time"])
 
@@ -1141,6 +1186,53 @@ def load_all_transactions(schwab_api, historical_transactions_json_file):
     write_json_file(combined_transactions, historical_transactions_json_file)
     return combined_transactions
 
+def sync_transactions(schwab_api, transaction_store, historical_transactions_json_file=None,
+                      max_workers=4):
+    '''
+    Brings transaction_store (TransactionStore) up to date. The first run loads the
+    previous JSON file if given and not empty, or downloads the complete history
+    (fetch_transaction_windows); after that only the transactions newer than the
+    store watermark are requested. The watermark is only set once the download has
+    gone back to the account first activity (or limit_date): a failed window raises
+    and the next run downloads the history again.
+
+    Parameters:
+        schwab_api (SchwabAPI): Schwab API object.
+        transaction_store (TransactionStore): Local transaction store.
+        historical_transactions_json_file (str): JSON file of a previous full download.
+        max_workers (int): Windows requested concurrently on the first run.
+
+    Returns:
+        list: All the stored transactions sorted by time.
+    '''
+    if transaction_store.watermark() is None:
+        transactions = []
+        if historical_transactions_json_file and os.path.isfile(historical_transactions_json_file):
+            try:
+                transactions = read_json_file(historical_transactions_json_file)
+            except ValueError:
+                logger.warning('Invalid transactions file %s, downloading the history.',
+                               historical_transactions_json_file)
+        if transactions:
+            transaction_store.add(transactions)
+            # The JSON file is complete up to when it was written, not only up to
+            # its newest transaction
+            transaction_store.set_watermark(datetime.fromtimestamp(
+                os.path.getmtime(historical_transactions_json_file)))
+            transaction_store.sync(schwab_api)
+        else:
+            synced_until = datetime.now()
+            for fetched_transactions in fetch_transaction_windows(schwab_api,
+                                                                  end_date=synced_until,
+                                                                  max_workers=max_workers):
+                transaction_store.add(fetched_transactions)
+            transaction_store.set_watermark(synced_until)
+    else:
+        transaction_store.sync(schwab_api)
+
+    return transaction_store.transactions()
+
+
 def add_transactions(transactions, seen_activity_ids, combined_transactions):
     for transaction in transactions:
         activity_id = transaction["activityId"]
@@ -1154,6 +1246,7 @@ def add_transactions(transactions, seen_activity_ids, combined_transactions):
 
 if __name__ == '__main__':
     JSON_FILE = './AllTransactions.json'
+    DB_FILE = './AllTransactions.db'
     EXCEL_FILE_PATH = './AllTransactions_new.xlsx'
     LOG_FILE = './transactions.log'
     CONFIG_FILE = './Schwab_config.json'
@@ -1168,6 +1261,7 @@ if __name__ == '__main__':
     logger.info('Program started.')
 
     from schwab_api import SchwabApi
+    from schwab_transaction_store import TransactionStore
     user_data = read_json_file(CONFIG_FILE)
 
     try:
@@ -1177,7 +1271,7 @@ if __name__ == '__main__':
         print(account)
         # Uso del sistema
         balances_system = Balances()
-        allTransactions = load_all_transactions(schwab_api, JSON_FILE)
+        allTransactions = sync_transactions(schwab_api, TransactionStore(DB_FILE), JSON_FILE)
         #allTransactions = read_json_file(JSON_FILE)
     
         for t in allTransactions:
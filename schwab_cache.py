@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 12:05:33 2026
+
+@author: LC
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from schwab_codec import loads as json_loads, dumps_bytes as json_dumps
+
+
+if not logging.root.handlers:
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.info("Logging activated at Cache")
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCacheBackend:
+    '''
+    In memory LRU cache bounded by number of entries and bytes.
+
+    Values are stored as the encoded JSON bytes, so every hit returns a fresh copy
+    that the caller can modify, and max_bytes bounds the stored payload size.
+
+    Attributes:
+        max_entries (int): Maximum number of entries (default: 1024).
+        max_bytes (int): Maximum total size of the encoded values (default: 64 MB).
+    '''
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires < time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def set(self, key: str, data: bytes, ttl: float) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + ttl, data)
+            self._bytes += len(data)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        _, data = self._entries.pop(key)
+        self._bytes -= len(data)
+
+
+class DiskCacheBackend:
+    '''
+    On disk cache that survives restarts. One JSON file per entry, bounded by number
+    of entries and bytes. The least recently used files are removed first.
+
+    Entries can hold account data (account hashes, streamer credentials of the
+    user preference), so the directory is created 0700 and every file is written
+    0600, only readable by the owner, as the token store.
+
+    Attributes:
+        directory (str): Cache directory (default: './schwab_cache').
+        max_entries (int): Maximum number of files (default: 4096).
+        max_bytes (int): Maximum total size of the files (default: 256 MB).
+    '''
+
+    def __init__(self, directory: str = './schwab_cache', max_entries: int = 4096,
+                 max_bytes: int = 256 * 1024 * 1024):
+
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._files())
+
+    @property
+    def size(self) -> int:
+        return sum(size for _, _, size in self._files())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory,
+                            hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _files(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, path, stat.st_size))
+        return files
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                expires = float(file.readline())
+                data = file.read()
+        except (FileNotFoundError, ValueError):
+            return None
+        if expires < time.time():
+            self.delete(key)
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return data
+
+    def set(self, key: str, data: bytes, ttl: float) -> None:
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        # mkstemp files are only readable by the owner
+        descriptor, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(f'{time.time() + ttl}\n'.encode('ascii'))
+                file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._prune()
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        for _, path, _ in self._files():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _prune(self) -> None:
+        with self._lock:
+            files = sorted(self._files())
+            total = sum(size for _, _, size in files)
+            while files and (len(files) > self.max_entries or total > self.max_bytes):
+                _, path, size = files.pop(0)
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+class ResponseCache:
+    '''
+    Response cache for slow-changing SchwabApi endpoints.
+
+    Each cached endpoint method has its own TTL (seconds). Methods without a TTL
+    are never cached. Only successful JSON responses are stored.
+
+    Attributes:
+        backend: MemoryCacheBackend (default) or DiskCacheBackend.
+        ttls (dict): TTL per SchwabApi method name.
+        hits (int), misses (int): Totals, per endpoint in stats().
+
+    EXAMPLES:
+    api = SchwabApi(config, cache = ResponseCache())
+    api = SchwabApi(config, cache = ResponseCache(DiskCacheBackend('./cache'),
+                                                  ttls = {'get_instruments': 7 * 86400}))
+    api.cache.stats()
+    '''
+
+    DEFAULT_TTLS = {'get_market_hours': 3600,
+                    'get_markets_hours': 3600,
+                    'get_instruments': 86400,
+                    'search_instruments': 86400,
+                    'get_option_expirationchain': 3600,
+                    'get_user_preference': 3600,
+                    'get_account_numbers': 86400}
+
+    def __init__(self, backend=None, ttls: Optional[Dict[str, float]] = None):
+
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+
+        self.hits = 0
+        self.misses = 0
+        self._endpoint_stats = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f'<ResponseCache hits={self.hits} misses={self.misses} entries={len(self.backend)}>'
+
+    def ttl(self, name: str) -> Optional[float]:
+        '''
+        Returns the TTL of an endpoint method, None when it is not cached.
+        '''
+        ttl = self.ttls.get(name)
+        return ttl if ttl and ttl > 0 else None
+
+    @staticmethod
+    def make_key(name: str, method: str, url: str, params: Optional[Dict[str, Any]]) -> str:
+        '''
+        Builds the cache key from the endpoint and its request parameters.
+        '''
+        items = sorted((key, str(value)) for key, value in (params or {}).items()
+                       if value is not None)
+        return f'{name}|{method.upper()}|{url}|{json.dumps(items)}'
+
+    def get(self, name: str, key: str) -> Tuple[bool, Any]:
+        '''
+        Returns (True, value) on a hit and (False, None) on a miss.
+        '''
+        data = self.backend.get(key)
+        self._count(name, data is not None)
+        if data is None:
+            return False, None
+        return True, json_loads(data)
+
+    def set(self, name: str, key: str, value: Any) -> None:
+        '''
+        Stores a JSON response for the TTL of the endpoint.
+        '''
+        ttl = self.ttl(name)
+        if ttl and isinstance(value, (dict, list)):
+            self.backend.set(key, json_dumps(value), ttl)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def _count(self, name: str, hit: bool) -> None:
+        with self._lock:
+            stats = self._endpoint_stats.setdefault(name, {'hits': 0, 'misses': 0})
+            if hit:
+                self.hits += 1
+                stats['hits'] += 1
+            else:
+                self.misses += 1
+                stats['misses'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        '''
+        Returns hit/miss counters (total and per endpoint) and cache size.
+        '''
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'hit_ratio': self.hits / total if total else 0.0,
+                    'entries': len(self.backend),
+                    'bytes': self.backend.size,
+                    'endpoints': {name: dict(stats)
+                                  for name, stats in self._endpoint_stats.items()}}
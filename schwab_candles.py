@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 15:10:44 2026
+
+@author: LC
+"""
+
+import re
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+from schwab_enum import OutputFormat
+from schwab_codec import get_codec
+from schwab_models import Candle
+
+
+# Storage layout, datetime as epoch milliseconds
+CANDLE_DTYPE = np.dtype([('datetime', 'i8'),
+                         ('open', 'f8'),
+                         ('high', 'f8'),
+                         ('low', 'f8'),
+                         ('close', 'f8'),
+                         ('volume', 'i8')])
+
+# Same memory layout with datetime64 timestamps, returned to the user (zero copy view)
+CANDLE_TIME_DTYPE = np.dtype([('datetime', 'M8[ms]'),
+                              ('open', 'f8'),
+                              ('high', 'f8'),
+                              ('low', 'f8'),
+                              ('close', 'f8'),
+                              ('volume', 'i8')])
+
+_CANDLE_KEYS = frozenset(CANDLE_DTYPE.names)
+_key_orders = {}
+
+_CANDLES_START = re.compile(rb'"candles"\s*:\s*\[')
+_FIRST_KEYS = re.compile(rb'"(\w+)":')
+# Control bytes cannot appear unescaped in JSON, they mark the keys position
+_MARKERS = bytes(range(1, len(CANDLE_DTYPE.names) + 1))
+_NUMBER_CHARS = b'0123456789.eE+-, \t\r\n'
+
+
+def _candle_pairs_hook(pairs: List[tuple]) -> Union[tuple, Dict[str, Any]]:
+    '''
+    json object_pairs_hook turning every candle object into a tuple in CANDLE_DTYPE
+    field order, so no dict is built per candle. Other objects become dicts.
+    '''
+    keys = tuple(key for key, _ in pairs)
+    order = _key_orders.get(keys)
+    if order is None:
+        if frozenset(keys) != _CANDLE_KEYS or len(keys) != len(_CANDLE_KEYS):
+            return dict(pairs)
+        order = _key_orders[keys] = tuple(keys.index(name) for name in CANDLE_DTYPE.names)
+    return tuple(pairs[index][1] for index in order)
+
+
+def _decode_candle_numbers(payload: bytes) -> Optional[Tuple[bytes, np.ndarray]]:
+    '''
+    Parses the 'candles' list of a price history response as plain numbers:
+    numpy reads the values straight into float64 columns, so no object is created
+    per candle with any codec.
+
+    Returns:
+        (rest of the response with an empty candles list, candle array), or None
+        when the candles are not objects of the CANDLE_DTYPE numeric fields in one
+        key order (then the caller decodes them with the object hook).
+    '''
+    match = _CANDLES_START.search(payload)
+    if match is None:
+        return None
+    start = match.end()
+    end = payload.find(b']', start)
+    if end < 0:
+        return None
+    body = payload[start:end]
+    rest = payload[:start] + payload[end:]
+    if not body.strip():
+        return rest, np.empty(0, dtype=CANDLE_DTYPE)
+
+    keys = tuple(_FIRST_KEYS.findall(body, 0, body.find(b'}')))
+    if len(keys) != len(_CANDLE_KEYS) or {key.decode() for key in keys} != _CANDLE_KEYS:
+        return None
+
+    # Every object must have the keys in the first object order, and only numbers
+    for key, marker in zip(keys, _MARKERS):
+        body = body.replace(b'"' + key + b'":', bytes((marker,)))
+    count = body.count(b'{')
+    if count != body.count(b'}'):
+        return None
+    raw = np.frombuffer(body, dtype=np.uint8)
+    markers = raw[(raw >= 1) & (raw <= len(keys))]
+    if (markers.size != count * len(keys) or
+            not (markers.reshape(count, len(keys)) == np.arange(1, len(keys) + 1)).all()):
+        return None
+    numbers = body.translate(None, _MARKERS + b'{}')
+    if numbers.translate(None, _NUMBER_CHARS):
+        return None
+
+    values = np.fromstring(numbers, dtype=np.float64, sep=',')
+    if values.size != count * len(keys):
+        return None
+
+    values = values.reshape(count, len(keys))
+    candles = np.empty(count, dtype=CANDLE_DTYPE)
+    for column, key in enumerate(keys):
+        candles[key.decode()] = values[:, column]
+    return rest, candles
+
+
+def decode_candles(payload: Union[bytes, str]) -> Dict[str, Any]:
+    '''
+    Decodes a raw price history response. 'candles' is returned as a structured
+    array (CANDLE_TIME_DTYPE) instead of a list of dicts.
+
+    The candle values are parsed by numpy straight into the array and only the
+    rest of the response goes through the codec. Responses with other candle
+    layouts are decoded with the stdlib parser into tuples. No dict is built per
+    candle on either path.
+    '''
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+
+    decoded = _decode_candle_numbers(payload)
+    if decoded is not None:
+        rest, candles = decoded
+        response = get_codec().loads(rest)
+    else:
+        response = json.loads(payload, object_pairs_hook=_candle_pairs_hook)
+        candles = np.array(response.get('candles') or [], dtype=CANDLE_DTYPE)
+    response['candles'] = candles.view(CANDLE_TIME_DTYPE)
+    return response
+
+
+def candles_to_array(candles: List[Dict[str, Any]]) -> np.ndarray:
+    '''
+    Converts the 'candles' list of a price history response into a structured array.
+    '''
+    return np.fromiter(((candle['datetime'], candle['open'], candle['high'], candle['low'],
+                         candle['close'], candle['volume']) for candle in candles),
+                       dtype=CANDLE_DTYPE, count=len(candles))
+
+
+def array_to_candles(array: np.ndarray) -> List[Dict[str, Any]]:
+    '''
+    Converts a structured candle array back into the API 'candles' list.
+    '''
+    array = array.view(CANDLE_DTYPE)
+    return [{'open': open_, 'high': high, 'low': low, 'close': close,
+             'volume': volume, 'datetime': datetime_}
+            for datetime_, open_, high, low, close, volume in array.tolist()]
+
+
+def history_output(response: Optional[Dict[str, Any]],
+                   output_format: OutputFormat) -> Any:
+    '''
+    Converts a decoded price history response (candles as array) to output_format.
+
+    OutputFormat.JSON: the API response, candles as list of dicts.
+    OutputFormat.NUMPY: structured array with datetime64 'datetime', float64 OHLC
+                        and int64 'volume'.
+    OutputFormat.PANDAS: DataFrame with the same columns, the rest of the response
+                         (symbol, previousClose...) in DataFrame.attrs.
+    OutputFormat.MODEL: the API response, candles as schwab_models.Candle.
+    '''
+    if response is None:
+        return None
+
+    candles = response['candles'].view(CANDLE_TIME_DTYPE)
+    if output_format is OutputFormat.NUMPY:
+        return candles
+    if output_format is OutputFormat.PANDAS:
+        import pandas as pd
+        frame = pd.DataFrame(candles)
+        frame.attrs.update((key, value) for key, value in response.items() if key != 'candles')
+        return frame
+    if output_format is OutputFormat.MODEL:
+        return dict(response, candles=[Candle.from_dict(candle)
+                                       for candle in array_to_candles(candles)])
+    return dict(response, candles=array_to_candles(candles))
+
+
+def decode_history(payload: Union[bytes, str, None], output_format: OutputFormat) -> Any:
+    '''
+    Decodes a raw price history response straight into output_format.
+    '''
+    if not payload:
+        return None
+    return history_output(decode_candles(payload), output_format)
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 18:05:52 2026
+
+@author: LC
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+
+if not logging.root.handlers:
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.info("Logging activated at Codec")
+
+logger = logging.getLogger(__name__)
+
+
+class JsonCodec:
+    '''
+    JSON encoder/decoder used for REST responses, order payloads, the response
+    cache and streamer messages.
+
+    Attributes:
+        name (str): 'orjson', 'msgspec' or 'json'.
+        errors (tuple): Exceptions raised by loads on invalid JSON.
+    '''
+
+    __slots__ = ('name', '_loads', '_dumps', 'errors')
+
+    def __init__(self, name: str, loads: Callable[[Union[bytes, str]], Any],
+                 dumps: Callable[[Any], bytes], errors: Tuple[type, ...]):
+
+        self.name = name
+        self._loads = loads
+        self._dumps = dumps
+        self.errors = errors
+
+    def __repr__(self) -> str:
+        return f'<JsonCodec {self.name}>'
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self._loads(data)
+
+    def loads_lenient(self, data: Union[bytes, str]) -> Any:
+        '''
+        Same as loads, but accepts control characters inside strings
+        (stdlib json.loads(strict = False)), as some streamer messages have them.
+        '''
+        try:
+            return self._loads(data)
+        except self.errors:
+            return json.loads(data, strict=False)
+
+    def dumps(self, obj: Any) -> str:
+        return self._dumps(obj).decode('utf-8')
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return self._dumps(obj)
+
+
+def _default(obj: Any) -> Any:
+    '''
+    Encodes the NumPy values that end up in payloads (quantities and prices taken
+    from arrays): scalars as Python numbers, arrays as lists.
+    '''
+    if hasattr(obj, 'tolist') and hasattr(obj, 'dtype'):
+        return obj.tolist()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _stdlib_codec() -> JsonCodec:
+    return JsonCodec('json', json.loads,
+                     lambda obj: json.dumps(obj, separators=(',', ':'),
+                                            default=_default).encode('utf-8'),
+                     (ValueError,))
+
+
+def _orjson_codec() -> JsonCodec:
+    import orjson
+    return JsonCodec('orjson', orjson.loads,
+                     lambda obj: orjson.dumps(obj, default=_default,
+                                              option=orjson.OPT_SERIALIZE_NUMPY),
+                     (orjson.JSONDecodeError,))
+
+
+def _msgspec_codec() -> JsonCodec:
+    import msgspec
+    return JsonCodec('msgspec', msgspec.json.decode,
+                     msgspec.json.Encoder(enc_hook=_default).encode,
+                     (msgspec.DecodeError,))
+
+
+_CODECS = {'orjson': _orjson_codec, 'msgspec': _msgspec_codec, 'json': _stdlib_codec}
+
+# Preference order for 'auto'
+AUTO_ORDER = ('orjson', 'msgspec', 'json')
+
+
+def available_codecs() -> List[str]:
+    '''
+    Returns the codec names that can be used in this environment.
+    '''
+    names = []
+    for name, factory in _CODECS.items():
+        try:
+            factory()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def make_codec(name: str = 'auto') -> JsonCodec:
+    '''
+    Returns the codec called name ('orjson', 'msgspec', 'json'), or for 'auto' the
+    fastest installed one.
+    '''
+    if name == 'auto':
+        for candidate in AUTO_ORDER:
+            try:
+                return _CODECS[candidate]()
+            except ImportError:
+                continue
+    if name not in _CODECS:
+        raise ValueError(f'Unknown JSON codec {name!r}, use one of {list(_CODECS)} or "auto"')
+    return _CODECS[name]()
+
+
+_codec = make_codec(os.environ.get('SCHWAB_JSON_CODEC', 'auto'))
+
+
+def set_codec(name: str = 'auto') -> JsonCodec:
+    '''
+    Selects the JSON codec used by the whole package. The default is 'auto' or the
+    SCHWAB_JSON_CODEC environment variable.
+
+    EXAMPLE:
+    schwab_codec.set_codec('json')      # stdlib only
+    '''
+    global _codec
+    _codec = make_codec(name)
+    logger.info("JSON codec: %s", _codec.name)
+    return _codec
+
+
+def get_codec() -> JsonCodec:
+    return _codec
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    return _codec.loads(data)
+
+
+def loads_lenient(data: Union[bytes, str]) -> Any:
+    return _codec.loads_lenient(data)
+
+
+def dumps(obj: Any) -> str:
+    return _codec.dumps(obj)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    return _codec.dumps_bytes(obj)
+
+
+#### Benchmark
+
+def benchmark(payloads: Dict[str, bytes], codecs: Optional[Iterable[str]] = None,
+              repeat: int = 5) -> Dict[str, Dict[str, Dict[str, float]]]:
+    '''
+    Times decoding and encoding of recorded payloads with every codec.
+
+    RETURNS:
+    {payload name: {codec name: {'loads_ms': float, 'dumps_ms': float,
+                                 'loads_speedup': float, 'dumps_speedup': float}}}
+    Speedups are relative to the stdlib codec (best of repeat runs).
+    '''
+    codecs = [make_codec(name) for name in (codecs or available_codecs())]
+    results = {}
+    for payload_name, payload in payloads.items():
+        results[payload_name] = {}
+        obj = json.loads(payload)
+        for codec in codecs:
+            loads_time = min(_timed(codec.loads, payload) for _ in range(repeat))
+            dumps_time = min(_timed(codec.dumps_bytes, obj) for _ in range(repeat))
+            results[payload_name][codec.name] = {'loads_ms': loads_time * 1000,
+                                                 'dumps_ms': dumps_time * 1000}
+        baseline = results[payload_name].get('json')
+        for timing in results[payload_name].values():
+            for operation in ('loads', 'dumps'):
+                timing[f'{operation}_speedup'] = (baseline[f'{operation}_ms']
+                                                  / timing[f'{operation}_ms']
+                                                  if baseline and timing[f'{operation}_ms']
+                                                  else float('nan'))
+    return results
+
+
+def _timed(function: Callable[[Any], Any], argument: Any) -> float:
+    started = time.perf_counter()
+    function(argument)
+    return time.perf_counter() - started
+
+
+def _sample_payloads() -> Dict[str, bytes]:
+    '''
+    Synthetic payloads shaped like the largest API responses, used when no recorded
+    payload files are given.
+    '''
+    contract = {'putCall': 'CALL', 'symbol': 'SPXW  261120C05800000', 'bid': 12.1,
+                'ask': 12.4, 'last': 12.3, 'mark': 12.25, 'bidSize': 10, 'askSize': 12,
+                'totalVolume': 1520, 'volatility': 14.2, 'delta': 0.51, 'gamma': 0.004,
+                'theta': -1.2, 'vega': 3.1, 'rho': 0.4, 'openInterest': 8410,
+                'strikePrice': 5800.0, 'expirationDate': '2026-11-20T21:00:00.000+00:00',
+                'daysToExpiration': 34, 'multiplier': 100.0, 'inTheMoney': False}
+    chain = {'symbol': '$SPX', 'status': 'SUCCESS', 'underlyingPrice': 5800.0,
+             'callExpDateMap': {f'2026-11-{day:02d}:{day}': {f'{strike}.0': [contract]
+                                                            for strike in range(5000, 6600, 5)}
+                                for day in range(1, 21)}}
+    transactions = [{'activityId': 90000000 + i, 'time': '2026-10-01T14:30:00+0000',
+                     'accountNumber': '12345678', 'type': 'TRADE', 'status': 'VALID',
+                     'subAccount': 'CASH', 'tradeDate': '2026-10-01T14:30:00+0000',
+                     'netAmount': -1523.5,
+                     'transferItems': [{'instrument': {'assetType': 'EQUITY', 'symbol': 'SPY',
+                                                       'cusip': '78462F103'},
+                                        'amount': 3.0, 'cost': -1523.5, 'price': 507.83,
+                                        'positionEffect': 'OPENING'}]}
+                    for i in range(5000)]
+    candles = {'symbol': 'SPY', 'empty': False,
+               'candles': [{'open': 500.0 + i % 7, 'high': 501.0, 'low': 499.5, 'close': 500.5,
+                            'volume': 12000 + i, 'datetime': 1760000000000 + i * 60000}
+                           for i in range(100000)]}
+    return {'option_chain': json.dumps(chain).encode(),
+            'transactions': json.dumps(transactions).encode(),
+            'price_history': json.dumps(candles).encode()}
+
+
+if __name__ == '__main__':
+    # python schwab_codec.py [recorded_response.json ...]
+    files = sys.argv[1:]
+    if files:
+        samples = {}
+        for path in files:
+            with open(path, 'rb') as file:
+                samples[os.path.basename(path)] = file.read()
+    else:
+        samples = _sample_payloads()
+
+    for sample_name, timings in benchmark(samples).items():
+        print(f'{sample_name} ({len(samples[sample_name]) / 1e6:.1f} MB)')
+        for codec_name, timing in timings.items():
+            print(f"    {codec_name:8} loads {timing['loads_ms']:8.1f} ms "
+                  f"(x{timing['loads_speedup']:.1f})   dumps {timing['dumps_ms']:8.1f} ms "
+                  f"(x{timing['dumps_speedup']:.1f})")
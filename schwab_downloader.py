@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 16:02:41 2026
+
+@author: LC
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import numpy as np
+from schwab_enum import FrequencyType, Frequency, FrequencyCombination1, OutputFormat
+from schwab_candles import CANDLE_DTYPE
+
+
+if not logging.root.handlers:
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.info("Logging activated at Downloader")
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = '_checkpoint.jsonl'
+
+
+class HistoryDownloader:
+    '''
+    Bulk price history downloader.
+
+    Downloads the same date range for many symbols, max_workers at a time, through
+    SchwabApi.get_pricehistory_dates (so the api rate limiter, retry policy and
+    history store apply). Each finished symbol is written immediately to
+
+        {directory}/{symbol}.npy    (structured array, schwab_candles.CANDLE_DTYPE)
+
+    and recorded in a checkpoint file in the same directory. Running the same job
+    again skips the symbols already downloaded, so a crashed run resumes where it
+    stopped. Failed symbols are retried on the next run.
+
+    Attributes:
+        api: SchwabApi (download) or AsyncSchwabApi (download_async).
+        directory (str): Output directory of the job.
+        max_workers (int): Symbols downloaded at the same time (default: 4).
+        progress (callable): Optional progress(record, completed, total) callback.
+
+    EXAMPLE:
+    downloader = HistoryDownloader(api, './history/minute_1', max_workers = 8)
+    report = downloader.download(symbols, FrequencyType.DAY_MINUTE, Frequency.MINUTE_1,
+                                 start_date = datetime.now() - timedelta(days = 10),
+                                 end_date = datetime.now())
+    report['failed'], report['seconds']['p95']
+
+    CLI:
+    python schwab_downloader.py --config Schwab_config.json --symbols-file symbols.txt
+                                --frequency DAY_1_MINUTE --start 2026-01-01 --workers 8
+    '''
+
+    def __init__(self, api, directory: str, max_workers: int = 4,
+                 progress: Optional[Callable[[Dict[str, Any], int, int], None]] = None):
+
+        self.api = api
+        self.directory = directory
+        self.max_workers = max(1, max_workers)
+        self.progress = progress
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return f'<HistoryDownloader {self.directory} workers={self.max_workers}>'
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.directory, CHECKPOINT_FILE)
+
+    def symbol_path(self, symbol: str) -> str:
+        '''
+        Returns the output file of a symbol.
+        '''
+        name = ''.join(char if char.isalnum() or char in '._-' else '_' for char in symbol)
+        return os.path.join(self.directory, name + '.npy')
+
+    #### Checkpoint
+
+    def load_checkpoint(self, job: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        '''
+        Returns the last record of every symbol of a previous run of the same job.
+        A checkpoint of a different job is discarded.
+        '''
+        records = {}
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as file:
+                lines = file.read().splitlines()
+        except FileNotFoundError:
+            lines = []
+
+        if lines:
+            try:
+                header = json.loads(lines[0])
+            except ValueError:
+                header = {}
+            if header.get('job') != job:
+                logger.warning("Checkpoint %s belongs to a different job, starting over",
+                               self.checkpoint_path)
+                lines = []
+
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Last line cut by a crash
+                continue
+            records[record['symbol']] = record
+
+        if not lines:
+            with open(self.checkpoint_path, 'w', encoding='utf-8') as file:
+                file.write(json.dumps({'job': job}) + '\n')
+        return records
+
+    def _save_record(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            with open(self.checkpoint_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(record) + '\n')
+
+    def _save_candles(self, symbol: str, candles: np.ndarray) -> None:
+        path = self.symbol_path(symbol)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp.npy'
+        np.save(tmp_path, candles.view(CANDLE_DTYPE))
+        os.replace(tmp_path, path)
+
+    #### Download
+
+    @staticmethod
+    def _job(frequency_type: FrequencyType, frequency: Frequency, start_date: datetime,
+             end_date: datetime, need_extendedhours_data: bool) -> Dict[str, Any]:
+        return {'frequency_type': frequency_type.value,
+                'frequency': frequency.value,
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'extended_hours': need_extendedhours_data}
+
+    def _pending(self, symbols: List[str], job: Dict[str, Any], resume: bool) -> List[str]:
+        if not resume:
+            try:
+                os.remove(self.checkpoint_path)
+            except FileNotFoundError:
+                pass
+        done = {symbol for symbol, record in self.load_checkpoint(job).items()
+                if record['status'] != 'error'}
+        pending = [symbol for symbol in symbols if symbol not in done]
+        if len(pending) < len(symbols):
+            logger.info("Resuming: %d of %d symbols already downloaded",
+                        len(symbols) - len(pending), len(symbols))
+        return pending
+
+    def _finish(self, symbol: str, started: float, response: Any,
+                error: Optional[BaseException] = None) -> Dict[str, Any]:
+        '''
+        Stores a symbol result and returns its record.
+        '''
+        record = {'symbol': symbol, 'status': 'ok', 'candles': 0, 'seconds': 0.0, 'error': None}
+        if error is None and response is None:
+            error = 'Request failed'
+        if error is None:
+            try:
+                self._save_candles(symbol, response)
+                record['candles'] = len(response)
+                if not len(response):
+                    record['status'] = 'empty'
+            except OSError as save_error:
+                error = save_error
+        if error is not None:
+            record['status'] = 'error'
+            record['error'] = error if isinstance(error, str) else repr(error)
+        record['seconds'] = round(time.perf_counter() - started, 4)
+        self._save_record(record)
+        return record
+
+    def download(self, symbols: Iterable[str], frequency_type: FrequencyType,
+                 frequency: Frequency, start_date: datetime, end_date: datetime,
+                 need_extendedhours_data: bool = True, resume: bool = True) -> Dict[str, Any]:
+        '''
+        Downloads price history for all symbols with a thread pool (SchwabApi).
+
+        NAME: resume
+        DESC: Skip the symbols already downloaded by a previous run of the same job.
+              False downloads everything again.
+        TYPE: bool
+
+        RETURNS:
+        Report dict, see report().
+        '''
+        symbols = list(dict.fromkeys(symbols))
+        job = self._job(frequency_type, frequency, start_date, end_date,
+                        need_extendedhours_data)
+        pending = self._pending(symbols, job, resume)
+        request_args = {'frequency_type': frequency_type, 'frequency': frequency,
+                        'start_date': start_date, 'end_date': end_date,
+                        'need_extendedhours_data': need_extendedhours_data,
+                        'output_format': OutputFormat.NUMPY}
+        records = []
+        started = time.perf_counter()
+
+        def fetch(symbol):
+            symbol_started = time.perf_counter()
+            try:
+                response = self.api.get_pricehistory_dates(symbol, **request_args)
+            except Exception as error:
+                return self._finish(symbol, symbol_started, None, error)
+            return self._finish(symbol, symbol_started, response)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for record in executor.map(fetch, pending):
+                records.append(record)
+                self._report_progress(record, len(records), len(pending))
+
+        return self.report(records, time.perf_counter() - started, len(symbols) - len(pending))
+
+    async def download_async(self, symbols: Iterable[str], frequency_type: FrequencyType,
+                             frequency: Frequency, start_date: datetime, end_date: datetime,
+                             need_extendedhours_data: bool = True,
+                             resume: bool = True) -> Dict[str, Any]:
+        '''
+        Same as download, for AsyncSchwabApi. Up to max_workers requests are in
+        flight on the event loop, files are written in the default executor.
+        '''
+        symbols = list(dict.fromkeys(symbols))
+        job = self._job(frequency_type, frequency, start_date, end_date,
+                        need_extendedhours_data)
+        pending = self._pending(symbols, job, resume)
+        request_args = {'frequency_type': frequency_type, 'frequency': frequency,
+                        'start_date': start_date, 'end_date': end_date,
+                        'need_extendedhours_data': need_extendedhours_data,
+                        'output_format': OutputFormat.NUMPY}
+        semaphore = asyncio.Semaphore(self.max_workers)
+        loop = asyncio.get_running_loop()
+        records = []
+        started = time.perf_counter()
+
+        async def fetch(symbol):
+            async with semaphore:
+                symbol_started = time.perf_counter()
+                try:
+                    response = await self.api.get_pricehistory_dates(symbol, **request_args)
+                except Exception as error:
+                    response, failure = None, error
+                else:
+                    failure = None
+            record = await loop.run_in_executor(None, self._finish, symbol, symbol_started,
+                                                response, failure)
+            records.append(record)
+            self._report_progress(record, len(records), len(pending))
+
+        await asyncio.gather(*(fetch(symbol) for symbol in pending))
+        return self.report(records, time.perf_counter() - started, len(symbols) - len(pending))
+
+    def _report_progress(self, record: Dict[str, Any], completed: int, total: int) -> None:
+        if record['status'] == 'error':
+            logger.warning("%s failed after %.2f s: %s", record['symbol'], record['seconds'],
+                           record['error'])
+        if self.progress is not None:
+            self.progress(record, completed, total)
+        elif completed == total or completed % max(1, total // 20) == 0:
+            logger.info("Downloaded %d/%d symbols", completed, total)
+
+    @staticmethod
+    def report(records: List[Dict[str, Any]], elapsed: float,
+               skipped: Optional[int] = None) -> Dict[str, Any]:
+        '''
+        Summarizes the symbol records of a run.
+
+        RETURNS:
+        {'symbols': int, 'ok': int, 'empty': int, 'failed': int, 'skipped': int,
+         'candles': int, 'elapsed': float, 'symbols_per_second': float,
+         'seconds': {'mean', 'p50', 'p95', 'max'},   # per symbol
+         'errors': {symbol: error}, 'records': [...]}
+        '''
+        seconds = np.array([record['seconds'] for record in records], dtype='f8')
+        statuses = [record['status'] for record in records]
+        timing = ({'mean': float(seconds.mean()),
+                   'p50': float(np.percentile(seconds, 50)),
+                   'p95': float(np.percentile(seconds, 95)),
+                   'max': float(seconds.max())} if len(seconds)
+                  else {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0})
+        return {'symbols': len(records),
+                'ok': statuses.count('ok'),
+                'empty': statuses.count('empty'),
+                'failed': statuses.count('error'),
+                'skipped': skipped or 0,
+                'candles': sum(record['candles'] for record in records),
+                'elapsed': elapsed,
+                'symbols_per_second': len(records) / elapsed if elapsed else 0.0,
+                'seconds': timing,
+                'errors': {record['symbol']: record['error'] for record in records
+                           if record['status'] == 'error'},
+                'records': records}
+
+
+#### CLI
+
+def _parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def _read_symbols(args) -> List[str]:
+    '''
+    Symbols from --symbols and --symbols-file, upper-cased alike so 'spy' and 'SPY'
+    share the checkpoint entry and history store partition.
+    '''
+    symbols = list(args.symbols or [])
+    if args.symbols_file:
+        with open(args.symbols_file, 'r', encoding='utf-8') as file:
+            symbols += [line for line in file if not line.lstrip().startswith('#')]
+    return [symbol.strip().upper() for symbol in symbols if symbol.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    '''
+    Command line entry point, see "python schwab_downloader.py --help".
+    '''
+    parser = argparse.ArgumentParser(description='Bulk Schwab price history downloader')
+    parser.add_argument('--config', required=True, help='Schwab config JSON file')
+    parser.add_argument('--symbols', nargs='*', help='Symbols to download')
+    parser.add_argument('--symbols-file', help='File with one symbol per line')
+    parser.add_argument('--frequency', default='DAY_1_MINUTE',
+                        choices=list(FrequencyCombination1.__members__),
+                        help='Frequency (default: DAY_1_MINUTE)')
+    parser.add_argument('--start', type=_parse_date, required=True,
+                        help='Start date, ISO format (2026-01-02 or 2026-01-02T09:30)')
+    parser.add_argument('--end', type=_parse_date,
+                        default=datetime.combine(datetime.now().date(), datetime.max.time()),
+                        help='End date, ISO format (default: end of today)')
+    parser.add_argument('--output', default='./schwab_downloads', help='Output root directory')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent symbols (default: 4)')
+    parser.add_argument('--regular-hours', action='store_true',
+                        help='Regular market hours only')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Use AsyncSchwabApi instead of a thread pool')
+    args = parser.parse_args(argv)
+
+    symbols = _read_symbols(args)
+    if not symbols:
+        parser.error('no symbols, use --symbols or --symbols-file')
+
+    with open(args.config, 'r', encoding='utf-8') as file:
+        config = json.load(file)
+
+    frequency_type, frequency = FrequencyCombination1[args.frequency].value
+    directory = os.path.join(args.output, f'{frequency_type.value}_{frequency.value}'
+                             + ('' if args.regular_hours else '_ext'))
+    download_args = (symbols, frequency_type, frequency, args.start, args.end,
+                     not args.regular_hours, not args.restart)
+
+    if args.use_async:
+        from schwab_async_api import AsyncSchwabApi
+
+        async def run():
+            api = await AsyncSchwabApi.create(config)
+            async with api:
+                return await HistoryDownloader(api, directory,
+                                               args.workers).download_async(*download_args)
+
+        report = asyncio.run(run())
+    else:
+        from schwab_api import SchwabApi
+        with SchwabApi(config) as api:
+            report = HistoryDownloader(api, directory, args.workers).download(*download_args)
+
+    report.pop('records')
+    print(json.dumps(report, indent=2))
+    return 1 if report['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,6 +13,16 @@ class BaseUrl(Enum):
     MARKET = 'https://api.schwabapi.com/marketdata/v1/'
     TRADER = 'https://api.schwabapi.com/trader/v1/'
 
+class Priority(Enum):  ## Rate limiter lanes
+    HIGH = 0    # orders, jump ahead of queued requests
+    NORMAL = 1  #Default
+
+class OutputFormat(Enum):  ## Decoding of large responses
+    JSON = 'json'  #Default, API response as is
+    NUMPY = 'numpy'
+    PANDAS = 'pandas'
+    MODEL = 'model'  # schwab_models slot based objects
+
 #### ACCOUNT DATA
 #### Orders
 
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 14:02:18 2026
+
+@author: LC
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from schwab_candles import CANDLE_DTYPE, candles_to_array, array_to_candles
+
+
+if not logging.root.handlers:
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.info("Logging activated at History Store")
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = 86400000
+
+
+class HistoryStore:
+    '''
+    Local candle store used behind SchwabApi.get_pricehistory_dates.
+
+    Candles are kept in one NumPy file per symbol, partitioned by frequency and
+    extended hours flag:
+
+        {directory}/{frequency_type}_{frequency}[_ext]/{symbol}.npy
+
+    A JSON file next to it records which date ranges were already downloaded, so a
+    request only fetches the ranges that are missing (weekends and holidays included)
+    and the cached part is read with a memory map.
+
+    Ranges ending less than settle_ms before now are not marked as covered, so the
+    most recent (still changing) candles are downloaded again on the next request.
+
+    Attributes:
+        directory (str): Store root directory (default: './schwab_history').
+        settle_ms (int): Milliseconds before now considered final (default: 1 day).
+
+    EXAMPLE:
+    api = SchwabApi(config, history_store = HistoryStore('./history'))
+    api.get_pricehistory_dates('SPY', FrequencyType.DAY_MINUTE, Frequency.MINUTE_1,
+                               end_date = datetime.now(),
+                               start_date = datetime.now() - timedelta(days = 365))
+    '''
+
+    def __init__(self, directory: str = './schwab_history', settle_ms: int = DAY_MS):
+
+        self.directory = directory
+        self.settle_ms = settle_ms
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return f'<HistoryStore {self.directory}>'
+
+    def partition(self, symbol: str, frequency_type: str, frequency: int,
+                  extended_hours: bool) -> str:
+        '''
+        Returns the file path (without extension) for a symbol and frequency.
+        '''
+        folder = f'{frequency_type}_{frequency}' + ('_ext' if extended_hours else '')
+        name = re.sub(r'[^A-Za-z0-9._-]', '_', symbol)
+        os.makedirs(os.path.join(self.directory, folder), exist_ok=True)
+        return os.path.join(self.directory, folder, name)
+
+    def _lock(self, partition: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(partition, threading.Lock())
+
+    @staticmethod
+    def _load_coverage(partition: str) -> List[List[int]]:
+        try:
+            with open(partition + '.json', 'r', encoding='utf-8') as file:
+                return json.load(file)['coverage']
+        except FileNotFoundError:
+            return []
+
+    def coverage(self, partition: str) -> List[List[int]]:
+        '''
+        Returns the downloaded [start_ms, end_ms] ranges of a partition.
+        '''
+        with self._lock(partition):
+            return self._load_coverage(partition)
+
+    def missing_ranges(self, partition: str, start_ms: int,
+                       end_ms: int) -> List[Tuple[int, int]]:
+        '''
+        Returns the sub ranges of [start_ms, end_ms] that are not stored yet.
+        '''
+        missing = []
+        cursor = start_ms
+        for covered_start, covered_end in self.coverage(partition):
+            if covered_end < cursor:
+                continue
+            if covered_start > end_ms:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, covered_start - 1))
+            cursor = max(cursor, covered_end + 1)
+        if cursor <= end_ms:
+            missing.append((cursor, end_ms))
+        return missing
+
+    def read(self, partition: str, start_ms: int, end_ms: int) -> np.ndarray:
+        '''
+        Returns the stored candles between start_ms and end_ms (both included).
+        '''
+        with self._lock(partition):
+            try:
+                candles = np.load(partition + '.npy', mmap_mode='r')
+            except FileNotFoundError:
+                return np.empty(0, dtype=CANDLE_DTYPE)
+            first = np.searchsorted(candles['datetime'], start_ms, side='left')
+            last = np.searchsorted(candles['datetime'], end_ms, side='right')
+            return np.array(candles[first:last])
+
+    def read_candles(self, partition: str, start_ms: int, end_ms: int) -> List[Dict[str, Any]]:
+        '''
+        Same as read, in the API 'candles' list format.
+        '''
+        return array_to_candles(self.read(partition, start_ms, end_ms))
+
+    def add(self, partition: str, start_ms: int, end_ms: int, candles) -> None:
+        '''
+        Merges downloaded candles for [start_ms, end_ms] into the store and marks the
+        range as covered. Newer candles replace stored ones with the same datetime.
+
+        Args:
+            candles: API 'candles' list or structured candle array.
+        '''
+        if not isinstance(candles, np.ndarray):
+            candles = candles_to_array(candles)
+        settled_ms = int(time.time() * 1000) - self.settle_ms
+        with self._lock(partition):
+            try:
+                stored = np.load(partition + '.npy')
+            except FileNotFoundError:
+                stored = np.empty(0, dtype=CANDLE_DTYPE)
+
+            merged = np.concatenate([candles.view(CANDLE_DTYPE), stored])
+            _, index = np.unique(merged['datetime'], return_index=True)
+            merged = merged[index]
+
+            tmp_path = f'{partition}.{os.getpid()}.{threading.get_ident()}.tmp.npy'
+            np.save(tmp_path, merged)
+            os.replace(tmp_path, partition + '.npy')
+
+            end_ms = min(end_ms, settled_ms)
+            if start_ms <= end_ms:
+                coverage = self._load_coverage(partition)
+                coverage.append([start_ms, end_ms])
+                self._save_coverage(partition, self._merge_ranges(coverage))
+
+    @staticmethod
+    def _merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return merged
+
+    @staticmethod
+    def _save_coverage(partition: str, coverage: List[List[int]]) -> None:
+        tmp_path = f'{partition}.{os.getpid()}.{threading.get_ident()}.tmp.json'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'coverage': coverage}, file)
+        os.replace(tmp_path, partition + '.json')
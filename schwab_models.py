@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 18:47:03 2026
+
+@author: LC
+"""
+
+from typing import Any, Dict, List, Optional, Union
+
+
+class SchwabModel:
+    '''
+    Base of the slot based response models.
+
+    Attributes are named as the API keys (keys that are not identifiers are renamed,
+    see _renamed). A field missing from the response reads as None and is left out
+    by to_dict. Unknown keys are kept in _extra, so to_dict() returns exactly the
+    dict the model was built from.
+
+    Subclasses define:
+        __slots__: The API fields.
+        _renamed (dict): {attribute: API key}.
+        _nested (dict): {attribute: model}, dict values (or each item of list values)
+                        converted to that model.
+    '''
+
+    __slots__ = ('_extra',)
+    _renamed = {}
+    _nested = {}
+    _fields = ()
+    _names = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple((name, cls._renamed.get(name, name), cls.__dict__[name])
+                            for name in cls.__slots__)
+        cls._names = {key: name for name, key, _ in cls._fields}
+
+    def __init__(self, **fields):
+
+        self._extra = None
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SchwabModel':
+        '''
+        Builds the model from an API response dict.
+        '''
+        model = cls.__new__(cls)
+        extra = None
+        names = cls._names
+        nested = cls._nested
+        for key, value in data.items():
+            name = names.get(key)
+            if name is None:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+                continue
+            nested_model = nested.get(name)
+            if nested_model is not None:
+                if isinstance(value, list):
+                    value = [nested_model.from_dict(item) for item in value]
+                elif isinstance(value, dict):
+                    value = nested_model.from_dict(value)
+            setattr(model, name, value)
+        model._extra = extra
+        return model
+
+    def to_dict(self) -> Dict[str, Any]:
+        '''
+        Returns the API dict the model represents.
+        '''
+        data = {}
+        for name, key, slot in self._fields:
+            try:
+                value = slot.__get__(self)
+            except AttributeError:
+                continue
+            if isinstance(value, SchwabModel):
+                value = value.to_dict()
+            elif isinstance(value, list) and name in self._nested:
+                value = [item.to_dict() if isinstance(item, SchwabModel) else item
+                         for item in value]
+            data[key] = value
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for unset slots and unknown attributes
+        if name in type(self).__slots__:
+            return None
+        raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+
+    def __reduce__(self):
+        # Pickle and copy through the API dict, unset slots must stay unset
+        return type(self).from_dict, (self.to_dict(),)
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        shown = []
+        for name, _, slot in self._fields:
+            try:
+                value = slot.__get__(self)
+            except AttributeError:
+                continue
+            if not isinstance(value, (dict, list, SchwabModel)):
+                shown.append(f'{name}={value!r}')
+            if len(shown) == 4:
+                break
+        return f'{type(self).__name__}({", ".join(shown)})'
+
+
+#### Market Data
+
+class Candle(SchwabModel):
+
+    __slots__ = ('open', 'high', 'low', 'close', 'volume', 'datetime')
+
+
+class QuoteData(SchwabModel):
+    '''
+    'quote' section of a Quote.
+    '''
+
+    __slots__ = ('week52High', 'week52Low', 'askMICId', 'askPrice', 'askSize', 'askTime',
+                 'bidMICId', 'bidPrice', 'bidSize', 'bidTime', 'closePrice', 'highPrice',
+                 'lastMICId', 'lastPrice', 'lastSize', 'lowPrice', 'mark', 'markChange',
+                 'markPercentChange', 'netChange', 'netPercentChange', 'openPrice',
+                 'postMarketChange', 'postMarketPercentChange', 'quoteTime', 'securityStatus',
+                 'totalVolume', 'tradeTime', 'volatility', 'nAV', 'moneyIntrinsicValue',
+                 'delta', 'gamma', 'theta', 'vega', 'rho', 'openInterest', 'timeValue',
+                 'impliedYield', 'indAskPrice', 'indBidPrice', 'indQuoteTime')
+    _renamed = {'week52High': '52WeekHigh', 'week52Low': '52WeekLow'}
+
+
+class Quote(SchwabModel):
+
+    __slots__ = ('assetMainType', 'assetSubType', 'quoteType', 'realtime', 'ssid', 'symbol',
+                 'extended', 'fundamental', 'quote', 'reference', 'regular')
+    _nested = {'quote': QuoteData}
+
+
+class OptionContract(SchwabModel):
+
+    __slots__ = ('putCall', 'symbol', 'description', 'exchangeName', 'bid', 'ask', 'last',
+                 'mark', 'bidSize', 'askSize', 'bidAskSize', 'lastSize', 'highPrice',
+                 'lowPrice', 'openPrice', 'closePrice', 'totalVolume', 'tradeDate',
+                 'tradeTimeInLong', 'quoteTimeInLong', 'netChange', 'volatility', 'delta',
+                 'gamma', 'theta', 'vega', 'rho', 'openInterest', 'timeValue',
+                 'theoreticalOptionValue', 'theoreticalVolatility', 'optionDeliverablesList',
+                 'strikePrice', 'expirationDate', 'daysToExpiration', 'expirationType',
+                 'lastTradingDay', 'multiplier', 'settlementType', 'deliverableNote',
+                 'percentChange', 'markChange', 'markPercentChange', 'intrinsicValue',
+                 'extrinsicValue', 'optionRoot', 'exerciseType', 'high52Week', 'low52Week',
+                 'nonStandard', 'pennyPilot', 'inTheMoney', 'mini')
+
+
+#### Account Data
+
+class OrderLeg(SchwabModel):
+
+    __slots__ = ('orderLegType', 'legId', 'instrument', 'instruction', 'positionEffect',
+                 'quantity', 'quantityType', 'divCapGains', 'toSymbol')
+
+
+class Order(SchwabModel):
+
+    __slots__ = ('session', 'duration', 'orderType', 'cancelTime', 'complexOrderStrategyType',
+                 'quantity', 'filledQuantity', 'remainingQuantity', 'requestedDestination',
+                 'destinationLinkName', 'releaseTime', 'stopPrice', 'stopPriceLinkBasis',
+                 'stopPriceLinkType', 'stopPriceOffset', 'stopType', 'priceLinkBasis',
+                 'priceLinkType', 'price', 'taxLotMethod', 'orderLegCollection',
+                 'activationPrice', 'specialInstruction', 'orderStrategyType', 'orderId',
+                 'cancelable', 'editable', 'status', 'enteredTime', 'closeTime', 'tag',
+                 'accountNumber', 'orderActivityCollection', 'replacingOrderCollection',
+                 'childOrderStrategies', 'statusDescription')
+
+    @property
+    def symbols(self) -> List[str]:
+        return [leg.instrument.get('symbol') for leg in self.orderLegCollection or []
+                if leg.instrument]
+
+
+class Position(SchwabModel):
+
+    __slots__ = ('shortQuantity', 'averagePrice', 'currentDayProfitLoss',
+                 'currentDayProfitLossPercentage', 'longQuantity', 'settledLongQuantity',
+                 'settledShortQuantity', 'agedQuantity', 'instrument', 'marketValue',
+                 'maintenanceRequirement', 'averageLongPrice', 'averageShortPrice',
+                 'taxLotAverageLongPrice', 'taxLotAverageShortPrice', 'longOpenProfitLoss',
+                 'shortOpenProfitLoss', 'previousSessionLongQuantity',
+                 'previousSessionShortQuantity', 'currentDayCost')
+
+    @property
+    def symbol(self) -> Optional[str]:
+        return (self.instrument or {}).get('symbol')
+
+    @property
+    def quantity(self) -> float:
+        return (self.longQuantity or 0) - (self.shortQuantity or 0)
+
+
+class SecuritiesAccount(SchwabModel):
+
+    __slots__ = ('type', 'accountNumber', 'roundTrips', 'isDayTrader',
+                 'isClosingOnlyRestricted', 'pfcbFlag', 'positions', 'orderStrategies',
+                 'initialBalances', 'currentBalances', 'projectedBalances')
+    _nested = {'positions': Position, 'orderStrategies': Order}
+
+
+class Account(SchwabModel):
+
+    __slots__ = ('securitiesAccount', 'aggregatedBalance')
+    _nested = {'securitiesAccount': SecuritiesAccount}
+
+
+class Transaction(SchwabModel):
+
+    __slots__ = ('activityId', 'time', 'user', 'description', 'accountNumber', 'type',
+                 'status', 'subAccount', 'tradeDate', 'settlementDate', 'positionId',
+                 'orderId', 'netAmount', 'activityType', 'transferItems')
+
+
+# Self reference, set after the class definition
+Order._nested = {'orderLegCollection': OrderLeg, 'childOrderStrategies': Order}
+
+
+def to_models(response: Union[Dict[str, Any], List[Dict[str, Any]], None],
+              model: type) -> Any:
+    '''
+    Converts a response dict, or each item of a response list, to model.
+    '''
+    if isinstance(response, list):
+        return [model.from_dict(item) if isinstance(item, dict) else item for item in response]
+    if isinstance(response, dict):
+        return model.from_dict(response)
+    return response
+
+
+def quotes_to_models(response: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    '''
+    Converts a get_quotes response to {symbol: Quote}. The 'errors' entry is kept
+    as returned.
+    '''
+    if not isinstance(response, dict):
+        return response
+    return {symbol: Quote.from_dict(quote) if symbol != 'errors' else quote
+            for symbol, quote in response.items()}
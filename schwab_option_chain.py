@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 16:48:27 2026
+
+@author: LC
+"""
+
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+from schwab_enum import OutputFormat
+from schwab_models import OptionContract, to_models
+
+
+# Contract columns (API key, dtype, value when missing). The strings are fixed width,
+# so no Python object is kept per contract.
+OPTION_COLUMNS = (('putCall', 'U4', ''),
+                  ('symbol', 'U32', ''),
+                  ('expirationDate', 'M8[ms]', 'NaT'),
+                  ('daysToExpiration', 'i4', 0),
+                  ('strikePrice', 'f8', np.nan),
+                  ('bid', 'f8', np.nan),
+                  ('ask', 'f8', np.nan),
+                  ('last', 'f8', np.nan),
+                  ('mark', 'f8', np.nan),
+                  ('bidSize', 'i8', 0),
+                  ('askSize', 'i8', 0),
+                  ('lastSize', 'i8', 0),
+                  ('highPrice', 'f8', np.nan),
+                  ('lowPrice', 'f8', np.nan),
+                  ('openPrice', 'f8', np.nan),
+                  ('closePrice', 'f8', np.nan),
+                  ('netChange', 'f8', np.nan),
+                  ('percentChange', 'f8', np.nan),
+                  ('totalVolume', 'i8', 0),
+                  ('openInterest', 'i8', 0),
+                  ('volatility', 'f8', np.nan),
+                  ('delta', 'f8', np.nan),
+                  ('gamma', 'f8', np.nan),
+                  ('theta', 'f8', np.nan),
+                  ('vega', 'f8', np.nan),
+                  ('rho', 'f8', np.nan),
+                  ('timeValue', 'f8', np.nan),
+                  ('theoreticalOptionValue', 'f8', np.nan),
+                  ('theoreticalVolatility', 'f8', np.nan),
+                  ('intrinsicValue', 'f8', np.nan),
+                  ('extrinsicValue', 'f8', np.nan),
+                  ('multiplier', 'f8', np.nan),
+                  ('quoteTimeInLong', 'i8', 0),
+                  ('tradeTimeInLong', 'i8', 0),
+                  ('inTheMoney', '?', False),
+                  ('nonStandard', '?', False),
+                  ('mini', '?', False))
+
+# Greeks the API reports as -999.0 (or "NaN") when they can not be calculated
+MISSING_GREEK = -999.0
+_GREEKS = ('volatility', 'delta', 'gamma', 'theta', 'vega', 'rho')
+
+_AGGREGATIONS = ('sum', 'mean', 'min', 'max', 'count', 'first', 'last')
+
+_get_columns = itemgetter(*(name for name, _, _ in OPTION_COLUMNS))
+
+# Columns compared by OptionChain.diff (quote, size, volume and greeks, not timestamps)
+DIFF_COLUMNS = ('bid', 'ask', 'last', 'mark', 'bidSize', 'askSize', 'lastSize',
+                'totalVolume', 'openInterest', 'volatility', 'delta', 'gamma', 'theta',
+                'vega', 'rho', 'theoreticalOptionValue', 'inTheMoney')
+
+
+def _number(value: Any, default: Any) -> Any:
+    if value is None:
+        return default
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return default
+    return value
+
+
+class OptionChain:
+    '''
+    Columnar option chain.
+
+    The nested callExpDateMap/putExpDateMap -> expiration -> strike -> [contract]
+    response is flattened once into one NumPy array per contract field (OPTION_COLUMNS,
+    named as in the API). Rows are contracts. Missing greeks (-999.0) become NaN.
+
+    Indexing with a column name returns the column, indexing with a boolean mask,
+    slice or index array returns a new (filtered) OptionChain:
+
+        chain = api.get_option_chain(params, output_format = OutputFormat.NUMPY)
+        calls = chain[(chain['putCall'] == 'CALL') & (abs(chain['delta'] - 0.3) < 0.05)]
+        chain.where(openInterest = (1000, None), daysToExpiration = (0, 45))
+        chain.groupby('expirationDate', openInterest = 'sum', volatility = 'mean')
+
+    Attributes:
+        symbol (str): Underlying symbol.
+        underlying_price (float): Underlying price of the response.
+        info (dict): The other top level fields of the response (status, strategy,
+                     volatility, underlying...).
+        columns (dict): {column name: ndarray}.
+    '''
+
+    __slots__ = ('symbol', 'underlying_price', 'info', 'columns')
+
+    def __init__(self, columns: Dict[str, np.ndarray], symbol: Optional[str] = None,
+                 underlying_price: float = np.nan, info: Optional[Dict[str, Any]] = None):
+
+        self.columns = columns
+        self.symbol = symbol
+        self.underlying_price = underlying_price
+        self.info = info if info is not None else {}
+
+    @classmethod
+    def from_response(cls, response: Optional[Dict[str, Any]]) -> Optional['OptionChain']:
+        '''
+        Builds an OptionChain from a get_option_chain JSON response.
+        '''
+        if response is None:
+            return None
+
+        contracts = [contract
+                     for key in ('callExpDateMap', 'putExpDateMap')
+                     for strikes in (response.get(key) or {}).values()
+                     for strike_contracts in strikes.values()
+                     for contract in strike_contracts]
+        return cls(cls._flatten(contracts),
+                   symbol=response.get('symbol'),
+                   underlying_price=_number(response.get('underlyingPrice'), np.nan),
+                   info={key: value for key, value in response.items()
+                         if key not in ('callExpDateMap', 'putExpDateMap')})
+
+    @staticmethod
+    def _flatten(contracts: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        try:
+            if not contracts:
+                raise KeyError
+            # Fast path, every contract has every field: one transpose, one array per column
+            columns = {name: np.array([value[:23] for value in column] if dtype == 'M8[ms]'
+                                      else column, dtype=dtype)
+                       for (name, dtype, _), column in zip(OPTION_COLUMNS,
+                                                           zip(*map(_get_columns, contracts)))}
+        except (KeyError, TypeError, ValueError):
+            columns = {name: OptionChain._column(contracts, name, dtype, default)
+                       for name, dtype, default in OPTION_COLUMNS}
+        for name in _GREEKS:
+            columns[name][columns[name] == MISSING_GREEK] = np.nan
+        return columns
+
+    @staticmethod
+    def _column(contracts: List[Dict[str, Any]], name: str, dtype: str,
+                default: Any) -> np.ndarray:
+        if dtype == 'M8[ms]':
+            # '2026-10-17T20:00:00.000+00:00' -> UTC datetime64
+            return np.array([(contract.get(name) or default)[:23] for contract in contracts],
+                            dtype=dtype)
+        if dtype.startswith('U'):
+            return np.array([contract.get(name) or default for contract in contracts],
+                            dtype=dtype)
+        return np.fromiter((_number(contract.get(name), default) for contract in contracts),
+                           dtype=dtype, count=len(contracts))
+
+    def __len__(self) -> int:
+        return len(self.columns['symbol'])
+
+    def __repr__(self) -> str:
+        return f'<OptionChain {self.symbol} contracts={len(self)}>'
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.columns)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, key: Union[str, slice, np.ndarray, List[int]]):
+        if isinstance(key, str):
+            return self.columns[key]
+        return self._take(key)
+
+    def _take(self, index) -> 'OptionChain':
+        return OptionChain({name: column[index] for name, column in self.columns.items()},
+                           self.symbol, self.underlying_price, self.info)
+
+    @property
+    def calls(self) -> 'OptionChain':
+        return self._take(self.columns['putCall'] == 'CALL')
+
+    @property
+    def puts(self) -> 'OptionChain':
+        return self._take(self.columns['putCall'] == 'PUT')
+
+    @property
+    def spread(self) -> np.ndarray:
+        return self.columns['ask'] - self.columns['bid']
+
+    @property
+    def nbytes(self) -> int:
+        '''
+        Memory used by the columns.
+        '''
+        return sum(column.nbytes for column in self.columns.values())
+
+    def mask(self, **conditions) -> np.ndarray:
+        '''
+        Boolean mask of the contracts meeting all conditions.
+
+        column = value             equal
+        column = (low, high)       low <= value <= high, None for an open end
+        column = [value, ...]      any of the values
+        '''
+        mask = np.ones(len(self), dtype=bool)
+        for name, condition in conditions.items():
+            column = self.columns[name]
+            if isinstance(condition, tuple):
+                low, high = condition
+                if low is not None:
+                    mask &= column >= low
+                if high is not None:
+                    mask &= column <= high
+            elif isinstance(condition, (list, set, frozenset)):
+                mask &= np.isin(column, list(condition))
+            else:
+                mask &= column == condition
+        return mask
+
+    def where(self, **conditions) -> 'OptionChain':
+        '''
+        Returns the contracts meeting all conditions, see mask().
+
+        EXAMPLE:
+        chain.where(putCall = 'PUT', delta = (-0.35, -0.25), openInterest = (500, None))
+        '''
+        return self._take(self.mask(**conditions))
+
+    def sort(self, *names: str, descending: bool = False) -> 'OptionChain':
+        '''
+        Returns the chain sorted by one or more columns (first name is the primary key).
+        '''
+        order = np.lexsort([self.columns[name] for name in reversed(names)])
+        return self._take(order[::-1] if descending else order)
+
+    def groupby(self, by: Union[str, Tuple[str, ...]],
+                **aggregations: str) -> Dict[str, np.ndarray]:
+        '''
+        Groups the contracts by one or more columns and aggregates other columns.
+
+        Aggregations: 'sum', 'mean', 'min', 'max', 'count', 'first', 'last'.
+        NaN values are ignored by sum, mean, min and max.
+
+        RETURNS:
+        {key column: unique keys, ..., column: aggregated values, ...}
+
+        EXAMPLE:
+        chain.groupby(('expirationDate', 'putCall'), openInterest = 'sum', totalVolume = 'sum')
+        '''
+        names = (by,) if isinstance(by, str) else tuple(by)
+        if len(self) == 0:
+            result = {name: self.columns[name][:0] for name in names}
+            result.update((name, np.empty(0)) for name in aggregations)
+            return result
+
+        order = np.lexsort([self.columns[name] for name in reversed(names)])
+        keys = [self.columns[name][order] for name in names]
+        changed = np.zeros(len(order), dtype=bool)
+        changed[0] = True
+        for key in keys:
+            changed[1:] |= key[1:] != key[:-1]
+        starts = np.flatnonzero(changed)
+        group = np.cumsum(changed) - 1
+        groups = len(starts)
+
+        result = {name: key[starts] for name, key in zip(names, keys)}
+        for name, aggregation in aggregations.items():
+            if aggregation not in _AGGREGATIONS:
+                raise ValueError(f'Unknown aggregation {aggregation!r}, use one of {_AGGREGATIONS}')
+            values = self.columns[name][order]
+            if aggregation == 'count':
+                result[name] = np.bincount(group, minlength=groups)
+            elif aggregation == 'first':
+                result[name] = values[starts]
+            elif aggregation == 'last':
+                result[name] = values[np.append(starts[1:], len(values)) - 1]
+            else:
+                values = values.astype('f8')
+                valid = ~np.isnan(values)
+                if aggregation in ('sum', 'mean'):
+                    total = np.bincount(group[valid], values[valid], minlength=groups)
+                    if aggregation == 'mean':
+                        with np.errstate(invalid='ignore', divide='ignore'):
+                            total = total / np.bincount(group[valid], minlength=groups)
+                    result[name] = (total.astype(self.columns[name].dtype)
+                                    if aggregation == 'sum' and
+                                    self.columns[name].dtype.kind in 'iu' else total)
+                else:
+                    fill = np.inf if aggregation == 'min' else -np.inf
+                    reduce = np.minimum if aggregation == 'min' else np.maximum
+                    reduced = reduce.reduceat(np.where(valid, values, fill), starts)
+                    reduced[np.isinf(reduced)] = np.nan
+                    result[name] = reduced
+        return result
+
+    def diff(self, previous: Optional['OptionChain'],
+             columns: Tuple[str, ...] = DIFF_COLUMNS) -> 'ChainDiff':
+        '''
+        Compares this chain with a previous snapshot of the same underlying.
+        Contracts are matched by symbol, NaN equals NaN.
+
+        RETURNS:
+        ChainDiff with the added and changed contracts (current values) and the
+        removed contracts (previous values).
+        '''
+        if previous is None:
+            return ChainDiff(self, self[:0], self[:0])
+
+        current_symbols = self.columns['symbol']
+        previous_symbols = previous.columns['symbol']
+        _, current_index, previous_index = np.intersect1d(current_symbols, previous_symbols,
+                                                          assume_unique=True,
+                                                          return_indices=True)
+        changed = np.zeros(len(current_index), dtype=bool)
+        for name in columns:
+            current = self.columns[name][current_index]
+            before = previous.columns[name][previous_index]
+            different = current != before
+            if current.dtype.kind == 'f':
+                different &= ~(np.isnan(current) & np.isnan(before))
+            changed |= different
+
+        added = np.ones(len(current_symbols), dtype=bool)
+        added[current_index] = False
+        removed = np.ones(len(previous_symbols), dtype=bool)
+        removed[previous_index] = False
+        return ChainDiff(self[added], previous[removed], self[np.sort(current_index[changed])])
+
+    def expirations(self) -> np.ndarray:
+        return np.unique(self.columns['expirationDate'])
+
+    def strikes(self) -> np.ndarray:
+        return np.unique(self.columns['strikePrice'])
+
+    def to_records(self) -> np.ndarray:
+        '''
+        Returns the contracts as a structured array.
+        '''
+        records = np.empty(len(self), dtype=[(name, column.dtype)
+                                             for name, column in self.columns.items()])
+        for name, column in self.columns.items():
+            records[name] = column
+        return records
+
+    def to_pandas(self):
+        '''
+        Returns the contracts as a DataFrame, info and underlying price in DataFrame.attrs.
+        '''
+        import pandas as pd
+        frame = pd.DataFrame(self.columns, copy=False)
+        frame.attrs.update(self.info)
+        frame.attrs['underlyingPrice'] = self.underlying_price
+        return frame
+
+
+class ChainDiff:
+    '''
+    Difference between two snapshots of an option chain (OptionChain.diff).
+
+    Attributes:
+        added (OptionChain): Contracts only in the new snapshot.
+        removed (OptionChain): Contracts only in the previous snapshot.
+        changed (OptionChain): Contracts in both whose quote or greeks changed
+                               (new values).
+    '''
+
+    __slots__ = ('added', 'removed', 'changed')
+
+    def __init__(self, added: OptionChain, removed: OptionChain, changed: OptionChain):
+
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def __repr__(self) -> str:
+        return (f'<ChainDiff added={len(self.added)} removed={len(self.removed)} '
+                f'changed={len(self.changed)}>')
+
+    @property
+    def updated(self) -> OptionChain:
+        '''
+        Added and changed contracts together, the rows downstream work has to process.
+        '''
+        return OptionChain({name: np.concatenate([column, self.changed.columns[name]])
+                            for name, column in self.added.columns.items()},
+                           self.changed.symbol, self.changed.underlying_price,
+                           self.changed.info)
+
+
+def chain_output(response: Optional[Dict[str, Any]], output_format: OutputFormat) -> Any:
+    '''
+    Converts a get_option_chain JSON response to output_format.
+
+    OutputFormat.JSON: the API response.
+    OutputFormat.NUMPY: OptionChain.
+    OutputFormat.PANDAS: DataFrame, one row per contract.
+    OutputFormat.MODEL: the API response, contracts as schwab_models.OptionContract.
+    '''
+    if response is None or output_format is OutputFormat.JSON:
+        return response
+    if output_format is OutputFormat.MODEL:
+        return dict(response, **{key: {expiration: {strike: to_models(contracts, OptionContract)
+                                                    for strike, contracts in strikes.items()}
+                                       for expiration, strikes in response[key].items()}
+                                 for key in ('callExpDateMap', 'putExpDateMap')
+                                 if key in response})
+    chain = OptionChain.from_response(response)
+    return chain.to_pandas() if output_format is OutputFormat.PANDAS else chain
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 17:31:09 2026
+
+@author: LC
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+from schwab_enum import OutputFormat
+from schwab_option_chain import OptionChain, ChainDiff
+
+
+if not logging.root.handlers:
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.info("Logging activated at Option Poller")
+
+logger = logging.getLogger(__name__)
+
+
+class OptionChainPoller:
+    '''
+    Polls option chains and emits only what changed since the previous poll.
+
+    The last snapshot of every underlying is kept as a columnar OptionChain, each new
+    response is compared against it (OptionChain.diff) and callback(symbol, diff) is
+    called with the added, removed and changed contracts. Underlyings without
+    changes are not reported, so downstream work follows market activity instead
+    of chain size. The first poll reports the whole chain as added.
+
+    Attributes:
+        api: SchwabApi (poll, start/stop) or AsyncSchwabApi (poll_async, run_async).
+        chains (dict): {underlying: get_option_chain params}.
+        interval (float): Seconds between the start of two polls (default: 5).
+        callback (callable): callback(symbol, ChainDiff).
+        snapshots (dict): {underlying: last OptionChain}.
+
+    EXAMPLES:
+    poller = OptionChainPoller(api, ['SPY', 'QQQ'], interval = 3, callback = on_diff)
+    poller.start()
+    ...
+    poller.stop()
+
+    poller = OptionChainPoller(api, {'$SPX': {'symbol': '$SPX', 'strikeCount': 40}})
+    diffs = poller.poll()                # {symbol: ChainDiff}, one poll only
+    '''
+
+    def __init__(self, api, chains: Union[Iterable[str], Dict[str, Dict[str, Any]]],
+                 interval: float = 5.0,
+                 callback: Optional[Callable[[str, ChainDiff], None]] = None,
+                 max_workers: int = 4):
+
+        self.api = api
+        if isinstance(chains, dict):
+            self.chains = dict(chains)
+        else:
+            self.chains = {symbol: {'symbol': symbol} for symbol in chains}
+        self.interval = interval
+        self.callback = callback
+        self.max_workers = max(1, max_workers)
+        self.snapshots = {}
+
+        self.polls = 0
+        self.errors = 0
+        self.contracts_received = 0
+        self.contracts_emitted = 0
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __repr__(self) -> str:
+        return (f'<OptionChainPoller {list(self.chains)} polls={self.polls} '
+                f'errors={self.errors}>')
+
+    def _update(self, symbol: str, chain: Optional[OptionChain]) -> Optional[ChainDiff]:
+        '''
+        Replaces the snapshot of symbol and returns the diff, None on error or
+        when nothing changed.
+        '''
+        if chain is None or chain.info.get('status') == 'FAILED':
+            self.errors += 1
+            logger.warning("Option chain poll failed for %s", symbol)
+            return None
+
+        diff = chain.diff(self.snapshots.get(symbol))
+        self.snapshots[symbol] = chain
+        self.contracts_received += len(chain)
+        self.contracts_emitted += len(diff.added) + len(diff.changed)
+        if not diff:
+            return None
+        if self.callback is not None:
+            try:
+                self.callback(symbol, diff)
+            except Exception as error:
+                logger.error("Option chain callback failed for %s: %s", symbol, error)
+        return diff
+
+    def poll(self) -> Dict[str, ChainDiff]:
+        '''
+        Polls every underlying once (concurrently) and returns the non empty diffs.
+        '''
+        def fetch(item):
+            symbol, params = item
+            try:
+                return symbol, self.api.get_option_chain(params, OutputFormat.NUMPY)
+            except Exception as error:
+                logger.error("Option chain request failed for %s: %s", symbol, error)
+                return symbol, None
+
+        workers = max(1, min(self.max_workers, len(self.chains)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(fetch, self.chains.items()))
+
+        self.polls += 1
+        diffs = {}
+        for symbol, chain in results:
+            diff = self._update(symbol, chain)
+            if diff is not None:
+                diffs[symbol] = diff
+        return diffs
+
+    async def poll_async(self) -> Dict[str, ChainDiff]:
+        '''
+        Same as poll, for AsyncSchwabApi.
+        '''
+        symbols = list(self.chains)
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def fetch(symbol):
+            async with semaphore:
+                return await self.api.get_option_chain(self.chains[symbol], OutputFormat.NUMPY)
+
+        results = await asyncio.gather(*(fetch(symbol) for symbol in symbols),
+                                       return_exceptions=True)
+        self.polls += 1
+        diffs = {}
+        for symbol, chain in zip(symbols, results):
+            if isinstance(chain, BaseException):
+                logger.error("Option chain request failed for %s: %s", symbol, chain)
+                chain = None
+            diff = self._update(symbol, chain)
+            if diff is not None:
+                diffs[symbol] = diff
+        return diffs
+
+    def start(self) -> None:
+        '''
+        Polls every interval seconds in a background thread until stop().
+        '''
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='OptionChainPoller',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll()
+            except Exception as error:
+                logger.error("Option chain poll error: %s", error)
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def run_async(self) -> None:
+        '''
+        Polls every interval seconds until stop() or cancellation (AsyncSchwabApi).
+        '''
+        self._stop.clear()
+        while not self._stop.is_set():
+            started = time.monotonic()
+            await self.poll_async()
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def stats(self) -> Dict[str, Any]:
+        '''
+        Returns poll counters. emitted_ratio is the share of received contracts that
+        were reported as added or changed.
+        '''
+        return {'polls': self.polls,
+                'errors': self.errors,
+                'contracts_received': self.contracts_received,
+                'contracts_emitted': self.contracts_emitted,
+                'emitted_ratio': (self.contracts_emitted / self.contracts_received
+                                  if self.contracts_received else 0.0)}
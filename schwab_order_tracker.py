@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 20:12:37 2026
+
+@author: LC
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from schwab_enum import Status
+from schwab_codec import loads as json_loads
+
+
+if not logging.root.handlers:
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.info("Logging activated at Order Tracker")
+
+logger = logging.getLogger(__name__)
+
+
+# Statuses an order never leaves
+TERMINAL_STATUSES = frozenset((Status.REJECTED, Status.CANCELED, Status.REPLACED,
+                               Status.FILLED, Status.EXPIRED))
+
+# ACCT_ACTIVITY message type (field 2) -> order status. None keeps the status
+# (the event only confirms the order is alive), types missing here trigger a REST
+# refresh of the order.
+EVENT_STATUSES = {'OrderCreated': Status.PENDING_ACKNOWLEDGEMENT,
+                  'OrderAccepted': Status.WORKING,
+                  'ExecutionRequested': None,
+                  'ExecutionRequestCreated': None,
+                  'ExecutionRequestCompleted': None,
+                  'ExecutionCreated': None,
+                  'OrderFillCompleted': Status.FILLED,
+                  'CancelAccepted': Status.PENDING_CANCEL,
+                  'ChangeAccepted': Status.PENDING_REPLACE,
+                  'ChangeCreated': Status.PENDING_REPLACE,
+                  'OrderRejected': Status.REJECTED,
+                  'OrderUROutCompleted': Status.CANCELED}
+
+# Out (UROut) reasons that are not a plain cancel
+OUT_STATUSES = {'EXPIRED': Status.EXPIRED, 'SYSTEM_REJECT': Status.REJECTED,
+                'REJECTED': Status.REJECTED, 'REPLACED': Status.REPLACED}
+
+
+def _to_status(value: Any) -> Status:
+    try:
+        return Status(value)
+    except ValueError:
+        return Status.UNKNOWN
+
+
+def _find(detail: Any, keys: tuple) -> Any:
+    '''
+    Returns the first value of keys found in the (nested) activity detail.
+    '''
+    if isinstance(detail, dict):
+        for key in keys:
+            if key in detail:
+                return detail[key]
+        for value in detail.values():
+            found = _find(value, keys)
+            if found is not None:
+                return found
+    elif isinstance(detail, list):
+        for value in detail:
+            found = _find(value, keys)
+            if found is not None:
+                return found
+    return None
+
+
+class OrderTracker:
+    '''
+    Local order book kept current from ACCT_ACTIVITY streamer events.
+
+    The book is seeded with one get_account_orders request. After that every
+    ACCT_ACTIVITY event moves the order through its status (EVENT_STATUSES), so
+    status queries are dictionary lookups with no network. A REST refresh is only
+    sent when the events look inconsistent:
+        - an event for an order that is not in the book (get_order of that order),
+        - an event that moves an order out of a terminal status, or of an unknown
+          type (get_order of that order),
+        - a gap in the stream sequence numbers (get_account_orders, full resync).
+    Refreshes run in a background worker, so the streamer thread is never blocked.
+
+    Attributes:
+        api: SchwabApi.
+        account_hash (str): Tracked account (default: api.account_hash).
+        orders (dict): {order_id: order dict as returned by get_order}.
+        statuses (dict): {order_id: Status}.
+        callback (callable): callback(order_id, Status), called on status changes.
+        forward (callable): Data manager for the non ACCT_ACTIVITY messages.
+
+    EXAMPLE:
+    tracker = OrderTracker(api, callback = on_status)
+    tracker.seed()
+    tracker.attach(streamer)        # SchwabStreamerClient, subscribes ACCT_ACTIVITY
+    ...
+    tracker.status(order_id)        # Status.WORKING
+    tracker.open_orders()
+    '''
+
+    def __init__(self, api, account_hash: Optional[str] = None,
+                 callback: Optional[Callable[[int, Status], None]] = None,
+                 forward: Optional[Callable[[dict], None]] = None,
+                 lookback: timedelta = timedelta(days=1)):
+
+        self.api = api
+        self.account_hash = account_hash
+        self.callback = callback
+        self.forward = forward
+        self.lookback = lookback
+        self.orders = {}
+        self.statuses = {}
+
+        self.events = 0
+        self.refreshes = 0
+        self.resyncs = 0
+
+        self._last_seq = None
+        self._lock = threading.RLock()
+        self._pending = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='OrderTracker')
+
+    def __repr__(self) -> str:
+        return (f'<OrderTracker orders={len(self.statuses)} open={len(self.open_orders())} '
+                f'events={self.events} refreshes={self.refreshes}>')
+
+    #### Queries
+
+    def status(self, order_id: int) -> Optional[Status]:
+        return self.statuses.get(int(order_id))
+
+    def order(self, order_id: int) -> Optional[Dict[str, Any]]:
+        return self.orders.get(int(order_id))
+
+    def open_orders(self) -> List[int]:
+        with self._lock:
+            return [order_id for order_id, status in self.statuses.items()
+                    if status not in TERMINAL_STATUSES]
+
+    def stats(self) -> Dict[str, int]:
+        return {'orders': len(self.statuses), 'open': len(self.open_orders()),
+                'events': self.events, 'refreshes': self.refreshes, 'resyncs': self.resyncs}
+
+    #### REST
+
+    def seed(self) -> int:
+        '''
+        Loads the orders entered in the last lookback (one get_account_orders call).
+        Returns the number of orders loaded.
+        '''
+        now = datetime.now(timezone.utc)
+        orders = self.api.get_account_orders(_iso(now - self.lookback), _iso(now),
+                                             account_hash=self.account_hash)
+        if not isinstance(orders, list):
+            logger.error("Order tracker seed failed")
+            return 0
+
+        with self._lock:
+            for order in orders:
+                self._store(order)
+        logger.info("Order tracker seeded with %d orders", len(orders))
+        return len(orders)
+
+    def refresh(self, order_id: int) -> Optional[Status]:
+        '''
+        Reloads one order with get_order and returns its status.
+        '''
+        self.refreshes += 1
+        order = self.api.get_order(order_id, account_hash=self.account_hash)
+        if not isinstance(order, dict):
+            logger.warning("Order tracker refresh failed for %s", order_id)
+            return self.status(order_id)
+        with self._lock:
+            return self._store(order)
+
+    def _schedule(self, order_id: Optional[int]) -> None:
+        '''
+        Queues a background refresh of order_id (None for a full resync), at most
+        once while pending.
+        '''
+        with self._lock:
+            if order_id in self._pending:
+                return
+            self._pending.add(order_id)
+        self._executor.submit(self._run_refresh, order_id)
+
+    def _run_refresh(self, order_id: Optional[int]) -> None:
+        with self._lock:
+            self._pending.discard(order_id)
+        try:
+            if order_id is None:
+                self.resyncs += 1
+                self.seed()
+            else:
+                self.refresh(order_id)
+        except Exception as error:
+            logger.error("Order tracker refresh error: %s", error)
+
+    def _store(self, order: Dict[str, Any]) -> Optional[Status]:
+        order_id = order.get('orderId')
+        if order_id is None:
+            return None
+        self.orders[order_id] = order
+        self._set_status(order_id, _to_status(order.get('status')))
+        for child in order.get('childOrderStrategies') or []:
+            self._store(child)
+        return self.statuses[order_id]
+
+    def _set_status(self, order_id: int, status: Status) -> None:
+        if self.statuses.get(order_id) is status:
+            return
+        self.statuses[order_id] = status
+        order = self.orders.get(order_id)
+        if order is not None:
+            order['status'] = status.value
+        if self.callback is not None:
+            try:
+                self.callback(order_id, status)
+            except Exception as error:
+                logger.error("Order tracker callback failed for %s: %s", order_id, error)
+
+    #### Streamer
+
+    def attach(self, streamer) -> None:
+        '''
+        Binds on_message as the data manager of streamer (SchwabStreamerClient) and
+        subscribes ACCT_ACTIVITY. Other messages go to forward, or to the streamer
+        default data manager.
+        '''
+        if self.forward is None:
+            self.forward = streamer._ws._data_manager
+        streamer._ws.bind_to_data_manager(self.on_message)
+        streamer.subs_request_account_activity()
+
+    def on_message(self, content: dict) -> None:
+        '''
+        Streamer data manager.
+        '''
+        forward = []
+        for data in content.get('data', []):
+            if data.get('service') == 'ACCT_ACTIVITY':
+                for event in data.get('content', []):
+                    self.on_event(event)
+            else:
+                forward.append(data)
+        if forward and self.forward is not None:
+            self.forward({**content, 'data': forward})
+
+    def on_event(self, event: Dict[str, Any]) -> None:
+        '''
+        Applies one ACCT_ACTIVITY event
+        ({'seq': int, 'key': str, '1': account, '2': message type, '3': detail}).
+        '''
+        self.events += 1
+        seq = event.get('seq')
+        if seq is not None:
+            if self._last_seq is not None and seq != self._last_seq + 1:
+                logger.warning("ACCT_ACTIVITY sequence gap (%s -> %s), resyncing",
+                               self._last_seq, seq)
+                self._schedule(None)
+            self._last_seq = seq
+
+        message_type = event.get('2')
+        if message_type in (None, 'SUBSCRIBED', 'ERROR'):
+            return
+
+        detail = event.get('3')
+        if isinstance(detail, (str, bytes)) and detail:
+            try:
+                detail = json_loads(detail)
+            except Exception:
+                detail = None
+        order_id = _find(detail, ('SchwabOrderID', 'orderId', 'OrderId'))
+        try:
+            order_id = int(order_id)
+        except (TypeError, ValueError):
+            logger.warning("ACCT_ACTIVITY %s without order id", message_type)
+            return
+
+        with self._lock:
+            current = self.statuses.get(order_id)
+            if message_type not in EVENT_STATUSES or current is None:
+                self._schedule(order_id)
+                return
+
+            status = EVENT_STATUSES[message_type]
+            if message_type == 'OrderUROutCompleted':
+                reason = _find(detail, ('OutCancelType',))
+                status = OUT_STATUSES.get(str(reason).upper(), Status.CANCELED)
+            if status is None or status is current:
+                return
+            if current in TERMINAL_STATUSES:
+                logger.warning("Order %s %s event after %s, refreshing", order_id,
+                               message_type, current.value)
+                self._schedule(order_id)
+                return
+            self._set_status(order_id, status)
+
+    def close(self) -> None:
+        '''
+        Stops the refresh worker.
+        '''
+        self._executor.shutdown(wait=False)
+
+
+def _iso(date: datetime) -> str:
+    return date.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 19:26:40 2026
+
+@author: LC
+"""
+
+from typing import Any, Dict, List, Optional
+from schwab_enum import (AssetType, Instruction, OrderType, Session, Duration,
+                         OrderStrategyType, ComplexOrderStrategyType)
+from schwab_codec import dumps_bytes as json_dumps
+
+
+# Order types that need a price / a stop price
+PRICE_ORDER_TYPES = (OrderType.LIMIT, OrderType.STOP_LIMIT, OrderType.NET_DEBIT,
+                     OrderType.NET_CREDIT, OrderType.LIMIT_ON_CLOSE)
+STOP_ORDER_TYPES = (OrderType.STOP, OrderType.STOP_LIMIT)
+NO_PRICE_ORDER_TYPES = (OrderType.MARKET, OrderType.MARKET_ON_CLOSE)
+
+# Number of legs of the fixed shape complex strategies
+COMPLEX_LEG_COUNTS = {ComplexOrderStrategyType.COVERED: 2,
+                      ComplexOrderStrategyType.VERTICAL: 2,
+                      ComplexOrderStrategyType.BACK_RATIO: 2,
+                      ComplexOrderStrategyType.CALENDAR: 2,
+                      ComplexOrderStrategyType.DIAGONAL: 2,
+                      ComplexOrderStrategyType.STRADDLE: 2,
+                      ComplexOrderStrategyType.STRANGLE: 2,
+                      ComplexOrderStrategyType.COLLAR_SYNTHETIC: 2,
+                      ComplexOrderStrategyType.BUTTERFLY: 3,
+                      ComplexOrderStrategyType.COLLAR_WITH_STOCK: 3,
+                      ComplexOrderStrategyType.CONDOR: 4,
+                      ComplexOrderStrategyType.IRON_CONDOR: 4,
+                      ComplexOrderStrategyType.VERTICAL_ROLL: 4,
+                      ComplexOrderStrategyType.DOUBLE_DIAGONAL: 4}
+
+# Instruction that closes a position opened with the key
+CLOSING_INSTRUCTIONS = {Instruction.BUY: Instruction.SELL,
+                        Instruction.SELL_SHORT: Instruction.BUY_TO_COVER,
+                        Instruction.BUY_TO_OPEN: Instruction.SELL_TO_CLOSE,
+                        Instruction.SELL_TO_OPEN: Instruction.BUY_TO_CLOSE}
+
+
+def _check_enum(name: str, value: Any, enum: type) -> None:
+    if not isinstance(value, enum):
+        raise ValueError(f'{name} must be an instance of {enum.__name__} Enum, got {type(value)}')
+
+
+class OrderSpec:
+    '''
+    Validated, reusable order.
+
+    The order is validated when it is built and serialized once, the first time it
+    is sent. The same spec can be placed, replaced or previewed any number of times
+    (SchwabApi.place_order_spec, replace_order_spec, preview_order_spec, place_orders)
+    without rebuilding the payload.
+
+    Multi-leg spreads (complex_order_strategy_type with several legs) and
+    conditional orders (OCO and TRIGGER with children) serialize to one request,
+    so brackets and spreads are placed atomically in a single round trip.
+
+    Attributes:
+        order_type, session, duration, order_strategy_type: Order enums.
+        complex_order_strategy_type: ComplexOrderStrategyType of multi-leg orders.
+        price (float): Limit price (None for MARKET and MARKET_ON_CLOSE).
+        stop_price (float): Stop price (STOP and STOP_LIMIT).
+        legs (list): orderLegCollection entries.
+        children (list): childOrderStrategies, OrderSpec of OCO and TRIGGER orders.
+
+    EXAMPLES:
+    spec = OrderSpec.single('MELI', 100, Instruction.BUY, AssetType.EQUITY,
+                            price = 1500.0, order_type = OrderType.LIMIT)
+    api.place_order_spec(spec)
+
+    spec = (OrderSpec(OrderType.LIMIT, price = 10.5)
+            .add_leg('SPY', 10, Instruction.BUY))
+    results = api.place_orders([spec_1, spec_2, ...])
+
+    # Vertical spread
+    spec = (OrderSpec(OrderType.NET_DEBIT, price = 1.25,
+                      complex_order_strategy_type = ComplexOrderStrategyType.VERTICAL)
+            .add_leg('SPY   261120C00580000', 1, Instruction.BUY_TO_OPEN, AssetType.OPTION)
+            .add_leg('SPY   261120C00590000', 1, Instruction.SELL_TO_OPEN, AssetType.OPTION))
+
+    # Entry that triggers a take profit / stop loss OCO
+    spec = OrderSpec.bracket('MELI', 10, Instruction.BUY, AssetType.EQUITY,
+                             price = 1500.0, take_profit = 1600.0, stop_loss = 1450.0)
+    '''
+
+    __slots__ = ('order_type', 'session', 'duration', 'order_strategy_type',
+                 'complex_order_strategy_type', 'price', 'stop_price', 'legs', 'children',
+                 '_data')
+
+    def __init__(self, order_type: OrderType = OrderType.MARKET, *,
+                 price: Optional[float] = None,
+                 stop_price: Optional[float] = None,
+                 session: Session = Session.NORMAL,
+                 duration: Duration = Duration.DAY,
+                 order_strategy_type: OrderStrategyType = OrderStrategyType.SINGLE,
+                 complex_order_strategy_type: Optional[ComplexOrderStrategyType] = None):
+
+        _check_enum('order_type', order_type, OrderType)
+        _check_enum('session', session, Session)
+        _check_enum('duration', duration, Duration)
+        _check_enum('order_strategy_type', order_strategy_type, OrderStrategyType)
+        if complex_order_strategy_type is not None:
+            _check_enum('complex_order_strategy_type', complex_order_strategy_type,
+                        ComplexOrderStrategyType)
+
+        if order_type in NO_PRICE_ORDER_TYPES:
+            price = None
+        elif order_type in PRICE_ORDER_TYPES and price is None:
+            raise ValueError(f'{order_type.value} order requires a price')
+        if order_type in STOP_ORDER_TYPES and stop_price is None:
+            raise ValueError(f'{order_type.value} order requires a stop_price')
+
+        self.order_type = order_type
+        self.session = session
+        self.duration = duration
+        self.order_strategy_type = order_strategy_type
+        self.complex_order_strategy_type = complex_order_strategy_type
+        self.price = price
+        self.stop_price = stop_price
+        self.legs = []
+        self.children = []
+        self._data = None
+
+    @classmethod
+    def single(cls, symbol: str, quantity: float, instruction: Instruction,
+               asset_type: AssetType, *,
+               price: Optional[float] = None,
+               stop_price: Optional[float] = None,
+               order_type: OrderType = OrderType.MARKET,
+               session: Session = Session.NORMAL,
+               duration: Duration = Duration.DAY,
+               order_strategy_type: OrderStrategyType = OrderStrategyType.SINGLE) -> 'OrderSpec':
+        '''
+        Single leg order with the place_order arguments. STOP_LIMIT orders take the
+        limit price and the stop_price, STOP orders take either (price is used as
+        the stop price).
+        '''
+        if order_type is OrderType.STOP:
+            price, stop_price = None, price if stop_price is None else stop_price
+        spec = cls(order_type, price=price, stop_price=stop_price, session=session,
+                   duration=duration, order_strategy_type=order_strategy_type)
+        return spec.add_leg(symbol, quantity, instruction, asset_type)
+
+    @classmethod
+    def oco(cls, *orders: 'OrderSpec') -> 'OrderSpec':
+        '''
+        One cancels other: when one of the orders fills, the others are canceled.
+        '''
+        if len(orders) < 2:
+            raise ValueError('OCO order requires at least two orders')
+        spec = cls(order_strategy_type=OrderStrategyType.OCO)
+        for order in orders:
+            spec.add_child(order)
+        return spec
+
+    @classmethod
+    def bracket(cls, symbol: str, quantity: float, instruction: Instruction,
+                asset_type: AssetType, *,
+                price: Optional[float] = None,
+                take_profit: Optional[float] = None,
+                stop_loss: Optional[float] = None,
+                session: Session = Session.NORMAL,
+                duration: Duration = Duration.DAY,
+                exit_duration: Duration = Duration.GOOD_TILL_CANCEL) -> 'OrderSpec':
+        '''
+        Entry order (LIMIT at price, MARKET when price is None) that triggers the
+        exit: an OCO of a take_profit LIMIT and a stop_loss STOP, or only the one
+        given. The exits close the entry with the matching CLOSING_INSTRUCTIONS.
+        '''
+        if take_profit is None and stop_loss is None:
+            raise ValueError('Bracket order requires take_profit or stop_loss')
+        if instruction not in CLOSING_INSTRUCTIONS:
+            raise ValueError(f'Bracket order cannot open with {instruction}')
+        exit_instruction = CLOSING_INSTRUCTIONS[instruction]
+
+        entry = cls.single(symbol, quantity, instruction, asset_type, price=price,
+                           order_type=OrderType.MARKET if price is None else OrderType.LIMIT,
+                           session=session, duration=duration)
+        exits = []
+        if take_profit is not None:
+            exits.append(cls.single(symbol, quantity, exit_instruction, asset_type,
+                                    price=take_profit, order_type=OrderType.LIMIT,
+                                    session=session, duration=exit_duration))
+        if stop_loss is not None:
+            exits.append(cls.single(symbol, quantity, exit_instruction, asset_type,
+                                    price=stop_loss, order_type=OrderType.STOP,
+                                    session=session, duration=exit_duration))
+
+        return entry.add_child(cls.oco(*exits) if len(exits) > 1 else exits[0])
+
+    def add_leg(self, symbol: str, quantity: float, instruction: Instruction,
+                asset_type: AssetType = AssetType.EQUITY) -> 'OrderSpec':
+        '''
+        Adds an orderLegCollection entry. Returns the spec, so calls can be chained.
+        '''
+        _check_enum('instruction', instruction, Instruction)
+        _check_enum('asset_type', asset_type, AssetType)
+        if not symbol:
+            raise ValueError('symbol is required')
+        if quantity is None or quantity <= 0:
+            raise ValueError(f'quantity must be positive, got {quantity}')
+
+        self.legs.append({'instruction': instruction.value,
+                          'quantity': quantity,
+                          'instrument': {'symbol': symbol,
+                                         'assetType': asset_type.value}})
+        self._data = None
+        return self
+
+    def add_child(self, child: 'OrderSpec') -> 'OrderSpec':
+        '''
+        Adds a childOrderStrategies entry. A SINGLE order becomes a TRIGGER order: the
+        children are sent when it fills. Returns the spec, so calls can be chained.
+        '''
+        if not isinstance(child, OrderSpec):
+            raise ValueError(f'child must be an OrderSpec, got {type(child)}')
+        if child is self:
+            raise ValueError('An order cannot be its own child')
+        if self.order_strategy_type is OrderStrategyType.SINGLE:
+            self.order_strategy_type = OrderStrategyType.TRIGGER
+
+        self.children.append(child)
+        self._data = None
+        return self
+
+    @property
+    def symbols(self) -> List[str]:
+        '''
+        Symbols of the legs, including the child orders (without repetitions).
+        '''
+        symbols = [leg['instrument']['symbol'] for leg in self.legs]
+        for child in self.children:
+            symbols.extend(symbol for symbol in child.symbols if symbol not in symbols)
+        return symbols
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        '''
+        The order request body, including the child orders.
+        '''
+        if self.order_strategy_type is OrderStrategyType.OCO:
+            if len(self.children) < 2:
+                raise ValueError('OCO order requires at least two orders')
+            return {'orderStrategyType': self.order_strategy_type.value,
+                    'childOrderStrategies': [child.payload for child in self.children]}
+
+        if not self.legs:
+            raise ValueError('Order has no legs')
+        if self.order_strategy_type is OrderStrategyType.TRIGGER and not self.children:
+            raise ValueError('TRIGGER order requires child orders')
+        expected_legs = COMPLEX_LEG_COUNTS.get(self.complex_order_strategy_type)
+        if expected_legs is not None and len(self.legs) != expected_legs:
+            raise ValueError(f'{self.complex_order_strategy_type.value} order requires '
+                             f'{expected_legs} legs, got {len(self.legs)}')
+
+        payload = {'orderType': self.order_type.value,
+                   'session': self.session.value,
+                   'duration': self.duration.value,
+                   'orderStrategyType': self.order_strategy_type.value}
+        if self.complex_order_strategy_type is not None:
+            payload['complexOrderStrategyType'] = self.complex_order_strategy_type.value
+        if self.price is not None:
+            payload['price'] = self.price
+        if self.stop_price is not None:
+            payload['stopPrice'] = self.stop_price
+        payload['orderLegCollection'] = self.legs
+        if self.children:
+            payload['childOrderStrategies'] = [child.payload for child in self.children]
+        return payload
+
+    @property
+    def data(self) -> bytes:
+        '''
+        Serialized payload, built on first use. Children must be complete before
+        the spec is sent.
+        '''
+        if self._data is None:
+            self._data = json_dumps(self.payload)
+        return self._data
+
+    def __repr__(self) -> str:
+        children = ''
+        if self.children:
+            children = f" {self.order_strategy_type.value} {self.children}"
+        if self.order_strategy_type is OrderStrategyType.OCO:
+            return f'<OrderSpec{children}>'
+        legs = ', '.join(f"{leg['instruction']} {leg['quantity']} {leg['instrument']['symbol']}"
+                         for leg in self.legs)
+        price = f' @ {self.price}' if self.price is not None else ''
+        return f'<OrderSpec {self.order_type.value} {legs}{price}{children}>'
+
+
+class OrderResult:
+    '''
+    Result of placing or replacing an order.
+
+    The new order id is read from the Location header of the 201 response, so
+    follow-up cancels and replaces need no extra get_account_orders request.
+
+    Attributes:
+        ok (bool): The order was accepted (HTTP 201).
+        order_id (int): New order id, None when not available.
+        status (int): HTTP status, None when no response was received.
+        location (str): Location header of the response.
+        elapsed (float): Seconds from sending the request to the response.
+        symbols (list): Symbols of the order legs.
+        error (str): Failure description.
+        index (int): Position in the basket (place_orders).
+    '''
+
+    __slots__ = ('ok', 'order_id', 'status', 'location', 'elapsed', 'symbols', 'error',
+                 'index')
+
+    def __init__(self, ok: bool = False, order_id: Optional[int] = None,
+                 status: Optional[int] = None, location: Optional[str] = None,
+                 elapsed: float = 0.0, symbols: Optional[List[str]] = None,
+                 error: Optional[str] = None, index: Optional[int] = None):
+
+        self.ok = ok
+        self.order_id = order_id
+        self.status = status
+        self.location = location
+        self.elapsed = elapsed
+        self.symbols = symbols or []
+        self.error = error
+        self.index = index
+
+    @classmethod
+    def from_response(cls, response: Any, elapsed: float,
+                      symbols: Optional[List[str]] = None) -> 'OrderResult':
+        '''
+        Builds the result from a requests or aiohttp response (None or an exception
+        when the request failed). The result comes from the HTTP status and the
+        Location header only, a response body is optional and not read.
+        '''
+        if isinstance(response, BaseException):
+            return cls(elapsed=elapsed, symbols=symbols, error=repr(response))
+        status = getattr(response, 'status_code', getattr(response, 'status', None))
+        if status is None or not hasattr(response, 'headers'):
+            return cls(elapsed=elapsed, symbols=symbols, error='Request failed')
+
+        location = response.headers.get('Location')
+        result = cls(ok=status == 201, status=status, location=location,
+                     order_id=parse_order_id(location), elapsed=elapsed, symbols=symbols)
+        if not result.ok:
+            result.error = f'Unexpected status {status}'
+        return result
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    def __repr__(self) -> str:
+        if self.ok:
+            return f'<OrderResult order_id={self.order_id} {self.elapsed * 1000:.0f} ms>'
+        return f'<OrderResult failed status={self.status} error={self.error!r}>'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def parse_order_id(location: Optional[str]) -> Optional[int]:
+    '''
+    Returns the order id at the end of a Location header
+    (.../accounts/{account_hash}/orders/{order_id}).
+    '''
+    if not location:
+        return None
+    order_id = location.rstrip('/').rsplit('/', 1)[-1]
+    return int(order_id) if order_id.isdigit() else None
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 10:02:41 2026
+
+@author: LC
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional
+from schwab_enum import BaseUrl, Priority
+
+
+if not logging.root.handlers:
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.info("Logging activated at Rate Limiter")
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    '''
+    Token bucket shared by threads and asyncio tasks.
+
+    Tokens are added at rate/per seconds up to capacity. Each request takes one
+    token. While a HIGH priority request is waiting, NORMAL priority requests
+    do not take tokens, so orders always get the next available token. NORMAL
+    requests also leave the last reserve tokens to HIGH ones, so an order finds
+    a token right away even when the bucket was drained by other requests.
+
+    Attributes:
+        rate (float): Number of requests allowed per period.
+        per (float): Period length in seconds (default: 60).
+        capacity (float): Maximum burst size.
+        reserve (float): Tokens only HIGH priority requests can take (default: 0).
+    '''
+
+    def __init__(self, rate: float, per: float = 60.0, capacity: Optional[float] = None,
+                 reserve: float = 0.0):
+
+        if rate <= 0 or per <= 0:
+            raise ValueError("rate and per must be greater than zero.")
+
+        self.rate = rate
+        self.per = per
+        self.capacity = capacity or max(1.0, rate / 6)
+        # NORMAL requests must still be able to take a token from a full bucket
+        self.reserve = max(0.0, min(reserve, self.capacity - 1))
+
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        self._high_waiting = 0
+
+        # metrics
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def __repr__(self) -> str:
+        return (f'<TokenBucket {self.rate}/{self.per}s '
+                f'fill={self.fill_level:.2f} waiting_high={self._high_waiting}>')
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity,
+                           self._tokens + (now - self._last_refill) * self.rate / self.per)
+        self._last_refill = now
+
+    def _try_acquire(self, priority: Priority) -> float:
+        '''
+        Takes a token if one is available for this priority.
+
+        Returns:
+            float: 0 if the token was taken, otherwise the seconds to wait
+                   before trying again.
+        '''
+        with self._lock:
+            self._refill()
+            needed = 1.0
+            if priority is not Priority.HIGH:
+                if self._high_waiting:
+                    return max(self.per / self.rate, 0.001)
+                needed += self.reserve
+            if self._tokens >= needed:
+                self._tokens -= 1
+                self.acquired += 1
+                return 0.0
+            return (needed - self._tokens) * self.per / self.rate
+
+    def _enter(self, priority: Priority) -> None:
+        if priority is Priority.HIGH:
+            with self._lock:
+                self._high_waiting += 1
+
+    def _exit(self, priority: Priority, wait_time: float) -> None:
+        with self._lock:
+            if priority is Priority.HIGH:
+                self._high_waiting -= 1
+            if wait_time > 0:
+                self.waited += 1
+                self.total_wait_time += wait_time
+                self.max_wait_time = max(self.max_wait_time, wait_time)
+
+    def acquire(self, priority: Priority = Priority.NORMAL) -> float:
+        '''
+        Blocks the calling thread until a token is available.
+
+        Returns:
+            float: Seconds spent waiting.
+        '''
+        wait = self._try_acquire(priority)
+        if not wait:
+            return 0.0
+
+        start = time.monotonic()
+        self._enter(priority)
+        try:
+            while wait:
+                time.sleep(wait)
+                wait = self._try_acquire(priority)
+        finally:
+            waited = time.monotonic() - start
+            self._exit(priority, waited)
+        return waited
+
+    async def acquire_async(self, priority: Priority = Priority.NORMAL) -> float:
+        '''
+        Waits on the event loop until a token is available.
+
+        Returns:
+            float: Seconds spent waiting.
+        '''
+        wait = self._try_acquire(priority)
+        if not wait:
+            return 0.0
+
+        start = time.monotonic()
+        self._enter(priority)
+        try:
+            while wait:
+                await asyncio.sleep(wait)
+                wait = self._try_acquire(priority)
+        finally:
+            waited = time.monotonic() - start
+            self._exit(priority, waited)
+        return waited
+
+    @property
+    def fill_level(self) -> float:
+        '''
+        Fraction of the bucket currently available (0 = empty, 1 = full).
+        '''
+        with self._lock:
+            self._refill()
+            return self._tokens / self.capacity
+
+    def metrics(self) -> Dict[str, float]:
+        '''
+        Returns current fill level and wait-time metrics.
+        '''
+        fill_level = self.fill_level
+        with self._lock:
+            return {'fill_level': fill_level,
+                    'tokens': self._tokens,
+                    'capacity': self.capacity,
+                    'reserve': self.reserve,
+                    'high_priority_waiting': self._high_waiting,
+                    'acquired': self.acquired,
+                    'waited': self.waited,
+                    'total_wait_time': self.total_wait_time,
+                    'avg_wait_time': (self.total_wait_time / self.waited
+                                      if self.waited else 0.0),
+                    'max_wait_time': self.max_wait_time}
+
+
+class RateLimiter:
+    '''
+    Client-side rate limiter with one token bucket per base url.
+
+    Requests to a base url without a bucket are not limited, so RateLimiter({})
+    disables limiting. The same instance can be shared by several SchwabApi
+    objects (and threads) to share the account quota.
+
+    Priority works inside a bucket: a HIGH request (place, replace, cancel order)
+    goes ahead of the NORMAL requests waiting for the same bucket and can always
+    take its reserve. Trader and market-data requests have separate buckets, so
+    market-data calls never delay an order unless the quota is shared: with
+    shared_budget every request also takes a token from one shared bucket, where
+    orders go ahead of the queued market-data calls.
+
+    EXAMPLE:
+    limiter = RateLimiter({BaseUrl.TRADER.value: 100, BaseUrl.MARKET.value: 110})
+    limiter = RateLimiter(shared_budget = 120)   # one quota for both base urls
+    api = SchwabApi(config, rate_limiter = limiter)
+    limiter.metrics()
+    '''
+
+    # requests per minute, kept below the broker quota of 120
+    DEFAULT_BUDGETS = {BaseUrl.TRADER.value: 110,
+                       BaseUrl.MARKET.value: 110}
+    # tokens of each bucket kept for HIGH priority requests
+    RESERVE = 2
+
+    def __init__(self, budgets: Optional[Dict[str, float]] = None, per: float = 60.0,
+                 shared_budget: Optional[float] = None, reserve: float = RESERVE):
+
+        if budgets is None:
+            budgets = self.DEFAULT_BUDGETS
+        self.buckets = {base_url: TokenBucket(rate, per, reserve=reserve)
+                        for base_url, rate in budgets.items()}
+        self.shared = (TokenBucket(shared_budget, per, reserve=reserve)
+                       if shared_budget else None)
+
+    def __repr__(self) -> str:
+        return f'<RateLimiter {self.buckets} shared={self.shared}>'
+
+    def acquire(self, base_url: str, priority: Priority = Priority.NORMAL) -> float:
+        '''
+        Blocks until a request to base_url is allowed. Returns the seconds waited.
+        '''
+        bucket = self.buckets.get(base_url)
+        if bucket is None:
+            return 0.0
+        waited = bucket.acquire(priority)
+        if self.shared is not None:
+            waited += self.shared.acquire(priority)
+        if waited > 1:
+            logger.debug('Rate limited %s for %.2f s', base_url, waited)
+        return waited
+
+    async def acquire_async(self, base_url: str, priority: Priority = Priority.NORMAL) -> float:
+        '''
+        Waits until a request to base_url is allowed. Returns the seconds waited.
+        '''
+        bucket = self.buckets.get(base_url)
+        if bucket is None:
+            return 0.0
+        waited = await bucket.acquire_async(priority)
+        if self.shared is not None:
+            waited += await self.shared.acquire_async(priority)
+        if waited > 1:
+            logger.debug('Rate limited %s for %.2f s', base_url, waited)
+        return waited
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        '''
+        Returns fill level and wait-time metrics for each base url (and 'shared').
+        '''
+        metrics = {base_url: bucket.metrics() for base_url, bucket in self.buckets.items()}
+        if self.shared is not None:
+            metrics['shared'] = self.shared.metrics()
+        return metrics
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 11:20:17 2026
+
+@author: LC
+"""
+
+import time
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Optional
+
+
+if not logging.root.handlers:
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.info("Logging activated at Retry")
+
+logger = logging.getLogger(__name__)
+
+
+class RetryBudget:
+    '''
+    Limits retries to a fraction of the requests sent, so a failing backend is not
+    hit with a retry storm.
+
+    Every request deposits ratio tokens (up to max_tokens) and every retry spends one.
+    min_tokens retries are always available per refill_period seconds.
+
+    Attributes:
+        ratio (float): Retries allowed per request (default: 0.2).
+        min_tokens (float): Retries always allowed per refill period (default: 5).
+        refill_period (float): Seconds to refill min_tokens (default: 60).
+        max_tokens (float): Maximum tokens that can be saved up (default: 50).
+    '''
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 5, refill_period: float = 60.0,
+                 max_tokens: float = 50):
+
+        self.ratio = ratio
+        self.min_tokens = min_tokens
+        self.refill_period = refill_period
+        self.max_tokens = max_tokens
+
+        self._tokens = max_tokens
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        '''
+        Called once for every new request.
+        '''
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        '''
+        Takes a retry token. Returns False when the budget is exhausted.
+        '''
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_tokens,
+                               self._tokens + (now - self._last_refill)
+                               * self.min_tokens / self.refill_period)
+            self._last_refill = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.exhausted += 1
+            return False
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+
+class RetryPolicy:
+    '''
+    Retry policy for SchwabApi requests.
+
+    Failed requests are retried with exponential backoff and full jitter, honoring
+    the Retry-After header. Only idempotent methods are retried, so an order POST is
+    never sent twice, except on 429 where the request was rejected before being
+    processed. Retries are bounded by a RetryBudget shared by all requests.
+
+    Attributes:
+        max_retries (int): Maximum retries per request (default: 3).
+        backoff_base (float): First backoff in seconds (default: 0.5).
+        backoff_max (float): Maximum backoff or Retry-After wait in seconds (default: 30).
+        jitter (bool): Apply full jitter to the backoff (default: True).
+        retry_statuses (tuple): HTTP status codes that are retried.
+        idempotent_methods (tuple): Methods retried on any retryable failure.
+        budget (RetryBudget): Shared retry budget.
+
+    EXAMPLE:
+    api = SchwabApi(config, retry_policy = RetryPolicy(max_retries = 5))
+    api = SchwabApi(config, retry_policy = RetryPolicy(max_retries = 0))  # no retries
+    '''
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'DELETE')
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 30.0, jitter: bool = True,
+                 retry_statuses: Iterable[int] = RETRY_STATUSES,
+                 idempotent_methods: Iterable[str] = IDEMPOTENT_METHODS,
+                 budget: Optional[RetryBudget] = None):
+
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_statuses = tuple(retry_statuses)
+        self.idempotent_methods = tuple(method.upper() for method in idempotent_methods)
+        self.budget = budget or RetryBudget()
+        self.retries = 0
+
+    def __repr__(self) -> str:
+        return (f'<RetryPolicy max_retries={self.max_retries} retries={self.retries} '
+                f'budget={self.budget.tokens:.1f}>')
+
+    def record_request(self) -> None:
+        '''
+        Registers a new (first attempt) request in the retry budget.
+        '''
+        self.budget.deposit()
+
+    def is_retryable(self, method: str, status: Optional[int]) -> bool:
+        '''
+        Whether a failed attempt may be retried.
+
+        Args:
+            method (str): HTTP method.
+            status (int): HTTP status, None when no response was received.
+        '''
+        if status == 429:
+            return True
+        if method.upper() not in self.idempotent_methods:
+            return False
+        return status is None or status in self.retry_statuses
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        '''
+        Seconds to wait before retry number attempt + 1.
+        '''
+        wait = parse_retry_after(retry_after)
+        if wait is not None:
+            return min(wait, self.backoff_max)
+
+        wait = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return random.uniform(0, wait) if self.jitter else wait
+
+    def retry_delay(self, method: str, status: Optional[int], attempt: int,
+                    retry_after: Optional[str] = None) -> Optional[float]:
+        '''
+        Decides whether to retry a failed attempt.
+
+        Returns:
+            float: Seconds to wait before retrying.
+            None: If the request must not be retried.
+        '''
+        if attempt >= self.max_retries or not self.is_retryable(method, status):
+            return None
+        if not self.budget.withdraw():
+            logger.warning('Retry budget exhausted, not retrying %s (status %s)',
+                           method.upper(), status)
+            return None
+        self.retries += 1
+        return self.backoff(attempt, retry_after)
+
+
+def parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+    '''
+    Parses a Retry-After header (delay seconds or HTTP date) into seconds.
+    '''
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 13:14:52 2026
+
+@author: LC
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    '''
+    Coalesces identical concurrent calls made from different threads.
+
+    The first caller of do(key, function) runs the function, callers arriving with
+    the same key while it is in flight wait and receive the same result (or
+    exception). The result object is shared, treat it as read-only.
+
+    Attributes:
+        calls (int): Functions actually executed.
+        shared (int): Calls served by an in-flight execution.
+    '''
+
+    def __init__(self):
+
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.calls = 0
+        self.shared = 0
+
+    def __repr__(self) -> str:
+        return f'<SingleFlight calls={self.calls} shared={self.shared}>'
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        '''
+        Runs function once for all concurrent callers with the same key.
+        '''
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._flights[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = function()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+
+class AsyncSingleFlight:
+    '''
+    Coalesces identical concurrent coroutine calls on one event loop.
+
+    The first caller of do(key, coroutine_function) starts the coroutine as a task,
+    callers arriving with the same key while it runs await the same task. A caller
+    being cancelled does not cancel the shared task. The result object is shared,
+    treat it as read-only.
+
+    Attributes:
+        calls (int): Coroutines actually executed.
+        shared (int): Calls served by an in-flight execution.
+    '''
+
+    def __init__(self):
+
+        self._flights = {}
+        self.calls = 0
+        self.shared = 0
+
+    def __repr__(self) -> str:
+        return f'<AsyncSingleFlight calls={self.calls} shared={self.shared}>'
+
+    async def do(self, key: Hashable, coroutine_function: Callable[[], Awaitable[Any]]) -> Any:
+        '''
+        Awaits coroutine_function() once for all concurrent callers with the same key.
+        '''
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coroutine_function())
+            self._flights[key] = task
+            self.calls += 1
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 21:40:26 2026
+
+@author: LC
+"""
+
+import os
+import json
+import asyncio
+import tempfile
+import logging
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+if not logging.root.handlers:
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.info("Logging activated at Token Store")
+
+logger = logging.getLogger(__name__)
+
+
+class TokenStore:
+    '''
+    Token file shared by every process of a host.
+
+    Holds one access/refresh token pair as JSON:
+
+        {'access_token': str, 'access_expiration': epoch seconds,
+         'refresh_token': str, 'refresh_expiration': epoch seconds}
+
+    Writes go to a temporary file that replaces the store (os.replace), so readers
+    always see a complete file without locking. Refreshes are serialized across
+    processes with lock() (fcntl.flock on path + '.lock'): the process holding the
+    lock re-reads the store and only requests a token when no other process has
+    renewed it, so N processes send one refresh instead of N.
+
+    Attributes:
+        path (str): JSON file.
+
+    EXAMPLE:
+    store = TokenStore('./tokens.json')
+    auth = SchwabAuth(config, token_store = store)      # same store in every process
+    '''
+
+    def __init__(self, path: str):
+
+        self.path = os.path.abspath(path)
+        self._lock_path = self.path + '.lock'
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._task = None               # task holding lock_async(), None for lock()
+        self._cache = None
+        self._cache_key = None
+        if fcntl is None:
+            logger.warning("fcntl not available, token store is only locked within the process")
+
+    def __repr__(self) -> str:
+        return f'<TokenStore {self.path}>'
+
+    @contextmanager
+    def lock(self) -> Iterator['TokenStore']:
+        '''
+        Exclusive lock across threads and processes (re-entrant within a thread).
+        '''
+        with self._thread_lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self
+                finally:
+                    self._depth -= 1
+                return
+
+            with open(self._lock_path, 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._depth = 1
+                try:
+                    yield self
+                finally:
+                    self._depth = 0
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @asynccontextmanager
+    async def lock_async(self, poll: float = 0.01) -> AsyncIterator['TokenStore']:
+        '''
+        lock() for coroutines: waits for the lock with non-blocking attempts, so the
+        event loop keeps running while another process holds it. Re-entrant within
+        the task holding lock_async() and within lock() of the same thread; other
+        coroutines of the loop wait. Do not wait, while holding it, for a thread
+        that takes lock().
+        '''
+        task = asyncio.current_task()
+        while True:
+            if self._thread_lock.acquire(blocking=False):
+                if not self._depth:
+                    break
+                if self._task is None or self._task is task:
+                    # Nested in lock() or in lock_async() of this task
+                    self._depth += 1
+                    try:
+                        yield self
+                    finally:
+                        self._depth -= 1
+                        self._thread_lock.release()
+                    return
+                # The RLock is re-entrant, another coroutine of this thread holds it
+                self._thread_lock.release()
+            await asyncio.sleep(poll)
+        try:
+            with open(self._lock_path, 'a') as lock_file:
+                if fcntl is not None:
+                    while True:
+                        try:
+                            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                            break
+                        except BlockingIOError:
+                            await asyncio.sleep(poll)
+                self._depth, self._task = 1, task
+                try:
+                    yield self
+                finally:
+                    self._depth, self._task = 0, None
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            self._thread_lock.release()
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        '''
+        Returns the stored tokens, None when there are none. The file is only read
+        again when it changed.
+        '''
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key != self._cache_key:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as file:
+                    self._cache = json.load(file)
+            except (OSError, ValueError) as error:
+                logger.error("Could not read token store %s: %s", self.path, error)
+                return None
+            self._cache_key = key
+        return dict(self._cache)
+
+    def save(self, tokens: Dict[str, Any]) -> None:
+        '''
+        Atomically replaces the stored tokens (call it holding lock()).
+        '''
+        directory = os.path.dirname(self.path)
+        descriptor, temporary = tempfile.mkstemp(prefix='.tokens', dir=directory)
+        try:
+            # mkstemp files are only readable by the owner
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                json.dump(tokens, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, self.path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def clear(self) -> None:
+        '''
+        Removes the stored tokens.
+        '''
+        with self.lock():
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._cache = self._cache_key = None
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 20:58:14 2026
+
+@author: LC
+"""
+
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from schwab_codec import loads as json_loads, dumps as json_dumps
+
+
+if not logging.root.handlers:
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.info("Logging activated at Transaction Store")
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS transactions (
+    activity_id INTEGER PRIMARY KEY,
+    time TEXT,
+    type TEXT,
+    symbol TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transactions_time ON transactions (time);
+CREATE INDEX IF NOT EXISTS transactions_symbol ON transactions (symbol, time);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+'''
+
+
+def transaction_symbol(transaction: Dict[str, Any]) -> Optional[str]:
+    '''
+    Returns the symbol of the first non currency transfer item.
+    '''
+    for item in transaction.get('transferItems') or []:
+        instrument = item.get('instrument') or {}
+        if instrument.get('assetType') != 'CURRENCY' and instrument.get('symbol'):
+            return instrument['symbol']
+    return None
+
+
+class TransactionStore:
+    '''
+    Append-only SQLite store of account transactions.
+
+    Transactions are keyed by activityId (a transaction already stored is never
+    replaced, as in add_transactions) and indexed by time and symbol. The store
+    keeps a sync watermark, the end of the last completed download, so sync()
+    only requests the transactions after it (minus overlap, for late postings)
+    and the daily cost follows the new activity instead of the account age.
+
+    Attributes:
+        path (str): SQLite file (default: './schwab_transactions.db').
+        overlap (timedelta): Time before the watermark requested again (default: 3 days).
+        window (timedelta): Longest range per get_transactions request (default: 180 days).
+
+    EXAMPLE:
+    store = TransactionStore('./transactions.db')
+    store.sync(api)                          # first run: full history, see sync
+    store.transactions(symbol = 'SPY')
+    '''
+
+    def __init__(self, path: str = './schwab_transactions.db',
+                 overlap: timedelta = timedelta(days=3),
+                 window: timedelta = timedelta(days=180)):
+
+        self.path = path
+        self.overlap = overlap
+        self.window = window
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+
+    def __repr__(self) -> str:
+        return f'<TransactionStore {self.path} transactions={len(self)}>'
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM transactions').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    #### Write
+
+    def add(self, transactions: Iterable[Dict[str, Any]]) -> int:
+        '''
+        Stores the transactions not stored yet. Returns the number added.
+        '''
+        rows = [(transaction['activityId'], transaction.get('time'), transaction.get('type'),
+                 transaction_symbol(transaction), json_dumps(transaction))
+                for transaction in transactions]
+        with self._lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany('INSERT OR IGNORE INTO transactions '
+                                         'VALUES (?, ?, ?, ?, ?)', rows)
+            return self._connection.total_changes - before
+
+    def watermark(self) -> Optional[datetime]:
+        '''
+        End of the last completed download, None before the first one.
+        '''
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM meta WHERE key = 'watermark'"
+                                           ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def set_watermark(self, watermark: datetime) -> None:
+        if watermark.tzinfo is None:
+            watermark = watermark.astimezone()
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO meta VALUES ('watermark', ?)",
+                                     (watermark.astimezone(timezone.utc).isoformat(),))
+
+    def sync(self, schwab_api, start_date: Optional[datetime] = None) -> int:
+        '''
+        Downloads the transactions from the watermark (minus overlap) to now, in
+        window sized requests, and moves the watermark to now when all of them
+        succeed. Without watermark the download starts at start_date (required for
+        the first sync, or load the full history with add + set_watermark).
+
+        Returns the number of new transactions.
+        '''
+        end_date = datetime.now(timezone.utc)
+        watermark = self.watermark()
+        if watermark is not None:
+            start_date = watermark - self.overlap
+        elif start_date is None:
+            raise ValueError('The first sync requires start_date')
+        elif start_date.tzinfo is None:
+            start_date = start_date.astimezone()
+
+        added = 0
+        window_end = end_date
+        while window_end > start_date:
+            window_start = max(window_end - self.window, start_date)
+            fetched = schwab_api.get_transactions(start_date=_iso(window_start),
+                                                  end_date=_iso(window_end))
+            if fetched is None:
+                logger.error("Transaction sync failed for %s - %s, watermark kept at %s",
+                             _iso(window_start), _iso(window_end), watermark)
+                return added
+            added += self.add(fetched)
+            window_end = window_start
+
+        self.set_watermark(end_date)
+        logger.info("Transaction sync: %d new transactions, watermark %s", added, _iso(end_date))
+        return added
+
+    #### Read
+
+    def get(self, activity_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute('SELECT data FROM transactions WHERE activity_id = ?',
+                                           (activity_id,)).fetchone()
+        return json_loads(row[0]) if row else None
+
+    def transactions(self, start_time: Optional[str] = None, end_time: Optional[str] = None,
+                     symbol: Optional[str] = None,
+                     transaction_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        '''
+        Returns the stored transactions sorted by time. start_time and end_time are
+        compared with the transaction 'time' string (ISO-8601, as returned by the API).
+        '''
+        conditions, params = [], []
+        for column, operator, value in (('time', '>=', start_time), ('time', '<=', end_time),
+                                        ('symbol', '=', symbol),
+                                        ('type', '=', transaction_type)):
+            if value is not None:
+                conditions.append(f'{column} {operator} ?')
+                params.append(value)
+        query = 'SELECT data FROM transactions'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY time, activity_id'
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        return [json_loads(row[0]) for row in rows]
+
+
+def _iso(date: datetime) -> str:
+    return date.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
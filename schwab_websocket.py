@@ -6,12 +6,12 @@ Created on Thu Jul 29 11:39:44 2021
 """
 
 import time
-import json
 import logging
 from datetime import datetime, timedelta
 from threading import Thread
 import socket
 import websocket #websocket-client
+from schwab_codec import loads_lenient as json_loads_lenient, dumps as json_dumps
 
 
 if not logging.root.handlers:
@@ -248,7 +248,7 @@ class SchwabWebSocket:
             self._data_len = 0
 
         # Load the message
-        message = json.loads(message, strict = False)
+        message = json_loads_lenient(message)
 
         if 'notify' in message:
             self._handle_notify_message(message)
@@ -373,7 +373,7 @@ class SchwabWebSocket:
         # For example if the uri is wrong you will not be able to log in then
         # connectipon started is False.
 
-        self.websocket.send(json.dumps(login_request))
+        self.websocket.send(json_dumps(login_request))
 
 
     def send_logout_request(self) -> None:
@@ -398,7 +398,7 @@ class SchwabWebSocket:
                 "SchwabClientCorrelId": self.streamer_info.get("schwabClientCorrelId")
                 }
 
-            self.websocket.send(json.dumps(logout_request))
+            self.websocket.send(json_dumps(logout_request))
             session_duration =  datetime.now() - self.logged_in_since
             logger.info('Client is logged out.')
             logger.info('Session duration: %s', session_duration)
@@ -445,7 +445,7 @@ class SchwabWebSocket:
 
 
         if self.is_logged_in:
-            self.websocket.send(json.dumps(request))
+            self.websocket.send(json_dumps(request))
 
         else:
             logger.warning('''No websocket conection opened.
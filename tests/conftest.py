@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:05:12 2026
+
+@author: LC
+
+Shared fixtures, the test doubles are in fakes.py.
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import schwab_api
+import schwab_async_api
+from schwab_api import SchwabApi
+from schwab_async_api import AsyncSchwabApi
+from schwab_ratelimit import RateLimiter
+from schwab_retry import RetryPolicy
+from fakes import CONFIG, FakeAuth, FakeServer
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeServer().start()
+    for module in (schwab_api, schwab_async_api):
+        monkeypatch.setattr(module, 'BASE_TRADER_URL', fake.url + '/trader/v1/')
+        monkeypatch.setattr(module, 'BASE_MARKET_URL', fake.url + '/marketdata/v1/')
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def fake_auth(monkeypatch):
+    monkeypatch.setattr(SchwabApi, '_create_auth',
+                        lambda self, config, auto_refresh: FakeAuth())
+    monkeypatch.setattr(AsyncSchwabApi, '_create_auth',
+                        lambda self, config, auto_refresh: FakeAuth())
+
+
+@pytest.fixture
+def make_api(server, fake_auth):
+    '''
+    SchwabApi factory against the fake server, without rate limiting and with
+    immediate retries.
+    '''
+    apis = []
+
+    def factory(**kwargs):
+        kwargs.setdefault('rate_limiter', RateLimiter({}))
+        kwargs.setdefault('retry_policy', RetryPolicy(backoff_base=0, backoff_max=0))
+        api = SchwabApi(dict(CONFIG), **kwargs)
+        apis.append(api)
+        return api
+
+    yield factory
+    for api in apis:
+        api.close()
+
+
+@pytest.fixture
+def make_async_api(server, fake_auth):
+    '''
+    AsyncSchwabApi factory (awaitable) against the fake server.
+    '''
+    async def factory(**kwargs):
+        kwargs.setdefault('rate_limiter', RateLimiter({}))
+        kwargs.setdefault('retry_policy', RetryPolicy(backoff_base=0, backoff_max=0))
+        return await AsyncSchwabApi.create(dict(CONFIG), **kwargs)
+
+    return factory
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:05:12 2026
+
+@author: LC
+
+Test doubles: a fake authentication object and a local aiohttp server that
+stands in for the trader and market-data APIs.
+"""
+
+import time
+import asyncio
+import threading
+from aiohttp import web
+from schwab_token_store import TokenStore
+
+
+CONFIG = {'user': 'test', 'client_id': 'client', 'app_secret': 'secret',
+          'redirect_uri': 'https://127.0.0.1'}
+
+ACCOUNT_HASH = 'HASH'
+
+
+class FakeAuth:
+    '''
+    SchwabAuth stand-in, always logged in.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        self.calls = 0
+        self.stopped = False
+
+    def __repr__(self) -> str:
+        return 'True'
+
+    def get_headers(self):
+        self.calls += 1
+        return {'Authorization': 'Bearer token'}
+
+    async def get_headers_async(self):
+        return self.get_headers()
+
+    @property
+    def access_token(self):
+        return 'token'
+
+    def stop_refresher(self, timeout=None):
+        self.stopped = True
+
+
+def token_store(path, access_in=1800.0, refresh_in=7 * 86400.0, access_token='stored'):
+    '''
+    TokenStore at path holding an access token valid for access_in seconds and a
+    refresh token valid for refresh_in seconds.
+    '''
+    store = TokenStore(str(path))
+    now = time.time()
+    with store.lock():
+        store.save({'access_token': access_token, 'access_expiration': now + access_in,
+                    'refresh_token': 'refresh', 'refresh_expiration': now + refresh_in})
+    return store
+
+
+class TokenEndpoint:
+    '''
+    Stand-in for SchwabAuth._request_token: returns access_token1, 2... after delay
+    seconds, or None while fail is set. Counts the requests.
+    '''
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.fail = False
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, auth, grant_type, extra_payload):
+        with self._lock:
+            self.requests += 1
+            count = self.requests
+        time.sleep(self.delay)
+        if self.fail:
+            return None
+        return {'access_token': f'access_token{count}', 'refresh_token': 'refresh',
+                'expires_in': 1800}
+
+
+class FakeServer:
+    '''
+    Local HTTP server. routes maps a path, or (method, path), to a handler
+    (request -> web.Response, may be a coroutine). Unknown paths echo the path and
+    query. Every request is recorded in hits as (method, path, query).
+    '''
+
+    def __init__(self):
+        self.routes = {}
+        self.hits = []
+        self.url = None
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+
+    def default_routes(self):
+        self.routes['/trader/v1/userPreference'] = lambda request: web.json_response(
+            {'streamerInfo': [{'schwabClientCustomerId': 'customer'}]})
+        self.routes['/trader/v1/accounts/accountNumbers'] = lambda request: web.json_response(
+            [{'accountNumber': '123', 'hashValue': ACCOUNT_HASH}])
+
+    def count(self, path):
+        return sum(1 for _, hit_path, _ in self.hits if hit_path == path)
+
+    async def _handler(self, request):
+        self.hits.append((request.method, request.path, dict(request.query)))
+        handler = self.routes.get((request.method, request.path)) or self.routes.get(request.path)
+        if handler is None:
+            return web.json_response({'path': request.path, 'query': dict(request.query)})
+        response = handler(request)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+    def start(self):
+        self.default_routes()
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self._handler)
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        self._loop.run_until_complete(site.start())
+        port = site._server.sockets[0].getsockname()[1]
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{port}'
+        return self
+
+    def stop(self):
+        future = asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop)
+        future.result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+class FakeTransactionsApi:
+    '''
+    get_transactions over a fixed list, by 'time' within [start_date, end_date).
+    Windows listed in failures return None. Every request is recorded in windows.
+    '''
+
+    def __init__(self, transactions=(), failures=()):
+        self.transactions = list(transactions)
+        self.failures = set(failures)
+        self.windows = []
+        self._lock = threading.Lock()
+
+    def get_transactions(self, start_date=None, end_date=None):
+        with self._lock:
+            self.windows.append((start_date, end_date))
+        if (start_date, end_date) in self.failures or 'all' in self.failures:
+            return None
+        return [transaction for transaction in self.transactions
+                if start_date[:19] <= transaction['time'][:19] < end_date[:19]]
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:09:40 2026
+
+@author: LC
+"""
+
+import asyncio
+from requests.adapters import HTTPAdapter
+
+
+def test_sync_session_is_pooled(make_api, server):
+    api = make_api(pool_maxsize=7)
+    adapter = api._session.get_adapter('https://api.schwabapi.com')
+    assert isinstance(adapter, HTTPAdapter)
+    assert adapter._pool_maxsize == 7
+
+    api.get_quote('SPY')
+    session = api._session
+    api.get_quote('QQQ')
+    assert api._session is session
+    assert server.count('/marketdata/v1/SPY/quotes') == 1
+
+
+def test_async_session_is_created_once_per_loop(make_async_api):
+
+    async def run():
+        api = await make_async_api(pool_maxsize=5, limit_per_host=3)
+        session = api._get_async_session()
+        await asyncio.gather(*[api.get_quote(symbol) for symbol in ('A', 'B', 'C')])
+        assert api._get_async_session() is session
+        assert session.connector.limit == 5
+        assert session.connector.limit_per_host == 3
+        await api.aclose()
+        assert session.closed
+
+    asyncio.run(run())
+
+
+def test_close_releases_sessions(make_api):
+    api = make_api()
+    api.close()
+    assert api._auth.stopped
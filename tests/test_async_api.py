@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:14:02 2026
+
+@author: LC
+"""
+
+import asyncio
+import pytest
+from aiohttp import web
+from fakes import ACCOUNT_HASH
+
+
+def test_create_loads_principals_and_account_hash(make_async_api, server):
+
+    async def run():
+        api = await make_async_api()
+        assert api.account_hash == ACCOUNT_HASH
+        assert api.principals['streamerInfo']
+        with pytest.raises(TypeError, match='aclose'):
+            api.close()
+        assert not api._async_session.closed
+        await api.aclose()
+        assert api._async_session is None
+
+    asyncio.run(run())
+    assert server.count('/trader/v1/userPreference') == 1
+    assert server.count('/trader/v1/accounts/accountNumbers') == 1
+
+
+def test_endpoints_are_awaitable_and_concurrent(make_async_api, server):
+    active = []
+    peak = []
+
+    async def slow_quote(request):
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.05)
+        active.pop()
+        return web.json_response({'symbol': request.match_info['tail']})
+
+    server.routes['/marketdata/v1/A/quotes'] = slow_quote
+    server.routes['/marketdata/v1/B/quotes'] = slow_quote
+
+    async def run():
+        async with await make_async_api() as api:
+            results = await asyncio.gather(api.get_quote('A'), api.get_quote('B'))
+        assert len(results) == 2
+        assert api._async_session is None
+
+    asyncio.run(run())
+    assert max(peak) == 2
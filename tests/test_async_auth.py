@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 05:21:36 2026
+
+@author: LC
+"""
+
+import time
+import asyncio
+from datetime import datetime
+import pytest
+from fakes import CONFIG, token_store
+from schwab_async_auth import AsyncSchwabAuth
+
+
+class AsyncTokenEndpoint:
+    '''
+    Stand-in for AsyncSchwabAuth._request_token_async, answers after delay seconds.
+    '''
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.fail = False
+        self.requests = 0
+
+    async def __call__(self, grant_type, extra_payload):
+        self.requests += 1
+        count = self.requests
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            return None
+        return {'access_token': f'access_token{count}', 'refresh_token': 'refresh'}
+
+
+@pytest.fixture
+def auth(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(AsyncSchwabAuth, '_obtain_access_code',
+                        lambda self: pytest.fail('interactive login'))
+    auth = AsyncSchwabAuth(dict(CONFIG), token_store=token_store(tmp_path / 'tokens.json'))
+    auth.endpoint = AsyncTokenEndpoint()
+    auth._request_token_async = auth.endpoint
+    yield auth
+    auth.stop_refresher()
+
+
+def expire(auth):
+    auth._tokens['access_expiration'] = datetime.now()
+    auth._access_deadline = auth._headers_deadline = time.monotonic()
+
+
+def test_concurrent_tasks_share_one_refresh(auth):
+    expire(auth)
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            for _ in range(5):
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        results = await asyncio.gather(tick(), *(auth.get_headers_async() for _ in range(20)))
+        return ticks, results[1:]
+
+    ticks, headers = asyncio.run(run())
+
+    assert auth.endpoint.requests == 1
+    assert all(header == {'Authorization': 'Bearer access_token1'} for header in headers)
+    # The event loop kept running during the token request
+    assert ticks == 5
+    assert auth.refresh_stats()['refreshes'] == 1
+    # Renewed token is in the store for the other processes
+    assert auth._token_store.load()['access_token'] == 'access_token1'
+
+
+def test_valid_header_needs_no_refresh(auth):
+    assert asyncio.run(auth.get_headers_async()) == {'Authorization': 'Bearer stored'}
+    assert auth.endpoint.requests == 0
+
+
+def test_sync_get_headers_raises(auth):
+    with pytest.raises(TypeError, match='get_headers_async'):
+        auth.get_headers()
+    assert auth.endpoint.requests == 0
+
+
+def test_refresher_task_renews_in_the_loop(auth, monkeypatch):
+    monkeypatch.setattr(AsyncSchwabAuth, 'REFRESH_MARGIN', 1800 - 0.05)
+
+    async def run():
+        auth.start_refresher()
+        assert auth._refresher_task is not None and auth._refresher is None
+        while auth.endpoint.requests < 2:
+            await asyncio.sleep(0.01)
+        headers = await auth.get_headers_async()
+        await auth.aclose()
+        return headers
+
+    assert asyncio.run(run())['Authorization'].startswith('Bearer access_token')
+    assert auth._refresher_task is None
+
+
+def test_failed_refresh_falls_back_to_login(auth, monkeypatch):
+    logins = []
+    monkeypatch.setattr(AsyncSchwabAuth, '_obtain_refresh_token',
+                        lambda self: logins.append(1))
+    auth.endpoint.fail = True
+    expire(auth)
+
+    asyncio.run(auth.get_headers_async())
+    assert auth.endpoint.requests == 1 and logins == [1]
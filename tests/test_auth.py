@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 04:38:15 2026
+
+@author: LC
+"""
+
+import time
+import threading
+from datetime import datetime
+import pytest
+from fakes import CONFIG, TokenEndpoint, token_store
+from schwab_auth import SchwabAuth
+
+
+@pytest.fixture
+def endpoint(tmp_path, monkeypatch):
+    '''
+    Token endpoint stand-in. Interactive logins are recorded in endpoint.logins
+    and fail (no access code).
+    '''
+    monkeypatch.chdir(tmp_path)
+    fake = TokenEndpoint()
+    fake.logins = 0
+
+    def login(auth):
+        fake.logins += 1
+        return None
+
+    monkeypatch.setattr(SchwabAuth, '_request_token',
+                        lambda auth, grant_type, extra_payload: fake(auth, grant_type,
+                                                                     extra_payload))
+    monkeypatch.setattr(SchwabAuth, '_obtain_access_code', login)
+    return fake
+
+
+@pytest.fixture
+def make_auth(tmp_path, endpoint):
+    auths = []
+
+    def factory(access_in=1800.0, refresh_in=7 * 86400.0, **kwargs):
+        store = token_store(tmp_path / 'tokens.json', access_in, refresh_in)
+        auth = SchwabAuth(dict(CONFIG), token_store=store, **kwargs)
+        auths.append(auth)
+        return auth
+
+    yield factory
+    for auth in auths:
+        auth.stop_refresher(5)
+
+
+def expire(auth):
+    auth._tokens['access_expiration'] = datetime.now()
+    auth._access_deadline = auth._headers_deadline = time.monotonic()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not met in time'
+        time.sleep(0.005)
+
+
+def test_stored_token_is_used_and_header_is_cached(make_auth, endpoint, monkeypatch):
+    auth = make_auth()
+    monkeypatch.setattr(auth, '_authenticate', lambda: pytest.fail('token checked'))
+
+    headers = auth.get_headers()
+    headers['Extra'] = 'x'
+    assert auth.get_headers() == {'Authorization': 'Bearer stored'}
+    assert endpoint.requests == 0 and endpoint.logins == 0
+
+
+def test_expiring_stored_token_is_refreshed_when_starting(make_auth, endpoint):
+    auth = make_auth(access_in=2)
+
+    assert auth.get_headers() == {'Authorization': 'Bearer access_token1'}
+    assert endpoint.requests == 1
+    # A second client of the same store takes the renewed token
+    other = SchwabAuth(dict(CONFIG), token_store=auth._token_store)
+    assert other.get_headers() == {'Authorization': 'Bearer access_token1'}
+    assert endpoint.requests == 1
+
+
+def test_expired_header_is_refreshed_once(make_auth, endpoint):
+    auth = make_auth()
+    expire(auth)
+
+    assert auth.get_headers() == {'Authorization': 'Bearer access_token1'}
+    assert auth.get_headers() == {'Authorization': 'Bearer access_token1'}
+    assert endpoint.requests == 1
+    assert auth.refresh_stats()['refreshes'] == 1
+
+
+def test_background_refresher_renews_before_expiry(make_auth, endpoint, monkeypatch):
+    monkeypatch.setattr(SchwabAuth, 'REFRESH_MARGIN', 1800 - 0.05)
+    auth = make_auth(auto_refresh=True)
+
+    wait_for(lambda: endpoint.requests >= 2)
+    assert auth.get_headers()['Authorization'].startswith('Bearer access_token')
+    refresher = auth._refresher
+    auth.stop_refresher(5)
+    assert not refresher.is_alive() and auth._refresher is None
+
+
+def test_background_refresher_retries_failures(make_auth, endpoint, monkeypatch):
+    monkeypatch.setattr(SchwabAuth, 'REFRESH_MARGIN', 1800)
+    monkeypatch.setattr(SchwabAuth, 'REFRESH_RETRY', 0.01)
+    endpoint.fail = True
+    auth = make_auth(auto_refresh=True)
+
+    # Failures as recorded, a request only counted could still see fail reset
+    wait_for(lambda: auth.refresh_stats()['failures'] >= 3)
+    # The current token is still valid
+    assert auth.logged_in_state and auth.get_headers() == {'Authorization': 'Bearer stored'}
+    assert auth._refresher.is_alive()
+
+    endpoint.fail = False
+    wait_for(lambda: auth.get_headers()['Authorization'] != 'Bearer stored')
+
+
+def test_background_refresher_stops_when_a_login_is_needed(make_auth, endpoint, monkeypatch):
+    monkeypatch.setattr(SchwabAuth, 'REFRESH_MARGIN', 1800)
+    auth = make_auth(refresh_in=3600, auto_refresh=True)
+
+    wait_for(lambda: not auth._refresher.is_alive())
+    assert endpoint.requests == 0 and endpoint.logins == 0
+
+
+def test_refresher_joining_a_foreground_refresh_keeps_running(make_auth, endpoint,
+                                                              monkeypatch):
+    monkeypatch.setattr(SchwabAuth, 'REFRESH_MARGIN', 60)
+    endpoint.delay = 0.2
+    auth = make_auth()
+    expire(auth)
+
+    foreground = threading.Thread(target=auth.get_headers)
+    foreground.start()
+    wait_for(lambda: endpoint.requests == 1)
+    # The refresher finds the token expiring and joins the refresh in flight
+    auth.start_refresher()
+    foreground.join(5)
+    wait_for(lambda: auth._refresh_flight.shared == 1)
+    time.sleep(0.05)
+
+    assert endpoint.requests == 1
+    assert auth.get_headers() == {'Authorization': 'Bearer access_token1'}
+    assert auth._refresher.is_alive()
+
+
+def test_caller_joining_a_refresher_that_gives_up_logs_in(make_auth, endpoint):
+    auth = make_auth(refresh_in=3600)
+    expire(auth)
+    started = threading.Event()
+
+    def background_refresh():
+        started.set()
+        time.sleep(0.2)
+        return None                     # refresh token about to expire
+
+    refresher = threading.Thread(target=auth._refresh_flight.do,
+                                 args=('refresh', background_refresh))
+    refresher.start()
+    started.wait(5)
+    auth.get_headers()
+    refresher.join(5)
+
+    assert auth._refresh_flight.shared == 1
+    assert endpoint.logins == 1
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 03:44:09 2026
+
+@author: LC
+"""
+
+import os
+import threading
+import importlib.util
+from datetime import datetime, timedelta, timezone
+import pytest
+from fakes import FakeTransactionsApi
+from schwab_transaction_store import TransactionStore
+
+
+def _load_balances():
+    # The script name is not a valid module name
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'schwab_balances_v0.1.py')
+    spec = importlib.util.spec_from_file_location('schwab_balances', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+balances = _load_balances()
+
+
+def transaction(activity_id, time):
+    return {'activityId': activity_id, 'time': time, 'type': 'TRADE'}
+
+
+class FakeApi:
+    '''
+    get_transactions from {window start year: [transactions]}, failing the windows
+    listed in failures once (None) or always (failures value 'always').
+    '''
+
+    def __init__(self, by_year=None, failures=None):
+        self.by_year = by_year or {}
+        self.failures = dict(failures or {})
+        self.windows = []
+        self.lock = threading.Lock()
+
+    def get_transactions(self, start_date=None, end_date=None):
+        with self.lock:
+            self.windows.append((start_date, end_date))
+            failure = self.failures.get(end_date[:10])
+            if failure == 'once':
+                del self.failures[end_date[:10]]
+        if failure:
+            return None
+        return [item for item in self.by_year.get(end_date[:4], [])
+                if start_date <= item['time'] < end_date]
+
+
+END = datetime(2026, 10, 1, 12)       # same UTC date in any time zone
+
+
+def test_windows_stop_after_consecutive_empty_windows():
+    api = FakeApi({'2026': [transaction(2, '2026-09-01T10:00:00+0000'),
+                            transaction(1, '2026-05-01T10:00:00+0000')]})
+
+    results = balances.fetch_transaction_windows(api, end_date=END, window_days=180,
+                                                 max_workers=2, empty_windows_stop=3)
+
+    assert [len(window) for window in results] == [2, 0, 0, 0]
+    # 4 windows of 180 days (two batches of 2) instead of one per window back to 2000
+    assert len(api.windows) == 4
+    assert api.windows[0][1].startswith('2026-10-01') and api.windows[0][1].endswith('Z')
+    assert api.windows[0][0] == api.windows[1][1]
+    assert [item['activityId'] for item in results[0]] == [1, 2]
+
+
+def test_limit_date_bounds_the_history():
+    api = FakeApi()
+
+    results = balances.fetch_transaction_windows(api, end_date=END, window_days=365,
+                                                 limit_date=datetime(2024, 1, 1),
+                                                 empty_windows_stop=10)
+
+    assert len(results) == 3
+    assert api.windows[-1][0][:10] in ('2023-12-31', '2024-01-01')
+
+
+def test_empty_windows_before_the_first_transaction_do_not_stop():
+    # Only activity more than 2 years old
+    api = FakeApi({'2022': [transaction(1, '2022-03-01T10:00:00+0000')]})
+
+    results = balances.fetch_transaction_windows(api, end_date=END, window_days=180,
+                                                 max_workers=2, empty_windows_stop=4,
+                                                 limit_date=datetime(2018, 1, 1))
+
+    assert [item['activityId'] for window in results for item in window] == [1]
+    # stopped 4 windows after the transaction, before limit_date
+    assert sum(1 for window in results if window) == 1
+    assert '2019' <= api.windows[-1][0][:4] <= '2020'
+
+
+def test_two_year_gap_keeps_older_history():
+    # 3 years without activity between the two transactions, default windows
+    api = FakeApi({'2026': [transaction(2, '2026-09-01T10:00:00+0000')],
+                   '2023': [transaction(1, '2023-06-01T10:00:00+0000')]})
+
+    results = balances.fetch_transaction_windows(api, end_date=END)
+
+    assert sorted(item['activityId'] for window in results for item in window) == [1, 2]
+
+
+def test_failed_window_is_retried_once_then_raises():
+    limit_date = END - timedelta(days=180)
+    api = FakeApi(failures={'2026-10-01': 'once'})
+    balances.fetch_transaction_windows(api, end_date=END, max_workers=1,
+                                       limit_date=limit_date)
+    assert len(api.windows) == 2
+
+    api = FakeApi(failures={'2026-10-01': 'always'})
+    with pytest.raises(RuntimeError):
+        balances.fetch_transaction_windows(api, end_date=END, max_workers=1,
+                                           limit_date=limit_date)
+
+
+def test_load_all_transactions_dedupes_and_writes_the_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(balances, 'datetime', type('datetime', (datetime,),
+                                                   {'now': staticmethod(lambda: END)}))
+    repeated = transaction(2, '2026-09-01T10:00:00+0000')
+    api = FakeApi({'2026': [repeated, repeated, transaction(1, '2026-05-01T10:00:00+0000')]})
+    path = str(tmp_path / 'AllTransactions.json')
+
+    transactions = balances.load_all_transactions(api, path, max_workers=2)
+
+    assert [item['activityId'] for item in transactions] == [1, 2]
+    assert balances.read_json_file(path) == transactions
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TransactionStore(str(tmp_path / 'transactions.db'))
+    yield store
+    store.close()
+
+
+RECENT = transaction(5, (datetime.now(timezone.utc) - timedelta(days=10)
+                         ).strftime('%Y-%m-%dT%H:%M:%S+0000'))
+
+
+@pytest.mark.parametrize('content', ['', '[]', None])
+def test_first_sync_without_usable_file_downloads_the_history(store, tmp_path, content):
+    path = tmp_path / 'AllTransactions.json'
+    if content is not None:
+        path.write_text(content)
+    api = FakeTransactionsApi([RECENT])
+
+    transactions = balances.sync_transactions(api, store, str(path), max_workers=2)
+
+    assert [item['activityId'] for item in transactions] == [5]
+    # history windows back until the empty windows stop, not one request
+    assert len(api.windows) >= 4
+    assert store.watermark() > datetime.now(timezone.utc) - timedelta(minutes=1)
+
+
+def test_first_sync_downloads_history_older_than_two_years(store):
+    old = transaction(3, (datetime.now(timezone.utc) - timedelta(days=3 * 365)
+                          ).strftime('%Y-%m-%dT%H:%M:%S+0000'))
+    api = FakeTransactionsApi([old])
+
+    transactions = balances.sync_transactions(api, store, max_workers=2)
+
+    assert [item['activityId'] for item in transactions] == [3]
+    assert store.watermark() > datetime.now(timezone.utc) - timedelta(minutes=1)
+
+
+def test_failed_first_sync_sets_no_watermark(store):
+    api = FakeTransactionsApi([RECENT], failures=['all'])
+
+    with pytest.raises(RuntimeError):
+        balances.sync_transactions(api, store, max_workers=2)
+
+    assert store.watermark() is None
+    api.failures.clear()
+    assert [item['activityId'] for item in balances.sync_transactions(api, store)] == [5]
+    assert store.watermark() is not None
+
+
+def test_first_sync_from_file_uses_its_modification_time(store, tmp_path):
+    path = tmp_path / 'AllTransactions.json'
+    balances.write_json_file([transaction(1, '2025-01-02T10:00:00+0000')], str(path))
+    written = datetime.now(timezone.utc) - timedelta(days=20)
+    os.utime(path, (written.timestamp(), written.timestamp()))
+    api = FakeTransactionsApi([RECENT])
+
+    transactions = balances.sync_transactions(api, store, str(path))
+
+    assert [item['activityId'] for item in transactions] == [1, 5]
+    # one request from the file time (minus the overlap), not from its newest transaction
+    assert len(api.windows) == 1
+    start = datetime.strptime(api.windows[0][0], '%Y-%m-%dT%H:%M:%S.%fZ')
+    assert abs(start.replace(tzinfo=timezone.utc)
+               - (written - store.overlap)) < timedelta(seconds=2)
+
+
+def test_later_syncs_only_request_new_transactions(store):
+    store.set_watermark(datetime.now(timezone.utc) - timedelta(days=1))
+    api = FakeTransactionsApi([RECENT])
+
+    balances.sync_transactions(api, store, 'missing.json')
+    assert len(api.windows) == 1
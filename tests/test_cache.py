@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:38:47 2026
+
+@author: LC
+"""
+
+import os
+import stat
+import time
+import pytest
+from schwab_enum import Market
+from schwab_cache import DiskCacheBackend, MemoryCacheBackend, ResponseCache
+
+
+@pytest.fixture(params=['memory', 'disk'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryCacheBackend(max_entries=3, max_bytes=1000)
+    return DiskCacheBackend(str(tmp_path / 'cache'), max_entries=3, max_bytes=1000)
+
+
+def test_ttl_expiry(backend, monkeypatch):
+    backend.set('key', b'{"a":1}', ttl=10)
+    assert backend.get('key') == b'{"a":1}'
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 11)
+    assert backend.get('key') is None
+    assert len(backend) == 0
+
+
+def test_least_recently_used_entry_is_evicted(backend):
+    for key in ('a', 'b', 'c'):
+        backend.set(key, b'1', ttl=60)
+        time.sleep(0.01)
+    backend.get('a')
+    time.sleep(0.01)
+    backend.set('d', b'1', ttl=60)
+    assert backend.get('b') is None
+    assert all(backend.get(key) == b'1' for key in ('a', 'c', 'd'))
+
+
+def test_byte_budget_counts_encoded_bytes():
+    backend = MemoryCacheBackend(max_bytes=100)
+    cache = ResponseCache(backend, ttls={'endpoint': 60})
+    value = {'name': 'é' * 30}
+    cache.set('endpoint', 'first', value)
+    assert backend.size == len('{"name":""}') + 60
+    cache.set('endpoint', 'second', value)
+    assert backend.size <= 100
+    assert cache.get('endpoint', 'first') == (False, None)
+    assert cache.get('endpoint', 'second') == (True, value)
+
+
+def test_oversized_value_is_not_stored(backend):
+    backend.set('big', b'x' * 1001, ttl=60)
+    assert backend.get('big') is None
+
+
+def test_response_cache_hits_and_uncached_endpoints():
+    cache = ResponseCache()
+    key = cache.make_key('get_market_hours', 'get', 'url', {'markets': 'equity', 'date': None})
+    assert key == cache.make_key('get_market_hours', 'GET', 'url', {'markets': 'equity'})
+    assert cache.get('get_market_hours', key) == (False, None)
+    cache.set('get_market_hours', key, {'equity': {}})
+    assert cache.get('get_market_hours', key) == (True, {'equity': {}})
+    cache.set('get_quotes', 'quotes', {'SPY': {}})
+    assert cache.ttl('get_quotes') is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_api_serves_cached_endpoint_without_request(make_api, server):
+    api = make_api(cache=ResponseCache())
+    first = api.get_market_hours(Market.EQUITY)
+    assert api.get_market_hours(Market.EQUITY) == first
+    assert sum('/markets/' in path for _, path, _ in server.hits) == 1
+
+
+def test_disk_entries_are_only_readable_by_the_owner(tmp_path):
+    backend = DiskCacheBackend(str(tmp_path / 'cache'))
+    backend.set('get_account_numbers', b'[{"hashValue":"HASH"}]', ttl=10)
+
+    assert stat.S_IMODE(os.stat(backend.directory).st_mode) == 0o700
+    names = os.listdir(backend.directory)
+    assert len(names) == 1 and names[0].endswith('.json')
+    path = os.path.join(backend.directory, names[0])
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert backend.get('get_account_numbers') == b'[{"hashValue":"HASH"}]'
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 00:04:12 2026
+
+@author: LC
+"""
+
+import json
+import numpy as np
+import pytest
+import schwab_codec
+from schwab_candles import (CANDLE_DTYPE, CANDLE_TIME_DTYPE, _decode_candle_numbers,
+                            array_to_candles, decode_candles, decode_history)
+from schwab_enum import OutputFormat
+
+
+CANDLES = [{'open': 500.25 + i, 'high': 501.0, 'low': 499.5, 'close': 1e-3 * i,
+            'volume': 12000 + i, 'datetime': 1760000000000 + i * 60000} for i in range(50)]
+
+
+def payload(candles=CANDLES, **kwargs):
+    return json.dumps({'symbol': 'SPY', 'empty': False, 'previousClose': 499.0,
+                       'candles': candles}, separators=(',', ':'), **kwargs).encode()
+
+
+@pytest.fixture(params=schwab_codec.available_codecs())
+def codec(request):
+    previous = schwab_codec.get_codec().name
+    schwab_codec.set_codec(request.param)
+    yield request.param
+    schwab_codec.set_codec(previous)
+
+
+def test_candles_are_parsed_into_the_array_without_objects(codec):
+    rest, candles = _decode_candle_numbers(payload())
+    assert json.loads(rest)['candles'] == []
+    assert candles.dtype == CANDLE_DTYPE
+    assert array_to_candles(candles) == CANDLES
+
+    response = decode_candles(payload())
+    assert response['candles'].dtype == CANDLE_TIME_DTYPE
+    assert response['previousClose'] == 499.0 and response['symbol'] == 'SPY'
+    assert array_to_candles(response['candles']) == CANDLES
+
+
+def test_candles_in_another_key_order_use_the_object_hook(codec):
+    candles = CANDLES[:1] + [dict(reversed(list(CANDLES[1].items())))]
+    assert _decode_candle_numbers(payload(candles)) is None
+    assert array_to_candles(decode_candles(payload(candles))['candles']) == CANDLES[:2]
+
+
+@pytest.mark.parametrize('candles', [
+    CANDLES[:1] + [dict(CANDLES[1], volume=None)],
+    [{key: value for key, value in CANDLES[0].items() if key != 'volume'}],
+])
+def test_non_numeric_or_missing_fields_are_not_parsed_as_numbers(candles):
+    assert _decode_candle_numbers(payload(candles)) is None
+
+
+def test_formatted_and_empty_responses(codec):
+    response = decode_candles(payload(indent=2).decode())
+    assert array_to_candles(response['candles']) == CANDLES
+    assert len(decode_candles(payload([]))['candles']) == 0
+
+
+def test_history_output_formats():
+    assert decode_history(b'', OutputFormat.NUMPY) is None
+    array = decode_history(payload(), OutputFormat.NUMPY)
+    assert array['datetime'][0] == np.datetime64(CANDLES[0]['datetime'], 'ms')
+    frame = decode_history(payload(), OutputFormat.PANDAS)
+    assert list(frame.columns) == list(CANDLE_DTYPE.names)
+    assert frame.attrs['symbol'] == 'SPY'
+    assert decode_history(payload(), OutputFormat.JSON)['candles'] == CANDLES
+    assert decode_history(payload(), OutputFormat.MODEL)['candles'][0].volume == 12000
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:47:20 2026
+
+@author: LC
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from schwab_api import SchwabApi
+
+
+async def slow_quote(request):
+    await asyncio.sleep(0.1)
+    return web.json_response({'symbol': 'SPY'})
+
+
+def test_identical_gets_from_threads_share_one_request(make_api, server):
+    server.routes['/marketdata/v1/SPY/quotes'] = slow_quote
+    api = make_api()
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: api.get_quote('SPY'), range(8)))
+
+    assert results == [{'symbol': 'SPY'}] * 8
+    assert server.count('/marketdata/v1/SPY/quotes') == 1
+    assert api._flights.shared == 7
+
+
+def test_identical_gets_from_tasks_share_one_request(make_async_api, server):
+    server.routes['/marketdata/v1/SPY/quotes'] = slow_quote
+
+    async def run():
+        async with await make_async_api() as api:
+            return await asyncio.gather(*[api.get_quote('SPY') for _ in range(8)])
+
+    assert len(asyncio.run(run())) == 8
+    assert server.count('/marketdata/v1/SPY/quotes') == 1
+
+
+def test_coalescing_can_be_disabled(make_api, server):
+    server.routes['/marketdata/v1/SPY/quotes'] = slow_quote
+    api = make_api(coalesce_requests=False)
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda _: api.get_quote('SPY'), range(4)))
+    assert server.count('/marketdata/v1/SPY/quotes') == 4
+
+
+def test_only_identical_gets_are_coalesced():
+    key = SchwabApi._flight_key('get', 'https://host/v1/', '/quotes', {'params': {'a': 1, 'b': 2}})
+    assert key == SchwabApi._flight_key('GET', 'https://host/v1/', 'quotes',
+                                        {'params': {'b': 2, 'a': 1}})
+    assert key != SchwabApi._flight_key('get', 'https://host/v1/', '/quotes',
+                                        {'params': {'a': 1, 'b': 3}})
+    assert SchwabApi._flight_key('post', 'https://host/v1/', '/orders', {}) is None
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 01:52:18 2026
+
+@author: LC
+"""
+
+import json
+import asyncio
+import numpy as np
+import pytest
+from aiohttp import web
+import schwab_api
+import schwab_codec
+
+
+@pytest.fixture(params=schwab_codec.available_codecs())
+def codec(request):
+    previous = schwab_codec.get_codec().name
+    schwab_codec.set_codec(request.param)
+    yield request.param
+    schwab_codec.set_codec(previous)
+
+
+def test_round_trip_and_errors(codec):
+    obj = {'symbol': 'SPY', 'price': 500.25, 'quantity': 3, 'legs': [None, True]}
+    encoded = schwab_codec.dumps_bytes(obj)
+
+    assert isinstance(encoded, bytes) and b' ' not in encoded
+    assert schwab_codec.loads(encoded) == obj
+    assert schwab_codec.loads(schwab_codec.dumps(obj)) == obj
+    with pytest.raises(schwab_codec.get_codec().errors):
+        schwab_codec.loads(b'{"symbol": ')
+    assert schwab_codec.loads_lenient('{"text":"a\tb"}') == {'text': 'a\tb'}
+
+
+def test_numpy_values_are_serialized(codec):
+    order = {'price': np.float64(500.25), 'quantity': np.int64(3), 'flag': np.bool_(True),
+             'strikes': np.array([490.0, 500.0])}
+
+    assert json.loads(schwab_codec.dumps_bytes(order)) == {
+        'price': 500.25, 'quantity': 3, 'flag': True, 'strikes': [490.0, 500.0]}
+    with pytest.raises(TypeError):
+        schwab_codec.dumps_bytes({'value': object()})
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        schwab_codec.make_codec('simplejson')
+
+
+def test_empty_json_body_returns_the_response(make_api, make_async_api, server, codec):
+    server.routes[('POST', '/trader/v1/created')] = lambda request: web.Response(
+        status=201, content_type='application/json',
+        headers={'Location': '/trader/v1/accounts/HASH/orders/42'})
+
+    response = make_api()._make_request('post', schwab_api.BASE_TRADER_URL, 'created')
+    assert response.status_code == 201
+    assert response.headers['Location'].endswith('/orders/42')
+
+    async def run():
+        async with await make_async_api() as api:
+            return await api._make_request('post', schwab_api.BASE_TRADER_URL, 'created')
+
+    response = asyncio.run(run())
+    assert response.status == 201
+    assert response.headers['Location'].endswith('/orders/42')
+
+
+def test_invalid_json_body_returns_none(make_api, make_async_api, server, codec):
+    server.routes['/trader/v1/broken'] = lambda request: web.Response(
+        body=b'{"symbol": ', content_type='application/json')
+
+    assert make_api()._make_request('get', schwab_api.BASE_TRADER_URL, 'broken') is None
+
+    async def run():
+        async with await make_async_api() as api:
+            return await api._make_request('get', schwab_api.BASE_TRADER_URL, 'broken')
+
+    assert asyncio.run(run()) is None
+
+
+def test_request_errors_that_are_value_errors_return_none(make_api, codec):
+    # requests.InvalidURL is also a ValueError, the stdlib codec error
+    assert make_api()._make_request('post', 'http://', 'orders') is None
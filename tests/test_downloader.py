@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 00:15:48 2026
+
+@author: LC
+"""
+
+import os
+import asyncio
+from datetime import datetime
+import numpy as np
+from schwab_candles import CANDLE_DTYPE, CANDLE_TIME_DTYPE
+from schwab_downloader import HistoryDownloader, _read_symbols
+from schwab_enum import Frequency, FrequencyType
+
+START, END = datetime(2026, 1, 1), datetime(2026, 1, 2)
+JOB = (FrequencyType.DAY_MINUTE, Frequency.MINUTE_1, START, END)
+
+
+class FakeHistoryApi:
+    '''
+    get_pricehistory_dates returning 3 candles, failing for the symbols in fail.
+    '''
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.calls = []
+
+    def get_pricehistory_dates(self, symbol, **kwargs):
+        self.calls.append(symbol)
+        if symbol in self.fail:
+            raise ConnectionError('reset')
+        if symbol == 'EMPTY':
+            return np.empty(0, dtype=CANDLE_TIME_DTYPE)
+        candles = np.zeros(3, dtype=CANDLE_DTYPE)
+        candles['datetime'] = [1, 2, 3]
+        return candles.view(CANDLE_TIME_DTYPE)
+
+
+class FakeAsyncHistoryApi(FakeHistoryApi):
+
+    async def get_pricehistory_dates(self, symbol, **kwargs):
+        await asyncio.sleep(0)
+        return FakeHistoryApi.get_pricehistory_dates(self, symbol, **kwargs)
+
+
+def test_download_writes_files_and_resumes_failed_symbols(tmp_path):
+    api = FakeHistoryApi(fail={'BAD'})
+    downloader = HistoryDownloader(api, str(tmp_path), max_workers=3)
+    report = downloader.download(['SPY', 'QQQ', 'BAD', 'EMPTY', 'SPY'], *JOB)
+
+    assert (report['ok'], report['empty'], report['failed']) == (2, 1, 1)
+    assert report['candles'] == 6
+    assert 'ConnectionError' in report['errors']['BAD']
+    assert np.load(downloader.symbol_path('SPY'))['datetime'].tolist() == [1, 2, 3]
+
+    api.fail.clear()
+    api.calls.clear()
+    report = downloader.download(['SPY', 'QQQ', 'BAD', 'EMPTY'], *JOB)
+    assert api.calls == ['BAD']
+    assert report['skipped'] == 3 and report['ok'] == 1
+
+
+def test_checkpoint_of_another_job_or_no_resume_starts_over(tmp_path):
+    api = FakeHistoryApi()
+    downloader = HistoryDownloader(api, str(tmp_path))
+    downloader.download(['SPY'], *JOB)
+    downloader.download(['SPY'], FrequencyType.DAY_MINUTE, Frequency.MINUTE_5, START, END)
+    downloader.download(['SPY'], *JOB, resume=False)
+    assert api.calls == ['SPY'] * 3
+
+
+def test_cut_checkpoint_line_is_ignored(tmp_path):
+    downloader = HistoryDownloader(FakeHistoryApi(), str(tmp_path))
+    downloader.download(['SPY', 'QQQ'], *JOB)
+    with open(downloader.checkpoint_path, 'a', encoding='utf-8') as file:
+        file.write('{"symbol": "IWM", "sta')
+    job = downloader._job(*JOB, True)
+    assert set(downloader.load_checkpoint(job)) == {'SPY', 'QQQ'}
+
+
+def test_symbols_are_normalized_from_both_inputs(tmp_path):
+    path = tmp_path / 'symbols.txt'
+    path.write_text('# universe\nspy\n  qqq \n\n')
+    args = type('Args', (), {'symbols': ['spy', ' Aapl'], 'symbols_file': str(path)})
+
+    symbols = _read_symbols(args)
+
+    assert symbols == ['SPY', 'AAPL', 'SPY', 'QQQ']
+    downloader = HistoryDownloader(FakeHistoryApi(), str(tmp_path / 'out'))
+    assert downloader.download(symbols, *JOB)['symbols'] == 3
+
+
+def test_download_async(tmp_path):
+    downloader = HistoryDownloader(FakeAsyncHistoryApi(fail={'BAD'}), str(tmp_path),
+                                   max_workers=2)
+    report = asyncio.run(downloader.download_async(['SPY', 'QQQ', 'BAD'], *JOB))
+    assert report['ok'] == 2 and report['failed'] == 1
+    assert os.path.isfile(downloader.symbol_path('QQQ'))
+    assert report['seconds']['max'] >= report['seconds']['p50']
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:53:36 2026
+
+@author: LC
+"""
+
+from datetime import datetime, timedelta
+import numpy as np
+from aiohttp import web
+from schwab_enum import Frequency, FrequencyType, OutputFormat
+from schwab_history_store import DAY_MS, HistoryStore
+
+HOUR_MS = 3600000
+
+
+def candles(start_ms, end_ms, step=HOUR_MS, close=1.0):
+    first = -(-start_ms // step) * step
+    return [{'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': close, 'volume': 10,
+             'datetime': stamp} for stamp in range(first, end_ms + 1, step)]
+
+
+def history_handler(request):
+    start, end = int(request.query['startDate']), int(request.query['endDate'])
+    return web.json_response({'symbol': request.query['symbol'], 'empty': False,
+                              'candles': candles(start, end)})
+
+
+def test_missing_ranges_and_merge(tmp_path):
+    store = HistoryStore(str(tmp_path), settle_ms=0)
+    partition = store.partition('BRK/B', 'minute', 1, True)
+    assert partition.endswith('BRK_B')
+    assert store.missing_ranges(partition, 0, 10 * HOUR_MS) == [(0, 10 * HOUR_MS)]
+
+    store.add(partition, 2 * HOUR_MS, 5 * HOUR_MS, candles(2 * HOUR_MS, 5 * HOUR_MS))
+    store.add(partition, 5 * HOUR_MS + 1, 7 * HOUR_MS,
+              candles(5 * HOUR_MS, 7 * HOUR_MS, close=3.0))
+    assert store.coverage(partition) == [[2 * HOUR_MS, 7 * HOUR_MS]]
+    assert store.missing_ranges(partition, 0, 10 * HOUR_MS) == [
+        (0, 2 * HOUR_MS - 1), (7 * HOUR_MS + 1, 10 * HOUR_MS)]
+
+    stored = store.read(partition, 0, 10 * HOUR_MS)
+    assert list(stored['datetime']) == [hour * HOUR_MS for hour in range(2, 8)]
+    # The newer download replaces the candle stored with the same datetime
+    assert stored['close'][3] == 3.0
+    assert store.read_candles(partition, 3 * HOUR_MS, 3 * HOUR_MS)[0]['datetime'] == 3 * HOUR_MS
+
+
+def test_recent_candles_are_not_marked_covered(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    partition = store.partition('SPY', 'minute', 1, False)
+    now_ms = int(datetime.now().timestamp() * 1000)
+    store.add(partition, now_ms - 3 * DAY_MS, now_ms, candles(now_ms - 3 * DAY_MS, now_ms))
+    coverage = store.coverage(partition)
+    assert coverage[0][1] < now_ms - DAY_MS + 60000
+    assert store.missing_ranges(partition, now_ms - 3 * DAY_MS, now_ms)[0][1] == now_ms
+
+
+def test_api_downloads_only_missing_ranges(make_api, server, tmp_path):
+    server.routes['/marketdata/v1/pricehistory'] = history_handler
+    api = make_api(history_store=HistoryStore(str(tmp_path), settle_ms=0))
+    end = datetime(2026, 1, 10)
+
+    first = api.get_pricehistory_dates('SPY', FrequencyType.DAY_MINUTE, Frequency.MINUTE_1,
+                                       end_date=end, start_date=end - timedelta(days=2),
+                                       output_format=OutputFormat.NUMPY)
+    second = api.get_pricehistory_dates('SPY', FrequencyType.DAY_MINUTE, Frequency.MINUTE_1,
+                                        end_date=end, start_date=end - timedelta(days=4),
+                                        output_format=OutputFormat.NUMPY)
+
+    requests = [query for _, path, query in server.hits if path == '/marketdata/v1/pricehistory']
+    assert len(requests) == 2
+    epoch = datetime.utcfromtimestamp(0)
+    assert int(requests[1]['endDate']) < (end - timedelta(days=2) - epoch).total_seconds() * 1000
+    assert len(second) == 4 * 24 + 1 and len(first) == 2 * 24 + 1
+    assert second.dtype['datetime'] == np.dtype('M8[ms]')
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 05:48:12 2026
+
+@author: LC
+"""
+
+import threading
+import pytest
+from aiohttp import web
+from fakes import ACCOUNT_HASH
+from schwab_api import SchwabApi
+from schwab_cache import DiskCacheBackend, ResponseCache
+from schwab_retry import RetryPolicy
+
+
+PREFERENCE = '/trader/v1/userPreference'
+ACCOUNT_NUMBERS = '/trader/v1/accounts/accountNumbers'
+
+
+def test_eager_init_loads_both_at_startup(make_api, server):
+    api = make_api()
+
+    assert server.count(PREFERENCE) == 1 and server.count(ACCOUNT_NUMBERS) == 1
+    assert api.account_hash == ACCOUNT_HASH
+    assert server.count(ACCOUNT_NUMBERS) == 1
+
+
+def test_lazy_init_loads_once_on_first_use(make_api, server):
+    api = make_api(lazy_init=True)
+    assert server.hits == []
+
+    threads = [threading.Thread(target=lambda: api.account_hash) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert api.account_hash == ACCOUNT_HASH
+    assert api.principals['streamerInfo']
+    assert server.count(PREFERENCE) == 1 and server.count(ACCOUNT_NUMBERS) == 1
+
+
+@pytest.mark.parametrize('failure', [
+    lambda request: web.Response(status=500),
+    lambda request: web.Response(text='maintenance'),            # the Response
+    lambda request: web.json_response({'errors': ['unavailable']}),
+    lambda request: web.json_response([]),
+])
+def test_failed_init_is_not_retried_on_every_access(make_api, server, monkeypatch, failure):
+    server.routes[ACCOUNT_NUMBERS] = failure
+    api = make_api(lazy_init=True, retry_policy=RetryPolicy(max_retries=0))
+
+    for _ in range(5):
+        assert api.account_hash is None
+    assert server.count(ACCOUNT_NUMBERS) == 1
+    assert api.principals is not None           # kept from the failed load
+    assert server.count(PREFERENCE) == 1
+
+    # Once the backoff is over the next access loads again
+    server.default_routes()
+    monkeypatch.setattr(api, '_init_retry_at', 0.0)
+    assert api.account_hash == ACCOUNT_HASH
+    assert server.count(ACCOUNT_NUMBERS) == 2
+
+
+def test_disk_cache_serves_a_restarted_process(make_api, server, tmp_path):
+    directory = str(tmp_path / 'cache')
+    first = make_api(lazy_init=True, cache=ResponseCache(DiskCacheBackend(directory)))
+    assert first.account_hash == ACCOUNT_HASH
+
+    second = make_api(lazy_init=True, cache=ResponseCache(DiskCacheBackend(directory)))
+    assert second.account_hash == ACCOUNT_HASH and second.principals['streamerInfo']
+    assert server.count(PREFERENCE) == 1 and server.count(ACCOUNT_NUMBERS) == 1
+
+
+def test_cache_keys_are_scoped_by_user():
+    assert 'get_account_numbers' in SchwabApi.USER_CACHED_ENDPOINTS
+    assert 'get_user_preference' in SchwabApi.USER_CACHED_ENDPOINTS
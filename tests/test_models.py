@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 02:10:44 2026
+
+@author: LC
+"""
+
+import copy
+import pickle
+import pytest
+from aiohttp import web
+from schwab_enum import OutputFormat
+from schwab_models import Account, Order, Quote, QuoteData, to_models, quotes_to_models
+
+
+QUOTE = {'assetMainType': 'EQUITY', 'symbol': 'SPY', 'realtime': True,
+         'quote': {'52WeekHigh': 510.0, 'lastPrice': 500.25, 'bidPrice': 500.2,
+                   'newField': 1}}
+
+ACCOUNT = {'securitiesAccount': {
+    'type': 'MARGIN', 'accountNumber': '123',
+    'positions': [{'longQuantity': 10.0, 'shortQuantity': 0.0,
+                   'instrument': {'symbol': 'SPY', 'assetType': 'EQUITY'}},
+                  {'longQuantity': 0.0, 'shortQuantity': 2.0,
+                   'instrument': {'symbol': 'QQQ', 'assetType': 'EQUITY'}}],
+    'orderStrategies': [{'orderId': 1, 'status': 'WORKING', 'orderStrategyType': 'TRIGGER',
+                         'orderLegCollection': [{'instruction': 'BUY', 'quantity': 1,
+                                                 'instrument': {'symbol': 'SPY'}}],
+                         'childOrderStrategies': [{'orderId': 2, 'orderLegCollection': [
+                             {'instruction': 'SELL', 'instrument': {'symbol': 'SPY'}}]}]}]}}
+
+
+def test_fields_nested_models_and_renamed_keys():
+    quote = Quote.from_dict(QUOTE)
+
+    assert quote.symbol == 'SPY' and quote.realtime is True
+    assert isinstance(quote.quote, QuoteData)
+    assert quote.quote.lastPrice == 500.25
+    assert quote.quote.week52High == 510.0
+    assert quote.quote.askPrice is None          # missing field
+    assert 'askPrice' not in quote.quote.to_dict()
+    assert 'Quote(' in repr(quote)
+
+
+def test_to_dict_returns_the_source_dict():
+    for model, data in ((Quote, QUOTE), (Account, ACCOUNT)):
+        assert model.from_dict(data).to_dict() == data
+
+
+def test_unknown_attributes_raise():
+    with pytest.raises(AttributeError):
+        Quote.from_dict(QUOTE).newField
+
+
+def test_pickle_copy_and_equality():
+    account = Account.from_dict(ACCOUNT)
+
+    assert pickle.loads(pickle.dumps(account)) == account
+    assert copy.deepcopy(account) == account
+    assert copy.copy(Quote.from_dict(QUOTE)).quote.askPrice is None
+    assert account != Account.from_dict({'securitiesAccount': {'type': 'CASH'}})
+
+
+def test_account_positions_and_orders():
+    securities = Account.from_dict(ACCOUNT).securitiesAccount
+
+    assert [position.symbol for position in securities.positions] == ['SPY', 'QQQ']
+    assert [position.quantity for position in securities.positions] == [10.0, -2.0]
+    order = securities.orderStrategies[0]
+    assert isinstance(order, Order) and order.symbols == ['SPY']
+    assert isinstance(order.childOrderStrategies[0], Order)
+    assert order.childOrderStrategies[0].orderLegCollection[0].instruction == 'SELL'
+
+
+def test_to_models_and_quotes_to_models():
+    assert to_models(None, Quote) is None
+    assert to_models([QUOTE, 'text'], Quote)[1] == 'text'
+    quotes = quotes_to_models({'SPY': QUOTE, 'errors': {'invalidSymbols': ['XXX']}})
+    assert isinstance(quotes['SPY'], Quote)
+    assert quotes['errors'] == {'invalidSymbols': ['XXX']}
+
+
+def test_api_model_output(make_api, server):
+    server.routes['/marketdata/v1/quotes'] = lambda request: web.json_response({'SPY': QUOTE})
+    api = make_api()
+
+    quotes = api.get_quotes(['SPY'], output_format=OutputFormat.MODEL)
+    assert quotes['SPY'].quote.lastPrice == 500.25
+    assert api.get_quotes(['SPY']) == {'SPY': QUOTE}
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 01:12:40 2026
+
+@author: LC
+"""
+
+import numpy as np
+import pytest
+from schwab_enum import OutputFormat
+from schwab_option_chain import OptionChain, chain_output
+
+
+def contract(put_call, strike, expiration='2026-11-20', **fields):
+    contract = {'putCall': put_call,
+                'symbol': f'SPY   {expiration[2:].replace("-", "")}{put_call[0]}{int(strike):05d}000',
+                'expirationDate': f'{expiration}T21:00:00.000+00:00',
+                'daysToExpiration': 34, 'strikePrice': strike,
+                'bid': 1.0, 'ask': 1.2, 'last': 1.1, 'mark': 1.1,
+                'totalVolume': 100, 'openInterest': 1000,
+                'volatility': 20.0, 'delta': 0.5 if put_call == 'CALL' else -0.5,
+                'gamma': 0.01, 'theta': -0.05, 'vega': 0.1, 'rho': 0.01}
+    contract.update(fields)
+    return contract
+
+
+def response(contracts):
+    chain = {'symbol': 'SPY', 'status': 'SUCCESS', 'underlyingPrice': 500.0,
+             'callExpDateMap': {}, 'putExpDateMap': {}}
+    for item in contracts:
+        key = 'callExpDateMap' if item['putCall'] == 'CALL' else 'putExpDateMap'
+        strikes = chain[key].setdefault(f"{item['expirationDate'][:10]}:34", {})
+        strikes.setdefault(str(item['strikePrice']), []).append(item)
+    return chain
+
+
+CONTRACTS = [contract('CALL', 490, openInterest=500),
+             contract('CALL', 500, openInterest=1500),
+             contract('CALL', 500, '2026-12-18', openInterest=700, daysToExpiration=62),
+             contract('PUT', 490, delta=-999.0, volatility='NaN'),
+             contract('PUT', 500, openInterest=2000)]
+
+
+def test_from_response_flattens_into_columns():
+    chain = OptionChain.from_response(response(CONTRACTS))
+
+    assert len(chain) == 5
+    assert chain.symbol == 'SPY' and chain.underlying_price == 500.0
+    assert chain.info['status'] == 'SUCCESS' and 'callExpDateMap' not in chain.info
+    assert chain['expirationDate'].dtype == np.dtype('M8[ms]')
+    assert len(chain.calls) == 3 and len(chain.puts) == 2
+    np.testing.assert_allclose(chain.spread, 0.2)
+    assert list(chain.expirations().astype('M8[D]').astype(str)) == ['2026-11-20', '2026-12-18']
+    assert list(chain.strikes()) == [490.0, 500.0]
+
+
+def test_missing_greeks_become_nan():
+    chain = OptionChain.from_response(response(CONTRACTS))
+    put = chain.where(putCall='PUT', strikePrice=490)
+
+    assert np.isnan(put['delta'][0]) and np.isnan(put['volatility'][0])
+    assert not np.isnan(chain.where(putCall='PUT', strikePrice=500)['delta'][0])
+
+
+def test_contracts_without_every_field_use_the_defaults():
+    partial = [contract('CALL', 490), {'putCall': 'CALL', 'symbol': 'SPY_C',
+                                       'expirationDate': '2026-11-20T21:00:00.000+00:00',
+                                       'strikePrice': 510}]
+    chain = OptionChain.from_response(response(partial))
+
+    assert len(chain) == 2
+    assert np.isnan(chain.where(symbol='SPY_C')['bid'][0])
+    assert chain.where(symbol='SPY_C')['openInterest'][0] == 0
+
+
+def test_where_supports_values_ranges_and_lists():
+    chain = OptionChain.from_response(response(CONTRACTS))
+
+    assert len(chain.where(putCall='CALL', strikePrice=500)) == 2
+    assert len(chain.where(openInterest=(1000, None))) == 3
+    assert len(chain.where(openInterest=(None, 999))) == 2
+    assert len(chain.where(daysToExpiration=(0, 45), strikePrice=[490])) == 2
+    assert chain.mask(putCall='PUT').sum() == 2
+    filtered = chain[chain['openInterest'] > 1000]
+    assert isinstance(filtered, OptionChain) and len(filtered) == 2
+
+
+def test_sort_by_several_columns():
+    chain = OptionChain.from_response(response(CONTRACTS)).sort('strikePrice', 'openInterest')
+
+    assert list(chain['strikePrice']) == [490, 490, 500, 500, 500]
+    assert list(chain['openInterest']) == [500, 1000, 700, 1500, 2000]
+    assert chain.sort('openInterest', descending=True)['openInterest'][0] == 2000
+
+
+def test_groupby_aggregations():
+    chain = OptionChain.from_response(response(CONTRACTS))
+    groups = chain.groupby(('putCall', 'strikePrice'), openInterest='sum',
+                           delta='mean', symbol='count')
+
+    assert list(groups['putCall']) == ['CALL', 'CALL', 'PUT', 'PUT']
+    assert list(groups['strikePrice']) == [490, 500, 490, 500]
+    assert list(groups['openInterest']) == [500, 2200, 1000, 2000]
+    assert groups['openInterest'].dtype.kind == 'i'
+    assert list(groups['symbol']) == [1, 2, 1, 1]
+    assert np.isnan(groups['delta'][2]) and groups['delta'][3] == -0.5
+
+    with pytest.raises(ValueError):
+        chain.groupby('putCall', openInterest='median')
+    assert len(chain[:0].groupby('putCall', openInterest='sum')['openInterest']) == 0
+
+
+def test_diff_reports_added_removed_and_changed():
+    previous = OptionChain.from_response(response(CONTRACTS))
+    current_contracts = [dict(item) for item in CONTRACTS[1:]]
+    current_contracts[0]['bid'] = 1.05
+    current_contracts.append(contract('PUT', 510))
+    current = OptionChain.from_response(response(current_contracts))
+
+    diff = current.diff(previous)
+
+    assert list(diff.added['strikePrice']) == [510]
+    assert list(diff.removed['symbol']) == [CONTRACTS[0]['symbol']]
+    assert list(diff.changed['symbol']) == [CONTRACTS[1]['symbol']]
+    assert diff.changed['bid'][0] == 1.05
+    assert len(diff) == 3 and len(diff.updated) == 2
+    # NaN greeks on both sides are not a change
+    assert len(current.diff(current)) == 0
+    assert len(current.diff(None).added) == len(current)
+
+
+def test_chain_output_formats():
+    chain = response(CONTRACTS)
+
+    assert chain_output(chain, OutputFormat.JSON) is chain
+    assert chain_output(None, OutputFormat.NUMPY) is None
+    assert len(chain_output(chain, OutputFormat.NUMPY)) == 5
+    frame = chain_output(chain, OutputFormat.PANDAS)
+    assert len(frame) == 5 and frame.attrs['underlyingPrice'] == 500.0
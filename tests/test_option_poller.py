@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 01:31:05 2026
+
+@author: LC
+"""
+
+import asyncio
+import threading
+from schwab_option_chain import OptionChain
+from schwab_option_poller import OptionChainPoller
+
+
+def chain(symbol, bids):
+    '''
+    OptionChain with one call per strike, {strike: bid}.
+    '''
+    strikes = {str(strike): [{'putCall': 'CALL', 'symbol': f'{symbol}_C{strike}',
+                              'expirationDate': '2026-11-20T21:00:00.000+00:00',
+                              'strikePrice': strike, 'bid': bid, 'ask': bid + 0.1}]
+               for strike, bid in bids.items()}
+    return OptionChain.from_response({'symbol': symbol, 'status': 'SUCCESS',
+                                      'callExpDateMap': {'2026-11-20:34': strikes}})
+
+
+class FakeApi:
+
+    def __init__(self, snapshots):
+        self.snapshots = snapshots      # {symbol: [OptionChain or Exception, ...]}
+        self.params = []
+        self.lock = threading.Lock()
+
+    def get_option_chain(self, params, output_format):
+        with self.lock:
+            self.params.append(params)
+            queue = self.snapshots[params['symbol']]
+            result = queue.pop(0) if len(queue) > 1 else queue[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class FakeAsyncApi(FakeApi):
+
+    async def get_option_chain(self, params, output_format):
+        await asyncio.sleep(0)
+        return FakeApi.get_option_chain(self, params, output_format)
+
+
+def test_first_poll_reports_everything_then_only_changes():
+    api = FakeApi({'SPY': [chain('SPY', {500: 1.0, 510: 0.5}),
+                           chain('SPY', {500: 1.1, 510: 0.5}),
+                           chain('SPY', {500: 1.1, 510: 0.5})]})
+    received = []
+    poller = OptionChainPoller(api, ['SPY'], callback=lambda s, d: received.append((s, d)))
+
+    first = poller.poll()
+    assert len(first['SPY'].added) == 2
+
+    second = poller.poll()
+    assert list(second['SPY'].changed['strikePrice']) == [500]
+    assert len(second['SPY'].added) == 0
+
+    assert poller.poll() == {}
+    assert [symbol for symbol, _ in received] == ['SPY', 'SPY']
+    assert api.params[0] == {'symbol': 'SPY'}
+
+    stats = poller.stats()
+    assert stats['polls'] == 3 and stats['errors'] == 0
+    assert stats['contracts_received'] == 6 and stats['contracts_emitted'] == 3
+    assert stats['emitted_ratio'] == 0.5
+
+
+def test_failures_are_counted_and_keep_the_snapshot():
+    api = FakeApi({'SPY': [chain('SPY', {500: 1.0}), RuntimeError('down'),
+                           chain('SPY', {500: 1.0})],
+                   '$SPX': [None]})
+    poller = OptionChainPoller(api, {'SPY': {'symbol': 'SPY', 'strikeCount': 10},
+                                     '$SPX': {'symbol': '$SPX'}})
+
+    assert set(poller.poll()) == {'SPY'}
+    assert poller.poll() == {}
+    assert poller.poll() == {}          # same as the snapshot before the failure
+    assert poller.errors == 4
+    assert api.params[0] == {'symbol': 'SPY', 'strikeCount': 10}
+
+
+def test_callback_errors_do_not_stop_polling():
+    def callback(symbol, diff):
+        raise ValueError('bad callback')
+
+    poller = OptionChainPoller(FakeApi({'SPY': [chain('SPY', {500: 1.0})]}), ['SPY'],
+                               callback=callback)
+    assert 'SPY' in poller.poll()
+
+
+def test_background_thread_polls_until_stopped():
+    polled = threading.Event()
+    poller = OptionChainPoller(FakeApi({'SPY': [chain('SPY', {500: 1.0})]}), ['SPY'],
+                               interval=0.01, callback=lambda s, d: polled.set())
+    poller.start()
+    try:
+        assert polled.wait(5)
+    finally:
+        poller.stop(5)
+    assert poller._thread is None and poller.polls >= 1
+
+
+def test_poll_async():
+    api = FakeAsyncApi({'SPY': [chain('SPY', {500: 1.0}), RuntimeError('down')],
+                        'QQQ': [chain('QQQ', {400: 2.0})]})
+    poller = OptionChainPoller(api, ['SPY', 'QQQ'])
+
+    first = asyncio.run(poller.poll_async())
+    assert set(first) == {'SPY', 'QQQ'}
+    assert asyncio.run(poller.poll_async()) == {}
+    assert poller.errors == 1 and poller.polls == 2
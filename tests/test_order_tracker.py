@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 03:20:51 2026
+
+@author: LC
+"""
+
+import json
+import threading
+from schwab_enum import Status
+from schwab_order_tracker import OrderTracker
+
+
+class FakeApi:
+
+    def __init__(self, orders):
+        self.orders = {order['orderId']: order for order in orders}
+        self.seeds = 0
+        self.refreshed = []
+        self.done = threading.Event()
+
+    def get_account_orders(self, start, end, account_hash=None):
+        self.seeds += 1
+        self.done.set()
+        return [dict(order) for order in self.orders.values()]
+
+    def get_order(self, order_id, account_hash=None):
+        self.refreshed.append(order_id)
+        self.done.set()
+        order = self.orders.get(order_id)
+        return dict(order) if order else None
+
+
+def event(seq, message_type, order_id, **detail):
+    return {'seq': seq, 'key': 'key', '1': '123', '2': message_type,
+            '3': json.dumps({'SchwabOrderID': str(order_id), **detail})}
+
+
+def tracker_with(orders, **kwargs):
+    api = FakeApi(orders)
+    tracker = OrderTracker(api, account_hash='HASH', **kwargs)
+    tracker.seed()
+    api.done.clear()
+    return api, tracker
+
+
+def drain(tracker):
+    tracker._executor.submit(lambda: None).result(5)
+
+
+def test_seed_loads_orders_and_children():
+    api, tracker = tracker_with([{'orderId': 1, 'status': 'WORKING',
+                                  'childOrderStrategies': [{'orderId': 2,
+                                                            'status': 'AWAITING_PARENT_ORDER'}]},
+                                 {'orderId': 3, 'status': 'FILLED'}])
+
+    assert tracker.status(1) is Status.WORKING
+    assert tracker.status('2') is Status.AWAITING_PARENT_ORDER
+    assert sorted(tracker.open_orders()) == [1, 2]
+    assert tracker.stats()['orders'] == 3 and api.seeds == 1
+    tracker.close()
+
+
+def test_events_move_orders_without_requests():
+    changes = []
+    api, tracker = tracker_with([{'orderId': 1, 'status': 'PENDING_ACKNOWLEDGEMENT'}],
+                                callback=lambda order_id, status: changes.append(status))
+
+    tracker.on_event(event(1, 'OrderAccepted', 1))
+    tracker.on_event(event(2, 'ExecutionCreated', 1))
+    tracker.on_event(event(3, 'OrderFillCompleted', 1))
+
+    assert tracker.status(1) is Status.FILLED
+    assert tracker.order(1)['status'] == 'FILLED'
+    assert changes == [Status.PENDING_ACKNOWLEDGEMENT, Status.WORKING, Status.FILLED]
+    assert api.refreshed == [] and api.seeds == 1
+    assert tracker.open_orders() == []
+    tracker.close()
+
+
+def test_out_events_use_the_reason():
+    api, tracker = tracker_with([{'orderId': 1, 'status': 'WORKING'},
+                                 {'orderId': 2, 'status': 'WORKING'}])
+
+    tracker.on_event(event(1, 'OrderUROutCompleted', 1, OutCancelType='EXPIRED'))
+    tracker.on_event(event(2, 'OrderUROutCompleted', 2))
+
+    assert tracker.status(1) is Status.EXPIRED
+    assert tracker.status(2) is Status.CANCELED
+    tracker.close()
+
+
+def test_unknown_orders_and_types_are_refreshed_once():
+    api, tracker = tracker_with([{'orderId': 1, 'status': 'WORKING'}])
+    api.orders[7] = {'orderId': 7, 'status': 'WORKING'}
+
+    tracker.on_event(event(1, 'OrderCreated', 7))
+    drain(tracker)
+    assert tracker.status(7) is Status.WORKING and api.refreshed == [7]
+
+    tracker.on_event(event(2, 'SomethingNew', 1))
+    drain(tracker)
+    assert api.refreshed == [7, 1] and tracker.refreshes == 2
+    tracker.close()
+
+
+def test_event_after_terminal_status_is_refreshed():
+    api, tracker = tracker_with([{'orderId': 1, 'status': 'FILLED'}])
+
+    tracker.on_event(event(1, 'OrderAccepted', 1))
+    drain(tracker)
+
+    assert api.refreshed == [1] and tracker.status(1) is Status.FILLED
+    tracker.close()
+
+
+def test_sequence_gap_resyncs():
+    api, tracker = tracker_with([{'orderId': 1, 'status': 'WORKING'}])
+
+    tracker.on_event(event(10, 'ExecutionCreated', 1))
+    tracker.on_event(event(11, 'ExecutionCreated', 1))
+    assert tracker.resyncs == 0
+    tracker.on_event(event(15, 'ExecutionCreated', 1))
+    drain(tracker)
+
+    assert tracker.resyncs == 1 and api.seeds == 2
+    tracker.close()
+
+
+def test_on_message_forwards_other_services():
+    forwarded = []
+    api, tracker = tracker_with([{'orderId': 1, 'status': 'WORKING'}],
+                                forward=forwarded.append)
+
+    tracker.on_message({'data': [{'service': 'ACCT_ACTIVITY',
+                                  'content': [event(1, 'OrderFillCompleted', 1)]},
+                                 {'service': 'LEVELONE_EQUITIES', 'content': []}]})
+
+    assert tracker.status(1) is Status.FILLED
+    assert forwarded == [{'data': [{'service': 'LEVELONE_EQUITIES', 'content': []}]}]
+    tracker.close()
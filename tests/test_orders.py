@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 02:41:27 2026
+
+@author: LC
+"""
+
+import json
+import asyncio
+import numpy as np
+import pytest
+from aiohttp import web
+from fakes import ACCOUNT_HASH
+from schwab_enum import (AssetType, ComplexOrderStrategyType, Instruction, OrderType,
+                         OrderStrategyType)
+from schwab_orders import OrderSpec, OrderResult
+
+
+ORDERS = f'/trader/v1/accounts/{ACCOUNT_HASH}/orders'
+
+
+def created(request):
+    return web.Response(status=201, headers={'Location': f'{ORDERS}/1001'})
+
+
+def payload(spec):
+    return json.loads(spec.data)
+
+
+def test_single_order_payload():
+    spec = OrderSpec.single('MELI', 100, Instruction.BUY, AssetType.EQUITY,
+                            price=1500.0, order_type=OrderType.LIMIT)
+
+    assert payload(spec) == {
+        'orderType': 'LIMIT', 'session': 'NORMAL', 'duration': 'DAY',
+        'orderStrategyType': 'SINGLE', 'price': 1500.0,
+        'orderLegCollection': [{'instruction': 'BUY', 'quantity': 100,
+                                'instrument': {'symbol': 'MELI', 'assetType': 'EQUITY'}}]}
+    assert 'price' not in payload(OrderSpec.single('MELI', 1, Instruction.BUY,
+                                                   AssetType.EQUITY, price=1500.0))
+
+
+def test_stop_and_stop_limit_prices():
+    stop = OrderSpec.single('SPY', 1, Instruction.SELL, AssetType.EQUITY, price=480.0,
+                            order_type=OrderType.STOP)
+    assert stop.price is None and payload(stop)['stopPrice'] == 480.0
+
+    stop_limit = OrderSpec.single('SPY', 1, Instruction.SELL, AssetType.EQUITY,
+                                  price=479.5, stop_price=480.0,
+                                  order_type=OrderType.STOP_LIMIT)
+    assert payload(stop_limit)['price'] == 479.5
+    assert payload(stop_limit)['stopPrice'] == 480.0
+
+    with pytest.raises(ValueError):
+        OrderSpec.single('SPY', 1, Instruction.SELL, AssetType.EQUITY, price=479.5,
+                         order_type=OrderType.STOP_LIMIT)
+
+
+@pytest.mark.parametrize('kwargs', [{'instruction': 'BUY'}, {'quantity': 0},
+                                    {'symbol': ''}, {'order_type': OrderType.LIMIT}])
+def test_invalid_orders_are_rejected_when_built(kwargs):
+    arguments = dict(symbol='SPY', quantity=1, instruction=Instruction.BUY,
+                     asset_type=AssetType.EQUITY)
+    order_type = kwargs.pop('order_type', OrderType.MARKET)
+    arguments.update(kwargs)
+    with pytest.raises(ValueError):
+        OrderSpec.single(order_type=order_type, **arguments)
+
+
+def test_payload_is_serialized_once_and_numpy_values_are_accepted():
+    spec = OrderSpec.single('SPY', np.int64(3), Instruction.BUY, AssetType.EQUITY,
+                            price=np.float64(500.25), order_type=OrderType.LIMIT)
+
+    assert spec.data is spec.data
+    assert payload(spec)['price'] == 500.25
+    assert payload(spec)['orderLegCollection'][0]['quantity'] == 3
+    spec.add_leg('QQQ', 1, Instruction.BUY)
+    assert len(payload(spec)['orderLegCollection']) == 2
+
+
+def test_place_order_with_stop_price(make_api, server):
+    bodies = []
+
+    async def record(request):
+        bodies.append(await request.json())
+        return created(request)
+
+    server.routes[('POST', ORDERS)] = record
+    result = make_api().place_order('SPY', 1, Instruction.SELL, AssetType.EQUITY,
+                                    price=479.5, stop_price=480.0,
+                                    order_type=OrderType.STOP_LIMIT)
+
+    assert result.ok and result.order_id == 1001
+    assert bodies[0]['price'] == 479.5 and bodies[0]['stopPrice'] == 480.0
+
+
+def test_invalid_orders_return_a_failed_result_without_request(make_api, server):
+    api = make_api()
+    hits = len(server.hits)
+
+    result = api.place_order('SPY', 1, 'BUY', AssetType.EQUITY)
+    assert isinstance(result, OrderResult) and not result.ok
+    assert 'Instruction' in result.error and result.symbols == ['SPY']
+
+    # TRIGGER without children fails when the payload is built
+    trigger = OrderSpec(order_strategy_type=OrderStrategyType.TRIGGER).add_leg(
+        'SPY', 1, Instruction.BUY)
+    result = api.place_order_spec(trigger)
+    assert not result.ok and 'child' in result.error
+    assert not api.replace_order_spec('1001', trigger).ok
+    assert api.preview_order_spec(trigger) is None
+    assert not api.replace_order('1001', 'SPY', 1, Instruction.BUY, AssetType.EQUITY,
+                                 order_type=OrderType.LIMIT).ok
+    assert len(server.hits) == hits
+
+
+def test_place_orders_basket(make_api, server):
+    async def by_symbol(request):
+        body = await request.json()
+        if body['orderLegCollection'][0]['instrument']['symbol'] == 'BAD':
+            return web.Response(status=400)
+        return created(request)
+
+    server.routes[('POST', ORDERS)] = by_symbol
+    specs = [OrderSpec.single(symbol, 1, Instruction.BUY, AssetType.EQUITY)
+             for symbol in ('SPY', 'BAD', 'QQQ')]
+    specs.append(OrderSpec(order_strategy_type=OrderStrategyType.OCO))
+
+    results = make_api().place_orders(specs, max_workers=4)
+
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    assert [result.ok for result in results] == [True, False, True, False]
+    assert results[0].order_id == 1001 and results[1].status == 400
+    assert 'OCO' in results[3].error
+
+
+def test_place_orders_async(make_async_api, server):
+    server.routes[('POST', ORDERS)] = created
+    specs = [OrderSpec.single(symbol, 1, Instruction.BUY, AssetType.EQUITY)
+             for symbol in ('SPY', 'QQQ')]
+
+    async def run():
+        async with await make_async_api() as api:
+            return await api.place_orders(specs)
+
+    results = asyncio.run(run())
+    assert all(result.ok and result.order_id == 1001 for result in results)
+
+
+def created_with_body(request):
+    return web.json_response({'orderId': 1001}, status=201,
+                             headers={'Location': f'{ORDERS}/1001'})
+
+
+@pytest.mark.parametrize('handler', [created, created_with_body])
+def test_created_order_with_or_without_body(make_api, make_async_api, server, handler):
+    server.routes[('POST', ORDERS)] = handler
+    server.routes[('PUT', f'{ORDERS}/1000')] = handler
+    spec = OrderSpec.single('SPY', 1, Instruction.BUY, AssetType.EQUITY)
+    api = make_api()
+
+    for result in (api.place_order_spec(spec), api.replace_order_spec('1000', spec),
+                   api.place_orders([spec])[0]):
+        assert result.ok and result.status == 201 and result.order_id == 1001
+
+    async def run():
+        async with await make_async_api() as api:
+            return [await api.place_order_spec(spec),
+                    await api.replace_order_spec('1000', spec),
+                    (await api.place_orders([spec]))[0]]
+
+    for result in asyncio.run(run()):
+        assert result.ok and result.status == 201 and result.order_id == 1001
+
+
+def test_rejected_order_keeps_the_status(make_api, make_async_api, server):
+    server.routes[('POST', ORDERS)] = lambda request: web.json_response(
+        {'message': 'Invalid order'}, status=400)
+    spec = OrderSpec.single('SPY', 1, Instruction.BUY, AssetType.EQUITY)
+
+    result = make_api().place_order_spec(spec)
+    assert not result.ok and result.status == 400 and result.order_id is None
+
+    async def run():
+        async with await make_async_api() as api:
+            return await api.place_order_spec(spec)
+
+    result = asyncio.run(run())
+    assert not result.ok and result.status == 400
+
+
+def test_result_without_response():
+    assert OrderResult.from_response(None, 0.1, ['SPY']).error == 'Request failed'
+    assert OrderResult.from_response({'orderId': 1}, 0.1).error == 'Request failed'
+    result = OrderResult.from_response(TimeoutError('slow'), 0.1)
+    assert not result and 'TimeoutError' in result.error
+
+
+def test_bracket_is_one_trigger_payload_with_oco_exits():
+    spec = OrderSpec.bracket('MELI', 10, Instruction.BUY, AssetType.EQUITY,
+                             price=1500.0, take_profit=1600.0, stop_loss=1450.0)
+    body = payload(spec)
+
+    assert body['orderStrategyType'] == 'TRIGGER'
+    assert body['orderType'] == 'LIMIT' and body['price'] == 1500.0
+    oco, = body['childOrderStrategies']
+    assert oco['orderStrategyType'] == 'OCO' and 'orderLegCollection' not in oco
+    take_profit, stop_loss = oco['childOrderStrategies']
+    assert take_profit['orderType'] == 'LIMIT' and take_profit['price'] == 1600.0
+    assert stop_loss['orderType'] == 'STOP' and stop_loss['stopPrice'] == 1450.0
+    assert 'price' not in stop_loss
+    for exit_order in (take_profit, stop_loss):
+        assert exit_order['duration'] == 'GOOD_TILL_CANCEL'
+        assert exit_order['orderLegCollection'][0]['instruction'] == 'SELL'
+    assert spec.symbols == ['MELI']
+
+
+def test_bracket_with_one_exit_and_market_entry():
+    spec = OrderSpec.bracket('SPY', 5, Instruction.SELL_SHORT, AssetType.EQUITY,
+                             stop_loss=520.0)
+    body = payload(spec)
+
+    assert body['orderType'] == 'MARKET' and 'price' not in body
+    child, = body['childOrderStrategies']
+    assert child['orderStrategyType'] == 'SINGLE' and child['stopPrice'] == 520.0
+    assert child['orderLegCollection'][0]['instruction'] == 'BUY_TO_COVER'
+
+    with pytest.raises(ValueError):
+        OrderSpec.bracket('SPY', 5, Instruction.BUY, AssetType.EQUITY)
+    with pytest.raises(ValueError):
+        OrderSpec.bracket('SPY', 5, Instruction.SELL, AssetType.EQUITY, stop_loss=520.0)
+
+
+def test_oco_and_multi_leg_spread():
+    first = OrderSpec.single('SPY', 1, Instruction.SELL, AssetType.EQUITY, price=520.0,
+                             order_type=OrderType.LIMIT)
+    second = OrderSpec.single('QQQ', 1, Instruction.SELL, AssetType.EQUITY, price=450.0,
+                              order_type=OrderType.LIMIT)
+    oco = OrderSpec.oco(first, second)
+    assert [child['price'] for child in payload(oco)['childOrderStrategies']] == [520.0, 450.0]
+    assert oco.symbols == ['SPY', 'QQQ']
+    with pytest.raises(ValueError):
+        OrderSpec.oco(first)
+
+    vertical = (OrderSpec(OrderType.NET_DEBIT, price=1.25,
+                          complex_order_strategy_type=ComplexOrderStrategyType.VERTICAL)
+                .add_leg('SPY   261120C00580000', 1, Instruction.BUY_TO_OPEN, AssetType.OPTION))
+    with pytest.raises(ValueError):
+        vertical.data                   # one leg of two
+    vertical.add_leg('SPY   261120C00590000', 1, Instruction.SELL_TO_OPEN, AssetType.OPTION)
+    body = payload(vertical)
+    assert body['complexOrderStrategyType'] == 'VERTICAL'
+    assert len(body['orderLegCollection']) == 2
+
+
+def test_children_reset_the_serialized_payload():
+    entry = OrderSpec.single('SPY', 1, Instruction.BUY, AssetType.EQUITY)
+    data = entry.data
+    entry.add_child(OrderSpec.single('SPY', 1, Instruction.SELL, AssetType.EQUITY))
+
+    assert entry.data != data
+    assert entry.order_strategy_type is OrderStrategyType.TRIGGER
+    with pytest.raises(ValueError):
+        entry.add_child(entry)
+
+
+def test_bracket_is_placed_in_one_request(make_api, server):
+    server.routes[('POST', ORDERS)] = created
+    spec = OrderSpec.bracket('MELI', 10, Instruction.BUY, AssetType.EQUITY,
+                             price=1500.0, take_profit=1600.0, stop_loss=1450.0)
+
+    assert make_api().place_order_spec(spec).ok
+    assert server.count(ORDERS) == 1
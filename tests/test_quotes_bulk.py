@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:16:31 2026
+
+@author: LC
+"""
+
+import asyncio
+from aiohttp import web
+from schwab_api import SchwabApi
+
+
+def quotes_handler(request):
+    symbols = request.query['symbols'].split(',')
+    if 'BAD' in symbols:
+        return web.json_response({'message': 'error'}, status=400)
+    return web.json_response({symbol: {'symbol': symbol} for symbol in symbols})
+
+
+def test_split_symbols_deduplicates_and_balances_chunks():
+    chunks = SchwabApi._split_symbols(['A', 'B', 'A', 'C', 'D', 'E'], 2)
+    assert chunks == [['A', 'B'], ['C', 'D'], ['E']]
+    chunks = SchwabApi._split_symbols([f'S{i}' for i in range(251)], 250)
+    assert [len(chunk) for chunk in chunks] == [126, 125]
+    assert SchwabApi._split_symbols([], 250) == []
+
+
+def test_bulk_merges_chunks_and_reports_failed_chunk(make_api, server):
+    server.routes['/marketdata/v1/quotes'] = quotes_handler
+    api = make_api()
+    symbols = [f'S{i}' for i in range(10)] + ['BAD']
+    quotes, errors = api.get_quotes_bulk(symbols, chunk_size=4, max_workers=3)
+
+    assert server.count('/marketdata/v1/quotes') == 3
+    assert len(errors) == 1 and 'BAD' in errors[0]['symbols']
+    assert set(quotes) == set(symbols) - set(errors[0]['symbols'])
+
+
+def test_bulk_async(make_async_api, server):
+    server.routes['/marketdata/v1/quotes'] = quotes_handler
+
+    async def run():
+        async with await make_async_api() as api:
+            return await api.get_quotes_bulk([f'S{i}' for i in range(9)], chunk_size=3)
+
+    quotes, errors = asyncio.run(run())
+    assert len(quotes) == 9 and not errors
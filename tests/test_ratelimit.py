@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:24:18 2026
+
+@author: LC
+"""
+
+import time
+import asyncio
+import threading
+from schwab_enum import BaseUrl, Priority
+from schwab_ratelimit import RateLimiter, TokenBucket
+
+
+def drain(bucket, priority=Priority.HIGH):
+    while bucket._try_acquire(priority) == 0:
+        pass
+
+
+def test_normal_requests_leave_the_reserve_to_orders():
+    bucket = TokenBucket(rate=1, per=60, capacity=5, reserve=2)
+    assert [bucket._try_acquire(Priority.NORMAL) == 0 for _ in range(4)] == [True] * 3 + [False]
+    assert bucket._try_acquire(Priority.HIGH) == 0
+    assert bucket._try_acquire(Priority.HIGH) == 0
+    assert bucket._try_acquire(Priority.HIGH) > 0
+
+
+def test_reserve_never_blocks_normal_requests_of_a_small_bucket():
+    bucket = TokenBucket(rate=1, per=60, capacity=1, reserve=2)
+    assert bucket.reserve == 0
+    assert bucket._try_acquire(Priority.NORMAL) == 0
+
+
+def test_order_goes_ahead_of_queued_market_data_in_shared_bucket():
+    limiter = RateLimiter({BaseUrl.TRADER.value: 1000, BaseUrl.MARKET.value: 1000},
+                          per=1.0, shared_budget=10, reserve=0)
+    drain(limiter.shared)
+    done = []
+
+    def request(base_url, priority, name):
+        limiter.acquire(base_url, priority)
+        done.append(name)
+
+    threads = [threading.Thread(target=request, args=(BaseUrl.MARKET.value, Priority.NORMAL,
+                                                      f'quote{i}'))
+               for i in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.02)
+    order = threading.Thread(target=request, args=(BaseUrl.TRADER.value, Priority.HIGH, 'order'))
+    order.start()
+    for thread in threads + [order]:
+        thread.join(5)
+
+    assert done[0] == 'order'
+    assert len(done) == 5
+    assert limiter.metrics()['shared']['acquired'] >= 5
+
+
+def test_unlimited_base_url_and_async_acquire():
+    limiter = RateLimiter({BaseUrl.MARKET.value: 600}, per=60.0)
+    assert limiter.acquire('https://example.com/') == 0.0
+
+    async def run():
+        return await asyncio.gather(*[limiter.acquire_async(BaseUrl.MARKET.value)
+                                      for _ in range(5)])
+
+    assert asyncio.run(run()) == [0.0] * 5
+    assert 0 < limiter.metrics()[BaseUrl.MARKET.value]['fill_level'] < 1
+    assert 'shared' not in limiter.metrics()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 23:31:05 2026
+
+@author: LC
+"""
+
+import asyncio
+from aiohttp import web
+from schwab_retry import RetryBudget, RetryPolicy, parse_retry_after
+
+
+def failing(statuses, body=None):
+    '''
+    Handler answering with the given statuses, then 200.
+    '''
+    statuses = list(statuses)
+
+    def handler(request):
+        if statuses:
+            return web.json_response({'error': 'busy'}, status=statuses.pop(0),
+                                     headers={'Retry-After': '0'})
+        return web.json_response(body or {'ok': True})
+    return handler
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('2.5') == 2.5
+    assert parse_retry_after('-1') == 0.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+
+
+def test_retry_decisions():
+    policy = RetryPolicy(max_retries=2, jitter=False, backoff_base=1, backoff_max=3)
+    assert policy.retry_delay('GET', 503, 0) == 1
+    assert policy.retry_delay('GET', None, 1) == 2
+    assert policy.retry_delay('GET', 503, 2) is None
+    assert policy.retry_delay('POST', 503, 0) is None
+    assert policy.retry_delay('POST', 429, 0, retry_after='7') == 3
+    assert policy.retry_delay('GET', 404, 0) is None
+
+
+def test_retry_budget_stops_retry_storms():
+    policy = RetryPolicy(budget=RetryBudget(min_tokens=1, max_tokens=2))
+    assert policy.retry_delay('GET', 503, 0) is not None
+    assert policy.retry_delay('GET', 503, 0) is not None
+    assert policy.retry_delay('GET', 503, 0) is None
+    assert policy.budget.exhausted == 1
+
+
+def test_get_is_retried_and_post_is_not(make_api, server):
+    server.routes['/marketdata/v1/SPY/quotes'] = failing([503, 429])
+    server.routes['/trader/v1/accounts/HASH/previewOrder'] = failing([503])
+    api = make_api()
+
+    assert api.get_quote('SPY') == {'ok': True}
+    assert server.count('/marketdata/v1/SPY/quotes') == 3
+    assert api.retry_policy.retries == 2
+
+    assert api._make_request('post', server.url + '/trader/v1/',
+                             '/accounts/HASH/previewOrder') is None
+    assert server.count('/trader/v1/accounts/HASH/previewOrder') == 1
+
+
+def test_async_retry(make_async_api, server):
+    server.routes['/marketdata/v1/SPY/quotes'] = failing([502])
+
+    async def run():
+        async with await make_async_api() as api:
+            return await api.get_quote('SPY')
+
+    assert asyncio.run(run()) == {'ok': True}
+    assert server.count('/marketdata/v1/SPY/quotes') == 2
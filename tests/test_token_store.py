@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 05:02:47 2026
+
+@author: LC
+"""
+
+import os
+import json
+import stat
+import time
+import asyncio
+import threading
+import multiprocessing
+import pytest
+import schwab_token_store
+from schwab_token_store import TokenStore
+
+
+TOKENS = {'access_token': 'access', 'access_expiration': 1.0,
+          'refresh_token': 'refresh', 'refresh_expiration': 2.0}
+
+
+def test_save_and_load(tmp_path):
+    store = TokenStore(str(tmp_path / 'tokens.json'))
+    assert store.load() is None
+
+    with store.lock():
+        store.save(TOKENS)
+
+    assert store.load() == TOKENS
+    assert stat.S_IMODE(os.stat(store.path).st_mode) == 0o600
+    assert sorted(os.listdir(tmp_path)) == ['tokens.json', 'tokens.json.lock']
+
+    store.clear()
+    assert store.load() is None
+
+
+def test_load_sees_files_written_by_another_store(tmp_path):
+    path = str(tmp_path / 'tokens.json')
+    reader, writer = TokenStore(path), TokenStore(path)
+    with writer.lock():
+        writer.save(TOKENS)
+    assert reader.load()['access_token'] == 'access'
+
+    with writer.lock():
+        writer.save(dict(TOKENS, access_token='renewed'))
+    assert reader.load()['access_token'] == 'renewed'
+
+
+def test_failed_save_keeps_the_previous_tokens(tmp_path, monkeypatch):
+    store = TokenStore(str(tmp_path / 'tokens.json'))
+    with store.lock():
+        store.save(TOKENS)
+
+    def broken_dump(obj, file):
+        file.write('{"access_token": ')
+        raise OSError('disk full')
+
+    monkeypatch.setattr(schwab_token_store.json, 'dump', broken_dump)
+    with pytest.raises(OSError), store.lock():
+        store.save(dict(TOKENS, access_token='lost'))
+    monkeypatch.undo()
+
+    assert TokenStore(store.path).load() == TOKENS
+    assert sorted(os.listdir(tmp_path)) == ['tokens.json', 'tokens.json.lock']
+
+
+def test_lock_is_reentrant_and_exclusive_between_threads(tmp_path):
+    store = TokenStore(str(tmp_path / 'tokens.json'))
+    order = []
+
+    def hold():
+        with store.lock():
+            order.append('thread')
+
+    with store.lock():
+        with store.lock():
+            thread = threading.Thread(target=hold)
+            thread.start()
+            time.sleep(0.05)
+            order.append('main')
+    thread.join(5)
+    assert order == ['main', 'thread']
+
+
+def test_async_lock_waits_without_blocking_the_loop(tmp_path):
+    store = TokenStore(str(tmp_path / 'tokens.json'))
+    released = threading.Event()
+    held = threading.Event()
+
+    def hold():
+        with store.lock():
+            held.set()
+            time.sleep(0.1)
+            released.set()
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while not released.is_set():
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticker = asyncio.ensure_future(tick())
+        async with store.lock_async():
+            assert released.is_set()
+        await ticker
+        return ticks
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait(5)
+    assert asyncio.run(run()) > 3
+    thread.join(5)
+
+
+def test_async_lock_is_reentrant_within_lock_and_its_task(tmp_path):
+    store = TokenStore(str(tmp_path / 'tokens.json'))
+
+    async def nested():
+        async with store.lock_async():
+            async with store.lock_async():
+                assert store._depth == 3
+            assert store._depth == 2
+        return store._depth
+
+    with store.lock():
+        assert asyncio.run(asyncio.wait_for(nested(), 2)) == 1
+        assert store._depth == 1
+    assert store._depth == 0
+
+    async def outer():
+        async with store.lock_async():
+            async with store.lock_async():
+                with store.lock():
+                    assert store._depth == 3
+            assert store._depth == 1
+
+    asyncio.run(asyncio.wait_for(outer(), 2))
+    assert store._depth == 0
+
+
+def test_async_lock_is_exclusive_between_coroutines(tmp_path):
+    store = TokenStore(str(tmp_path / 'tokens.json'))
+    order = []
+
+    async def hold(name):
+        async with store.lock_async():
+            order.append(name + ' in')
+            await asyncio.sleep(0.03)
+            order.append(name + ' out')
+
+    async def run():
+        await asyncio.gather(hold('a'), hold('b'))
+
+    asyncio.run(asyncio.wait_for(run(), 2))
+    assert order == ['a in', 'a out', 'b in', 'b out']
+    assert store._depth == 0
+
+
+def _refresh_in_process(path, requests_path, barrier):
+    '''
+    What SchwabAuth does in each process: under the lock, request a token only when
+    the stored one was not renewed yet.
+    '''
+    store = TokenStore(path)
+    barrier.wait()
+    with store.lock():
+        if store.load()['access_token'] == 'expired':
+            with open(requests_path, 'a', encoding='utf-8') as file:
+                file.write('request\n')
+            time.sleep(0.05)
+            store.save(dict(TOKENS, access_token='renewed'))
+
+
+@pytest.mark.skipif(schwab_token_store.fcntl is None, reason='needs fcntl')
+def test_processes_send_one_refresh(tmp_path):
+    path = str(tmp_path / 'tokens.json')
+    requests_path = str(tmp_path / 'requests.txt')
+    store = TokenStore(path)
+    with store.lock():
+        store.save(dict(TOKENS, access_token='expired'))
+
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(4)
+    processes = [context.Process(target=_refresh_in_process,
+                                 args=(path, requests_path, barrier)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(10)
+
+    assert all(process.exitcode == 0 for process in processes)
+    with open(requests_path, encoding='utf-8') as file:
+        assert file.read() == 'request\n'
+    with open(path, encoding='utf-8') as file:
+        assert json.load(file)['access_token'] == 'renewed'
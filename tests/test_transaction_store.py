@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 04:06:33 2026
+
+@author: LC
+"""
+
+from datetime import datetime, timedelta, timezone
+import pytest
+from fakes import FakeTransactionsApi
+from schwab_transaction_store import TransactionStore
+
+
+def transaction(activity_id, time, symbol='SPY', transaction_type='TRADE', amount=-100.0):
+    return {'activityId': activity_id, 'time': time, 'type': transaction_type,
+            'netAmount': amount,
+            'transferItems': [{'instrument': {'assetType': 'CURRENCY', 'symbol': 'CURRENCY_USD'}},
+                              {'instrument': {'assetType': 'EQUITY', 'symbol': symbol}}]}
+
+
+def iso(date):
+    return date.strftime('%Y-%m-%dT%H:%M:%S+0000')
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TransactionStore(str(tmp_path / 'transactions.db'))
+    yield store
+    store.close()
+
+
+def test_add_is_append_only_and_indexed(store):
+    assert store.add([transaction(1, '2026-01-02T10:00:00+0000'),
+                      transaction(2, '2026-01-03T10:00:00+0000', 'QQQ', 'DIVIDEND')]) == 2
+    assert store.add([transaction(1, '2026-01-02T10:00:00+0000', amount=5.0)]) == 0
+
+    assert len(store) == 2
+    assert store.get(1)['netAmount'] == -100.0
+    assert [item['activityId'] for item in store.transactions(symbol='QQQ')] == [2]
+    assert [item['activityId'] for item in store.transactions(
+        start_time='2026-01-03', transaction_type='DIVIDEND')] == [2]
+    assert store.get(3) is None
+
+
+def test_first_sync_requires_a_start_date(store):
+    assert store.watermark() is None
+    with pytest.raises(ValueError):
+        store.sync(FakeTransactionsApi())
+
+
+def test_sync_requests_only_after_the_watermark(store):
+    now = datetime.now(timezone.utc)
+    api = FakeTransactionsApi([transaction(1, iso(now - timedelta(days=30))),
+                               transaction(2, iso(now - timedelta(days=2))),
+                               transaction(3, iso(now - timedelta(hours=1)))])
+    store.set_watermark(now - timedelta(days=1))
+
+    assert store.sync(api) == 2                 # 3 days of overlap include id 2
+    assert len(api.windows) == 1
+    start = datetime.strptime(api.windows[0][0], '%Y-%m-%dT%H:%M:%S.%fZ')
+    assert abs(start.replace(tzinfo=timezone.utc) - (now - timedelta(days=4))) < timedelta(minutes=1)
+    assert store.watermark() >= now
+
+
+def test_long_ranges_are_split_in_windows(store):
+    api = FakeTransactionsApi()
+    store.sync(api, start_date=datetime.now() - timedelta(days=400))
+
+    assert len(api.windows) == 3
+    assert api.windows[0][0] == api.windows[1][1]
+    assert store.watermark() is not None
+
+
+def test_failed_window_keeps_the_watermark(store):
+    watermark = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    store.set_watermark(watermark)
+
+    assert store.sync(FakeTransactionsApi(failures=['all'])) == 0
+    assert store.watermark() == watermark
+
+
+def test_naive_watermark_is_local_time(store):
+    local = datetime(2026, 1, 1, 12)
+    store.set_watermark(local)
+    assert store.watermark() == local.astimezone()